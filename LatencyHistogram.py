@@ -0,0 +1,107 @@
+import json
+import math
+
+class LatencyHistogram():
+    """High dynamic range latency histogram.
+    Latencies are recorded in seconds and stored as integer microseconds, rounded down to a fixed number
+    of significant figures. This keeps the relative error of every bucket the same (1% for 2 significant figures)
+    whether a query takes 50 microseconds or 50 seconds, and the buckets can be merged across threads and runs."""
+    def __init__(self, significant_figures=2):
+        self.significant_figures = significant_figures
+        self.counts = {}
+        self.total_count = 0
+        self.min_microseconds = None
+        self.max_microseconds = None
+        self.sum_microseconds = 0
+
+    def bucket(self, microseconds):
+        if microseconds < 10 ** self.significant_figures:
+            return microseconds
+        magnitude = 10 ** (int(math.log10(microseconds)) + 1 - self.significant_figures)
+        return (microseconds // magnitude) * magnitude
+
+    def record(self, seconds):
+        microseconds = int(seconds * 1_000_000)
+        bucket = self.bucket(microseconds)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total_count += 1
+        self.sum_microseconds += microseconds
+        if self.min_microseconds is None or microseconds < self.min_microseconds:
+            self.min_microseconds = microseconds
+        if self.max_microseconds is None or microseconds > self.max_microseconds:
+            self.max_microseconds = microseconds
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total_count += other.total_count
+        self.sum_microseconds += other.sum_microseconds
+        if other.min_microseconds is not None:
+            self.min_microseconds = other.min_microseconds if self.min_microseconds is None else min(self.min_microseconds, other.min_microseconds)
+            self.max_microseconds = other.max_microseconds if self.max_microseconds is None else max(self.max_microseconds, other.max_microseconds)
+        return self
+
+    def percentile(self, percentile):
+        """Latency in seconds at the given percentile (0-100), using the lower bound of the bucket"""
+        if self.total_count == 0:
+            return None
+        target_count = max(1, math.ceil(self.total_count * percentile / 100))
+        running_count = 0
+        for bucket in sorted(self.counts):
+            running_count += self.counts[bucket]
+            if running_count >= target_count:
+                return bucket / 1_000_000
+        return self.max_microseconds / 1_000_000
+
+    def mean(self):
+        if self.total_count == 0:
+            return None
+        return self.sum_microseconds / self.total_count / 1_000_000
+
+    def summary(self):
+        """Dict of the metrics to log, all latencies in seconds"""
+        if self.total_count == 0:
+            return {'count': 0}
+        return {
+            'count': self.total_count,
+            'mean_seconds': self.mean(),
+            'min_seconds': self.min_microseconds / 1_000_000,
+            'p50_seconds': self.percentile(50),
+            'p90_seconds': self.percentile(90),
+            'p99_seconds': self.percentile(99),
+            'p999_seconds': self.percentile(99.9),
+            'max_seconds': self.max_microseconds / 1_000_000,
+        }
+
+    def to_json(self):
+        return json.dumps({
+            'unit': 'microseconds',
+            'significant_figures': self.significant_figures,
+            'total_count': self.total_count,
+            'min': self.min_microseconds,
+            'max': self.max_microseconds,
+            'sum': self.sum_microseconds,
+            # JSON keys must be strings
+            'counts': {str(bucket): count for bucket, count in sorted(self.counts.items())},
+        })
+
+    @classmethod
+    def from_json(cls, histogram_json):
+        histogram_dict = json.loads(histogram_json)
+        histogram = cls(significant_figures=histogram_dict['significant_figures'])
+        histogram.counts = {int(bucket): count for bucket, count in histogram_dict['counts'].items()}
+        histogram.total_count = histogram_dict['total_count']
+        histogram.min_microseconds = histogram_dict['min']
+        histogram.max_microseconds = histogram_dict['max']
+        histogram.sum_microseconds = histogram_dict['sum']
+        return histogram
+
+
+if __name__ == '__main__':
+    import random
+    histogram = LatencyHistogram()
+    for i in range(100_000):
+        histogram.record(random.lognormvariate(-7, 1))
+    print(histogram.summary())
+    round_tripped = LatencyHistogram.from_json(histogram.to_json())
+    print(round_tripped.summary() == histogram.summary(), len(histogram.counts), 'buckets')
@@ -0,0 +1,88 @@
+import os
+import threading
+
+try:
+    import psutil
+except ImportError:
+    # psutil is not available in every venv, so fall back to /proc on Linux
+    psutil = None
+
+def get_rss_bytes():
+    """Current resident set size of this process in bytes, or None without psutil or /proc.
+    The lifetime peak from getrusage is not a fallback, since a peak that never goes down would make every
+    later measurement start at the highest RSS of the process so far"""
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss
+    try:
+        with open('/proc/self/statm') as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+if psutil is None and get_rss_bytes() is None:
+    print('PeakMemoryTracker: neither psutil nor /proc/self/statm is available, so peak_rss_bytes and rss_growth_bytes are not recorded')
+
+def get_high_water_mark_bytes():
+    """Peak resident set size of this process image in bytes from /proc/self/status, or None where that is unavailable.
+    Unlike ru_maxrss this is not carried over from the parent when a child process is forked and then execs"""
+    try:
+        with open('/proc/self/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+class PeakMemoryTracker():
+    """Sample the RSS of this process on a background thread to find the peak while a block of code runs.
+    Used like:
+        with PeakMemoryTracker() as tracker:
+            do_work()
+        tracker.peak_rss_bytes, tracker.rss_growth_bytes
+    Both are None if the RSS cannot be measured (see get_rss_bytes)"""
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_rss_bytes = None
+        self.peak_rss_bytes = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        if self.start_rss_bytes is None:
+            return
+        while not self._stop_event.is_set():
+            self.peak_rss_bytes = max(self.peak_rss_bytes, get_rss_bytes())
+            self._stop_event.wait(self.interval)
+
+    def __enter__(self):
+        self.start_rss_bytes = get_rss_bytes()
+        self.peak_rss_bytes = self.start_rss_bytes
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop_event.set()
+        self._thread.join()
+        if self.start_rss_bytes is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, get_rss_bytes())
+        return False
+
+    @property
+    def rss_growth_bytes(self):
+        if self.start_rss_bytes is None:
+            return None
+        return self.peak_rss_bytes - self.start_rss_bytes
+
+
+if __name__ == '__main__':
+    import time
+    with PeakMemoryTracker() as tracker:
+        big_list = [0] * 50_000_000
+        time.sleep(0.1)
+        del big_list
+    print('start_rss_bytes', tracker.start_rss_bytes)
+    print('peak_rss_bytes', tracker.peak_rss_bytes)
+    print('rss_growth_bytes', tracker.rss_growth_bytes)
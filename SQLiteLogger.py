@@ -13,6 +13,8 @@ class SQLiteLogger():
         self.con = sqlite3.connect(sqlite_filename)
         self.cur = self.con.cursor()
         self.create_results_table()
+        self.create_metrics_table()
+        self.create_histograms_table()
         self.run_id = self.get_new_run_id()
 
     def create_results_table(self):
@@ -25,6 +27,30 @@ class SQLiteLogger():
                 time float 
             )            
         """)
+    def create_metrics_table(self):
+        # Additional measurements (rows/s, peak memory, file sizes, ...) that belong to a timed benchmark
+        self.cur.execute("""
+            create table if not exists metrics (
+                run_id int,
+                repeat_id int,
+                benchmark varchar,
+                scenario json,
+                metric varchar,
+                value float
+            )
+        """)
+    def create_histograms_table(self):
+        # Latency distributions (LatencyHistogram.to_json()) that belong to a timed benchmark
+        self.cur.execute("""
+            create table if not exists histograms (
+                run_id int,
+                repeat_id int,
+                benchmark varchar,
+                scenario json,
+                histogram_name varchar,
+                histogram json
+            )
+        """)
     def get_new_run_id(self):
         max_run_id = self.cur.execute("""select max(run_id) as max_run_id from results""").fetchall()[0][0]
 
@@ -45,10 +71,31 @@ class SQLiteLogger():
         self.cur.executemany("""insert into results values(?, ?, ?, ?, ?)""", data)
         self.con.commit()
     
+    def log_metrics(self, input_data):
+        # input_data rows are (repeat_id, benchmark, scenario, metric, value)
+        data = []
+        for row in input_data:
+            data.append((self.run_id,) + row)
+
+        self.cur.executemany("""insert into metrics values(?, ?, ?, ?, ?, ?)""", data)
+        self.con.commit()
+
+    def log_histograms(self, input_data):
+        # input_data rows are (repeat_id, benchmark, scenario, histogram_name, histogram_json)
+        data = []
+        for row in input_data:
+            data.append((self.run_id,) + row)
+
+        self.cur.executemany("""insert into histograms values(?, ?, ?, ?, ?, ?)""", data)
+        self.con.commit()
+
     def get_results(self):
         # return self.cur.execute("""select * from results order by run_id, benchmark, scenario, repeat_id""").fetchall()
         return self.cur.execute("""select * from results order by benchmark, run_id, scenario, repeat_id""").fetchall()
     
+    def get_metrics(self):
+        return self.cur.execute("""select * from metrics order by benchmark, run_id, scenario, repeat_id, metric""").fetchall()
+
     def pprint(self, results):
         print_string = '[' + '\n'
         for row in results:
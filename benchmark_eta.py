@@ -0,0 +1,323 @@
+import ast
+import functools
+import glob
+import json
+import math
+import os
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Runtime and peak memory estimates for the work units of benchmark_loop_python.py, learnt from earlier SQLite logs.
+# A work unit is one call of benchmark_script.py for a DuckDB version with one test flag enabled.
+
+history_log_pattern = 'benchmark_log*.db'
+
+# Which test flag of benchmark_script.py logs a benchmark, by the number prefix of the benchmark name.
+# Isolated steps reuse the test_performance names, so they are told apart by their scenario instead
+test_benchmark_prefixes = {
+    'test_performance': ('00', '01'),
+    'test_scale': ('1', '2'),
+    'test_window_performance': ('30', '31'),
+    'test_window_sweep': ('32',),
+    'test_streaming_export': ('40',),
+    'test_arrow_ipc': ('45',),
+    'test_parquet_matrix': ('50',),
+    'test_reopen': ('55',),
+    'test_concurrency': ('60',),
+    'test_small_query_latency': ('65',),
+    'test_library_sweep': ('66',),
+    'test_ingestion': ('70',),
+    'test_csv_matrix': ('75',),
+    'test_startup': ('80',),
+    'test_user_workloads': ('95',),
+    # Not a test, but runs once per call of benchmark_script.py whatever the tests are
+    'record_calibration': ('85',),
+}
+memory_metrics = ['peak_rss_bytes', 'child_max_rss_bytes']
+
+benchmark_script_file = 'benchmark_script.py'
+# The settings in benchmark_script.py with the row counts each test runs at
+test_row_count_settings = {
+    'test_streaming_export': 'streaming_export_row_counts',
+    'test_parquet_matrix': 'parquet_matrix_row_counts',
+    'test_csv_matrix': 'csv_matrix_row_counts',
+    'test_arrow_ipc': 'arrow_ipc_row_counts',
+    'test_concurrency': 'concurrency_row_counts',
+    'test_small_query_latency': 'small_query_row_counts',
+    'test_ingestion': 'ingestion_row_counts',
+    'test_window_sweep': 'window_sweep_row_counts',
+}
+# test_scale loads fixed G1/J1 files rather than a setting
+scale_row_counts = ['1e8', '1e9']
+
+
+def get_test_flag(benchmark, scenario):
+    if scenario.get('isolation') == 'process':
+        return 'test_isolated_steps'
+    for test_flag, prefixes in test_benchmark_prefixes.items():
+        if benchmark.startswith(prefixes):
+            return test_flag
+    return None
+
+def load_history(log_files):
+    """One row per logged sample, with the test flag that logged it and the peak memory of the sample if it was tracked"""
+    rows = []
+    for log_file in log_files:
+        con = sqlite3.connect(log_file)
+        try:
+            tables = [row[0] for row in con.execute("select name from sqlite_master where type = 'table'").fetchall()]
+            if 'results' not in tables:
+                continue
+            peak_memory = {}
+            if 'metrics' in tables:
+                placeholders = ', '.join('?' for _ in memory_metrics)
+                for run_id, repeat_id, benchmark, scenario, value in con.execute(
+                    f"select run_id, repeat_id, benchmark, scenario, value from metrics where metric in ({placeholders})", memory_metrics
+                ).fetchall():
+                    key = (run_id, repeat_id, benchmark, scenario)
+                    peak_memory[key] = max(peak_memory.get(key, 0), value)
+
+            for run_id, repeat_id, benchmark, scenario, elapsed_time in con.execute("select run_id, repeat_id, benchmark, scenario, time from results").fetchall():
+                scenario_dict = json.loads(scenario)
+                rows.append({
+                    'log_file': log_file,
+                    'run_id': run_id,
+                    'repeat_id': repeat_id,
+                    'benchmark': benchmark,
+                    'duckdb_version': str(scenario_dict.get('duckdb_version', '')).lstrip('v'),
+                    'row_count': scenario_dict.get('row_count'),
+                    'test': get_test_flag(benchmark, scenario_dict),
+                    'time': elapsed_time,
+                    'peak_rss_bytes': peak_memory.get((run_id, repeat_id, benchmark, scenario)),
+                })
+        finally:
+            con.close()
+    return pd.DataFrame(rows, columns=['log_file', 'run_id', 'repeat_id', 'benchmark', 'duckdb_version', 'row_count', 'test', 'time', 'peak_rss_bytes'])
+
+@functools.lru_cache()
+def get_script_settings(script_file=benchmark_script_file):
+    """Top level assignments of literals in benchmark_script.py, like {'test_scale': True, 'ingestion_row_counts': ['1e7']}"""
+    with open(script_file, 'r') as f:
+        tree = ast.parse(f.read())
+    settings = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                settings[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return settings
+
+def get_enabled_tests(script_file=benchmark_script_file):
+    """The test flags that are True in benchmark_script.py, which a call without DUCKDB_BENCHMARK_TESTS runs"""
+    return [name for name, value in get_script_settings(script_file).items() if name.startswith('test_') and value is True]
+
+def get_configured_row_counts(test):
+    """Row counts test runs at, or None for the tests without a row count setting"""
+    if test == 'test_scale':
+        return scale_row_counts
+    setting = test_row_count_settings.get(test)
+    if setting is None:
+        return None
+    return get_script_settings().get(setting)
+
+def get_repeat_totals(history, test, duckdb_version=None):
+    """Time of one repeat of a test: the sum over its benchmarks (and row counts) within each logged repeat"""
+    rows = history[history['test'] == test]
+    if duckdb_version is not None:
+        rows = rows[rows['duckdb_version'] == duckdb_version]
+    return rows.groupby(['log_file', 'run_id', 'repeat_id', 'duckdb_version'], as_index=False).agg(time=('time', 'sum'), peak_rss_bytes=('peak_rss_bytes', 'max'))
+
+def get_row_count_estimates(history, test, duckdb_version=None):
+    """{row_count: (median seconds, max peak_rss_bytes)} of one repeat of test at each logged row count"""
+    rows = history[history['test'] == test]
+    if duckdb_version is not None:
+        rows = rows[rows['duckdb_version'] == duckdb_version]
+    rows = rows[rows['row_count'].notna()]
+    totals = rows.groupby(['log_file', 'run_id', 'repeat_id', 'duckdb_version', 'row_count'], as_index=False).agg(time=('time', 'sum'), peak_rss_bytes=('peak_rss_bytes', 'max'))
+    estimates = {}
+    for row_count, row_count_totals in totals.groupby('row_count'):
+        peak_rss_bytes = row_count_totals['peak_rss_bytes'].max()
+        estimates[row_count] = (statistics.median(row_count_totals['time']), None if pd.isna(peak_rss_bytes) else peak_rss_bytes)
+    return estimates
+
+def extrapolate_row_count(estimates, row_count):
+    """Scale the estimate of the nearest logged row count linearly to row_count, like 1e8 history for a 1e9 run"""
+    if not estimates:
+        return None
+    nearest = min(estimates, key=lambda known: abs(math.log(float(row_count) / float(known))))
+    seconds, peak_rss_bytes = estimates[nearest]
+    factor = float(row_count) / float(nearest)
+    return seconds * factor, None if peak_rss_bytes is None else peak_rss_bytes * factor
+
+def estimate_configured_row_counts(history, duckdb_version, test, row_counts):
+    """(seconds, peak_rss_bytes, sources) of one repeat of test over row_counts, from the history of each row count
+    for this version, else for the other versions, else extrapolated from the nearest logged row count.
+    seconds is None if the test has no history at any row count"""
+    same_version = get_row_count_estimates(history, test, duckdb_version)
+    other_versions = get_row_count_estimates(history, test)
+    seconds = 0
+    peak_rss_bytes = None
+    sources = []
+    for row_count in row_counts:
+        if row_count in same_version:
+            estimate, source = same_version[row_count], 'same version'
+        elif row_count in other_versions:
+            estimate, source = other_versions[row_count], 'other versions'
+        else:
+            estimate, source = extrapolate_row_count(same_version or other_versions, row_count), f'extrapolated to {row_count}'
+        if estimate is None:
+            return None, None, ['no history']
+        seconds += estimate[0]
+        if estimate[1] is not None:
+            peak_rss_bytes = max(peak_rss_bytes or 0, estimate[1])
+        sources.append(source)
+    return seconds, peak_rss_bytes, sources
+
+def estimate_calibration(history):
+    """Median seconds of the calibration suite in one call, 0 without history"""
+    calibration_totals = history[history['test'] == 'record_calibration'].groupby(['log_file', 'run_id'])['time'].sum()
+    if len(calibration_totals) == 0:
+        return 0
+    return statistics.median(calibration_totals)
+
+def estimate_work_unit(history, duckdb_version, test, repeats, include_calibration=True):
+    """Estimated seconds and peak memory of running test for duckdb_version with this many repeats.
+    Tests with configured row counts are estimated per row count (see estimate_configured_row_counts), the others from
+    the total of each repeat. Falls back on the other versions when this version has no history for the test.
+    relative_standard_error is how uncertain the same version history is, and is None without it"""
+    totals = get_repeat_totals(history, test, duckdb_version)
+    source = 'same version'
+    if len(totals) == 0:
+        totals = get_repeat_totals(history, test)
+        source = 'other versions'
+    if len(totals) == 0:
+        return {'seconds': None, 'peak_rss_bytes': None, 'samples': 0, 'relative_standard_error': None, 'source': 'no history'}
+
+    seconds = statistics.median(totals['time']) * repeats
+    peak_rss_bytes = totals['peak_rss_bytes'].max()
+    peak_rss_bytes = None if pd.isna(peak_rss_bytes) else peak_rss_bytes
+    row_counts = get_configured_row_counts(test)
+    if row_counts:
+        row_count_seconds, row_count_peak_rss_bytes, sources = estimate_configured_row_counts(history, duckdb_version, test, row_counts)
+        if row_count_seconds is not None:
+            seconds = row_count_seconds * repeats
+            peak_rss_bytes = row_count_peak_rss_bytes
+            source = ', '.join(dict.fromkeys(sources))
+    if include_calibration:
+        # Each call also runs the calibration suite (start and end) once
+        seconds += estimate_calibration(history)
+
+    relative_standard_error = None
+    if source == 'same version' and len(totals) > 1 and totals['time'].mean() > 0:
+        relative_standard_error = totals['time'].std() / totals['time'].mean() / len(totals) ** 0.5
+    return {
+        'seconds': seconds,
+        'peak_rss_bytes': peak_rss_bytes,
+        'samples': len(totals),
+        'relative_standard_error': relative_standard_error,
+        'source': source,
+    }
+
+def get_informativeness(estimate):
+    """Work units that have never run for their version tell us the most, then the ones with the noisiest history"""
+    if estimate['source'] != 'same version':
+        return 1.0
+    if estimate['relative_standard_error'] is None:
+        # A single sample
+        return 0.5
+    return min(estimate['relative_standard_error'], 0.5)
+
+def get_physical_memory_bytes():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def plan_work_units(work_units, history, repeats, time_budget_seconds=None):
+    """Order (duckdb_version, storage_placement, test) work units with the most informative first, and drop the ones
+    that do not fit time_budget_seconds. Units without an estimate are kept, since their cost is unknown.
+    Returns (planned, dropped), as lists of (work_unit, estimate)"""
+    # Each work unit selects a single test, so benchmark_script.py skips the calibration
+    estimated_units = [(work_unit, estimate_work_unit(history, work_unit[0], work_unit[2], repeats, include_calibration=False)) for work_unit in work_units]
+    estimated_units.sort(key=lambda unit: (-get_informativeness(unit[1]), unit[1]['seconds'] or 0))
+
+    planned = []
+    dropped = []
+    planned_seconds = 0
+    for work_unit, estimate in estimated_units:
+        seconds = estimate['seconds'] or 0
+        if time_budget_seconds is not None and planned_seconds + seconds > time_budget_seconds:
+            dropped.append((work_unit, estimate))
+            continue
+        planned.append((work_unit, estimate))
+        planned_seconds += seconds
+    return planned, dropped
+
+def format_plan(planned, dropped):
+    physical_memory_bytes = get_physical_memory_bytes()
+    lines = []
+    for label, units in [('Planned', planned), ('Dropped to fit the time budget', dropped)]:
+        if not units:
+            continue
+        lines.append(f'{label}:')
+        for (duckdb_version, storage_placement, test), estimate in units:
+            seconds = 'unknown' if estimate['seconds'] is None else str(timedelta(seconds=round(estimate['seconds'])))
+            peak = 'unknown' if estimate['peak_rss_bytes'] is None else f"{estimate['peak_rss_bytes'] / 1024**3:.1f} GB"
+            warning = ''
+            if estimate['peak_rss_bytes'] is not None and physical_memory_bytes is not None and estimate['peak_rss_bytes'] > physical_memory_bytes:
+                warning = ' (more than the memory of this machine)'
+            lines.append(f"\t{duckdb_version} {storage_placement} {test}: {seconds}, peak {peak}{warning}, from {estimate['source']} ({estimate['samples']} samples)")
+    planned_seconds = sum(estimate['seconds'] or 0 for _, estimate in planned)
+    lines.append(f'Estimated total: {timedelta(seconds=round(planned_seconds))} for {len(planned)} work units')
+    return '\n'.join(lines)
+
+def estimate_script_call(history, duckdb_version, tests, repeats):
+    """Estimated seconds of one call of benchmark_script.py that runs every test in tests, with the calibration.
+    None if none of the tests has any history"""
+    estimates = [estimate_work_unit(history, duckdb_version, test, repeats, include_calibration=False)['seconds'] for test in tests]
+    if all(seconds is None for seconds in estimates):
+        return None
+    return sum(seconds or 0 for seconds in estimates) + estimate_calibration(history)
+
+class RunEta():
+    """Live ETA for a list of work units with estimated seconds (None if unknown).
+    The estimates of the remaining units are scaled by how long the finished units took compared with their estimates,
+    so a machine that is slower than the history catches up after a few units"""
+    def __init__(self, estimated_seconds):
+        self.estimated_seconds = list(estimated_seconds)
+        self.finished = {}
+        self.start_time = time.perf_counter()
+
+    def finish(self, position, elapsed_seconds):
+        self.finished[position] = elapsed_seconds
+
+    def get_correction(self):
+        estimated = sum(self.estimated_seconds[position] for position in self.finished if self.estimated_seconds[position])
+        actual = sum(elapsed for position, elapsed in self.finished.items() if self.estimated_seconds[position])
+        return actual / estimated if estimated else 1.0
+
+    def get_remaining_seconds(self):
+        remaining = [seconds for position, seconds in enumerate(self.estimated_seconds) if position not in self.finished]
+        return sum(seconds or 0 for seconds in remaining) * self.get_correction(), sum(seconds is None for seconds in remaining)
+
+    def summary(self):
+        remaining_seconds, unknown_count = self.get_remaining_seconds()
+        elapsed = timedelta(seconds=round(time.perf_counter() - self.start_time))
+        eta = datetime.now() + timedelta(seconds=remaining_seconds)
+        summary = (f'Finished {len(self.finished)} of {len(self.estimated_seconds)} work units in {elapsed}. '
+                   f'Estimated remaining: {timedelta(seconds=round(remaining_seconds))}, ETA {eta.isoformat(sep=" ", timespec="minutes")}')
+        if unknown_count:
+            summary += f' plus {unknown_count} work units without history'
+        return summary
+
+
+if __name__ == '__main__':
+    history = load_history(sorted(glob.glob(history_log_pattern)))
+    print('Loaded', len(history), 'samples')
+    work_units = [(duckdb_version, 'venv', test) for duckdb_version in sorted(history['duckdb_version'].unique()) for test in ['test_performance', 'test_window_performance']]
+    print(format_plan(*plan_work_units(work_units, history, repeats=3)))
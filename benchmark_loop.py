@@ -194,7 +194,7 @@ if __name__ == '__main__':
     logger.pprint(logger.get_results())
 
     # TODO: Basic plots of the results (from SQLite? More repeatable / analyzable after the fact)
-    # TODO: Compare Python and CLI
+    # Python vs CLI on the same SQL: see benchmark_loop_workloads.py
     # TODO: Compare Wasm and native
     # Benchmark types:
     #       Speed of TPC-H
@@ -6,7 +6,10 @@
 # Example Pandas dataframe (H2O.ai?)
 
 from datetime import datetime, timedelta
+import glob
 import time
+import json
+import random
 import subprocess
 import shutil
 import duckdb
@@ -15,53 +18,8 @@ import os
 from contextlib import redirect_stdout
 
 from SQLiteLogger import SQLiteLogger
-
-# Versions:
-# 0.2.7 is the first with MacOS ARM
-# Runs on Python 3.9
-# (0.10.0 also runs on Python 3.9)
-
-versions = {
-    # No precompiled CLI prior to 0.1.9
-    # '0.1.3': {'date':datetime.strptime('2020-02-03','%Y-%m-%d')},
-    # '0.1.5': {'date':datetime.strptime('2020-03-02','%Y-%m-%d')},
-    # '0.1.6': {'date':datetime.strptime('2020-04-05','%Y-%m-%d')},
-    # '0.1.7': {'date':datetime.strptime('2020-05-04','%Y-%m-%d')},
-    # '0.1.8': {'date':datetime.strptime('2020-05-29','%Y-%m-%d')},
-    # '0.1.9': {'date':datetime.strptime('2020-06-19','%Y-%m-%d')},
-    # '0.2.0': {'date':datetime.strptime('2020-07-23','%Y-%m-%d')},
-    # '0.2.1': {'date':datetime.strptime('2020-08-29','%Y-%m-%d')},
-    # '0.2.2': {'date':datetime.strptime('2020-11-01','%Y-%m-%d')},
-    # '0.2.3': {'date':datetime.strptime('2020-12-03','%Y-%m-%d')},
-    # '0.2.4': {'date':datetime.strptime('2021-02-01','%Y-%m-%d')},
-    # '0.2.5': {'date':datetime.strptime('2021-03-10','%Y-%m-%d')},
-    # '0.2.6': {'date':datetime.strptime('2021-05-08','%Y-%m-%d')},
-
-    # 0.2.7 is the first with MacOS ARM
-    '0.2.7': {'date':datetime.strptime('2021-06-14','%Y-%m-%d')},
-    '0.2.8': {'date':datetime.strptime('2021-08-02','%Y-%m-%d')},
-    '0.2.9': {'date':datetime.strptime('2021-09-06','%Y-%m-%d')},
-    '0.3.0': {'date':datetime.strptime('2021-10-06','%Y-%m-%d')},
-    '0.3.1': {'date':datetime.strptime('2021-11-16','%Y-%m-%d')},
-    '0.3.2': {'date':datetime.strptime('2022-02-07','%Y-%m-%d')},
-    # 0.3.3 did not upload to pip correctly so it should be skipped
-    # '0.3.3': {'date':datetime.strptime('2022-04-11','%Y-%m-%d')},
-    '0.3.4': {'date':datetime.strptime('2022-04-25','%Y-%m-%d'),'osx-universal':True},
-    '0.4.0': {'date':datetime.strptime('2022-06-20','%Y-%m-%d'),'osx-universal':True},
-    '0.5.1': {'date':datetime.strptime('2022-09-19','%Y-%m-%d'),'osx-universal':True},
-    '0.6.1': {'date':datetime.strptime('2022-12-06','%Y-%m-%d'),'osx-universal':True},
-    '0.7.1': {'date':datetime.strptime('2023-02-27','%Y-%m-%d'),'osx-universal':True},
-    '0.8.1': {'date':datetime.strptime('2023-06-13','%Y-%m-%d'),'osx-universal':True},
-    '0.9.0': {'date':datetime.strptime('2023-09-26','%Y-%m-%d'),'osx-universal':True},
-    '0.9.1': {'date':datetime.strptime('2023-10-11','%Y-%m-%d'),'osx-universal':True},
-    '0.9.2': {'date':datetime.strptime('2023-11-14','%Y-%m-%d'),'osx-universal':True},
-    '0.10.0': {'date':datetime.strptime('2024-02-13','%Y-%m-%d'),'osx-universal':True},
-    '0.10.1': {'date':datetime.strptime('2024-03-18','%Y-%m-%d'),'osx-universal':True},
-    '0.10.2': {'date':datetime.strptime('2024-04-17','%Y-%m-%d'),'osx-universal':True},
-    '0.10.3': {'date':datetime.strptime('2024-05-22','%Y-%m-%d'),'osx-universal':True},
-    '1.0.0': {'date':datetime.strptime('2024-06-03','%Y-%m-%d'),'osx-universal':True},
-    'latest': {'date':datetime.now(), 'osx-universal':True},
-}
+from duckdb_versions import versions
+from benchmark_eta import load_history, estimate_work_unit, estimate_script_call, get_enabled_tests, plan_work_units, format_plan, RunEta, history_log_pattern
 
 # First, install Python 3.9 if it isn't installed already
 # brew install python@3.9
@@ -124,7 +82,7 @@ def create_virtualenv(prefix, duckdb_version, libraries_list, local_duckdb_sourc
         with open(f'{name}/bin/requirements.txt', 'w') as f:
             f.writelines([
                 '\n'.join(libraries_list)+'\n',
-                'duckdb=='+version,
+                'duckdb=='+duckdb_version,
             ])
 
         commands = [
@@ -142,7 +100,8 @@ def create_virtualenv(prefix, duckdb_version, libraries_list, local_duckdb_sourc
 
     print('virtual environment created and libraries added')
 
-def run_python_script(prefix, duckdb_version, script_filename):
+def run_python_script(prefix, duckdb_version, script_filename, env_overrides=None):
+    """Run script_filename with the venv's Python. env_overrides are extra environment variables for the script"""
     name = prefix + duckdb_version.replace('.','_')
     with open(script_filename, 'r') as script_file:
         python_script = script_file.read()
@@ -152,12 +111,66 @@ def run_python_script(prefix, duckdb_version, script_filename):
         '-c',
         python_script,
     ]
+    env = None
+    if env_overrides:
+        env = {**os.environ, **env_overrides}
     # print(' '.join(commands))
-    result = subprocess.run(commands, capture_output=True, text=True)
+    result = subprocess.run(commands, capture_output=True, text=True, env=env)
     print(result.stdout)
     print('result.stderr:\n', result.stderr)
 
 
+def get_latest_library_version(con, library_name, release_date):
+    """Latest pandas or pyarrow version uploaded by release_date"""
+    return con.execute(f"""
+        from '{library_name}_versions.csv'
+        select 
+            max_by(version,max_upload_time) as max_version
+        where
+            max_upload_time <= '{release_date}'::datetime
+            and version not ilike '%rc%'
+        """).fetchall()[0][0]
+
+def get_minor_release_versions(con, library_name, minimum_version):
+    """Latest patch of each minor release of pandas or pyarrow, from the (major, minor) minimum_version on"""
+    minor_releases = con.execute(f"""
+        from '{library_name}_versions.csv'
+        select
+            string_split(version, '.')[1]::int as major,
+            string_split(version, '.')[2]::int as minor,
+            max_by(version, max_upload_time) as latest_patch,
+        where regexp_full_match(version, '[0-9]+[.][0-9]+[.][0-9]+')
+        group by all
+        order by major, minor
+        """).fetchall()
+    return [latest_patch for major, minor, latest_patch in minor_releases if (major, minor) >= minimum_version]
+
+def get_library_sweep(con, release_date, minimum_versions):
+    """Venvs for a sweep over pandas versions and then pyarrow versions, as (venv_prefix, libraries_list).
+    The library that is not being swept stays at the version the normal loop picks for release_date"""
+    default_versions = {library_name: get_latest_library_version(con, library_name, release_date) for library_name in ['pandas', 'pyarrow']}
+    sweep = []
+    for library_name in ['pandas', 'pyarrow']:
+        for library_version in get_minor_release_versions(con, library_name, minimum_versions[library_name]):
+            library_versions = {**default_versions, library_name: library_version}
+            venv_prefix = f"./venv_sweep_pandas_{library_versions['pandas'].replace('.','_')}_pyarrow_{library_versions['pyarrow'].replace('.','_')}_"
+            libraries_list = ['pandas=='+library_versions['pandas'], 'pyarrow=='+library_versions['pyarrow'], 'psutil']
+            if (venv_prefix, libraries_list) not in sweep:
+                sweep.append((venv_prefix, libraries_list))
+    return sweep
+
+def get_interleaved_schedule(work_units, block_count, seed):
+    """Randomized complete blocks of (block, version, storage_placement, test).
+    Every block runs each (version, storage_placement, test) work unit once, in its own shuffled order, so drift over
+    the run (heat, page cache, background jobs) is spread over all versions instead of landing on the last ones"""
+    rng = random.Random(seed)
+    schedule = []
+    for block in range(block_count):
+        block_units = list(work_units)
+        rng.shuffle(block_units)
+        schedule.extend((block, version, storage_placement, test) for version, storage_placement, test in block_units)
+    return schedule
+
 def log_on_regular_cadence(total_time, interval):
     logger = SQLiteLogger('benchmark_log_python.db', delete_file=False)
     global stop_logging
@@ -168,6 +181,8 @@ def log_on_regular_cadence(total_time, interval):
         logger.pprint(logger.get_results())
         print(datetime.now().isoformat(sep=' '),flush=True)
         print('Elapsed time:',timedelta(seconds=time.perf_counter() - start_time_counter),flush=True)
+        if run_eta is not None:
+            print(run_eta.summary(),flush=True)
         if stop_logging:
             break
         time.sleep(interval)
@@ -218,6 +233,10 @@ with open(filename, 'a') as f:
         run_scripts = True
         # Note, need to run git pull in this repo before running this script to get the latest
         local_duckdb_source = '/Users/alex/Documents/DuckDB/duckdb/tools/pythonpkg'
+        # Names from storage_placements in benchmark_script.py. The script is run once per placement
+        storage_placements_to_test = ['venv']
+        # storage_placements_to_test = ['memory', 'tmpfs', 'disk']
+        # 'disk' also needs DUCKDB_BENCHMARK_DISK_DIRECTORY (and optionally DUCKDB_BENCHMARK_DISK_TEMP_DIRECTORY) set in the environment
         # versions_to_test = ['latest', '1.0.0', '0.10.3']
         # versions_to_test = ['1.0.0', '0.10.3']
         # versions_to_test = ['0.2.7', '0.2.8']
@@ -228,6 +247,47 @@ with open(filename, 'a') as f:
         # versions_to_test = ['0.2.7', '0.2.8', '0.2.9', '0.3.0',] # '0.3.1', '0.3.2', ] # '0.3.4', '0.4.0', '0.5.1', '0.6.1', '0.7.1',] # '0.8.1', '0.9.0',] # '0.9.1', '0.9.2',] # '0.10.0', '0.10.1', '0.10.2']
         # versions = {k: versions.get(k) for k in versions_to_test}
 
+        # Hold one DuckDB version fixed and run a venv per pandas and pyarrow version instead of looping over DuckDB versions
+        library_sweep_duckdb_version = None
+        # library_sweep_duckdb_version = '1.0.0'
+        library_sweep_minimum_versions = {'pandas': (1, 0), 'pyarrow': (5, 0)}
+        # Flag names from benchmark_script.py to run in each sweep venv
+        library_sweep_tests = ['test_library_sweep', 'test_startup']
+        # Flag names from benchmark_script.py to run as separate (version, storage placement, test) work units.
+        # Each test is one unit, since the steps within a test depend on each other.
+        # None runs the flags set in benchmark_script.py in one call per version and storage placement instead,
+        # which cannot be fit to a time budget. Interleaving splits those flags into work units
+        tests_to_run = None
+        # tests_to_run = ['test_performance', 'test_window_performance']
+        # Repeats per work unit (or per call, with tests_to_run = None) when not interleaving
+        work_unit_repeat = 3
+        # The work units are estimated from the earlier logs (benchmark_log*.db) and the least informative are dropped
+        # until the estimate fits. None keeps every work unit, ordered with the most informative first
+        time_budget_seconds = None
+        # Run one repeat of each work unit per block in a shuffled order,
+        # instead of all repeats of a version back to back. Each block is logged as the repeat_id
+        interleave_schedule = False
+        interleave_blocks = 3
+        # None picks a new seed. The seed and the order are written to logs/ so a run can be replayed
+        interleave_seed = None
+
+        if interleave_schedule and tests_to_run is None:
+            tests_to_run = get_enabled_tests()
+            print('Interleaving the tests enabled in benchmark_script.py:', ', '.join(tests_to_run), flush=True)
+
+        if library_sweep_duckdb_version is not None:
+            library_sweep_details = versions[library_sweep_duckdb_version]
+            # Only the sweep below runs
+            versions = {}
+
+        # Set once the script calls are estimated, for the ETA in the background logging
+        run_eta = None
+        if run_scripts and tests_to_run is None:
+            # Estimated from the logs of the earlier runs (archived above)
+            history = load_history(sorted(glob.glob(history_log_pattern)))
+            enabled_tests = get_enabled_tests()
+            run_eta = RunEta([estimate_script_call(history, version, enabled_tests, work_unit_repeat) for version in reversed(list(versions)) for _ in storage_placements_to_test])
+            script_call_position = 0
         # t = Thread(target=log_on_regular_cadence,args=(1000000,300,))
         t = Thread(target=log_on_regular_cadence,args=(1000000,30,))
         t.start()
@@ -235,22 +295,8 @@ with open(filename, 'a') as f:
 
         for version, details in versions.items().__reversed__():
         # for version, details in versions.items():
-            latest_pandas_version = con.execute(f"""
-                from pandas_versions 
-                select 
-                    max_by(version,max_upload_time) as max_version
-                where
-                    max_upload_time <= '{details['date']}'::datetime
-                    and version not ilike '%rc%'
-                """).fetchall()[0][0]
-
-            latest_pyarrow_version = con.execute(f"""
-                from pyarrow_versions 
-                select 
-                    max_by(version,max_upload_time) as max_version
-                where
-                    max_upload_time <= '{details['date']}'::datetime
-                """).fetchall()[0][0]
+            latest_pandas_version = get_latest_library_version(con, 'pandas', details['date'])
+            latest_pyarrow_version = get_latest_library_version(con, 'pyarrow', details['date'])
             
             # # Pyarrow 5.0.0 is broken, and 4.0.1 does not compile numpy
             # if latest_pyarrow_version == '5.0.0':
@@ -261,19 +307,84 @@ with open(filename, 'a') as f:
             if create_environments:
                 if version in ['0.2.7','0.2.8','0.2.9','0.3.0']:
                     # Then pyarrow installation does not work (numpy failed to compile from source), so skip it
-                    create_virtualenv('./venv_', version, ['pandas=='+latest_pandas_version])
+                    create_virtualenv('./venv_', version, ['pandas=='+latest_pandas_version, 'psutil'])
                 elif version == 'latest':
-                    create_virtualenv('./venv_', version, ['pandas=='+latest_pandas_version, 'pyarrow=='+latest_pyarrow_version], local_duckdb_source)
+                    create_virtualenv('./venv_', version, ['pandas=='+latest_pandas_version, 'pyarrow=='+latest_pyarrow_version, 'psutil'], local_duckdb_source)
                 else:
-                    create_virtualenv('./venv_', version, ['pandas=='+latest_pandas_version, 'pyarrow=='+latest_pyarrow_version])
+                    create_virtualenv('./venv_', version, ['pandas=='+latest_pandas_version, 'pyarrow=='+latest_pyarrow_version, 'psutil'])
             
-            if run_scripts:
+            if run_scripts and tests_to_run is None:
+                for storage_placement in storage_placements_to_test:
+                    start_time = time.perf_counter()
+                    run_python_script('./venv_', version,'./benchmark_script.py', {'DUCKDB_BENCHMARK_STORAGE_PLACEMENT': storage_placement, 'DUCKDB_BENCHMARK_REPEAT': str(work_unit_repeat)})
+
+                    logger.pprint(logger.get_results())
+                    end_time = time.perf_counter()
+                    run_eta.finish(script_call_position, end_time - start_time)
+                    script_call_position += 1
+                    print(f'Running script for version {version} with storage placement {storage_placement} took {round(end_time-start_time,1)} seconds',flush=True)
+                    print(run_eta.summary(),flush=True)
+
+        if run_scripts and tests_to_run is not None:
+            work_units = [(version, storage_placement, test) for version in reversed(list(versions)) for storage_placement in storage_placements_to_test for test in tests_to_run]
+            # The log of this run was just archived, so it is part of the history too
+            history = load_history(sorted(glob.glob(history_log_pattern)))
+            repeats_per_call = 1 if interleave_schedule else work_unit_repeat
+            planned, dropped = plan_work_units(work_units, history, interleave_blocks if interleave_schedule else work_unit_repeat, time_budget_seconds)
+            print(format_plan(planned, dropped), flush=True)
+            planned_units = [work_unit for work_unit, _ in planned]
+
+            if interleave_schedule:
+                if interleave_seed is None:
+                    interleave_seed = random.randrange(2**32)
+                schedule = get_interleaved_schedule(planned_units, interleave_blocks, interleave_seed)
+                print('Interleaved schedule seed:', interleave_seed, flush=True)
+                with open(filename.replace('log.txt', f'schedule_at_{runtime}.json'), 'w') as schedule_file:
+                    json.dump({'seed': interleave_seed, 'schedule': schedule}, schedule_file, indent=1)
+            else:
+                schedule = [(None, version, storage_placement, test) for version, storage_placement, test in planned_units]
+
+            # Each work unit selects a single test, so benchmark_script.py skips the calibration
+            call_estimates = {work_unit: estimate_work_unit(history, work_unit[0], work_unit[2], repeats_per_call, include_calibration=False)['seconds'] for work_unit in planned_units}
+            run_eta = RunEta([call_estimates[(version, storage_placement, test)] for _, version, storage_placement, test in schedule])
+
+            # The single-test work units skip the calibration, so calibrate once before and once after the whole schedule,
+            # with the version and storage placement of the first work unit. build_results_warehouse.py applies the pair to every work unit in between
+            if schedule:
+                _, calibration_version, calibration_storage_placement, _ = schedule[0]
+                calibration_overrides = {'DUCKDB_BENCHMARK_TESTS': 'none', 'DUCKDB_BENCHMARK_STORAGE_PLACEMENT': calibration_storage_placement}
+                run_python_script('./venv_', calibration_version, './benchmark_script.py', {**calibration_overrides, 'DUCKDB_BENCHMARK_CALIBRATION': 'start'})
+
+            for position, (block, version, storage_placement, test) in enumerate(schedule):
                 start_time = time.perf_counter()
-                run_python_script('./venv_', version,'./benchmark_script.py')
-
-                logger.pprint(logger.get_results())
+                env_overrides = {
+                    'DUCKDB_BENCHMARK_STORAGE_PLACEMENT': storage_placement,
+                    'DUCKDB_BENCHMARK_TESTS': test,
+                    'DUCKDB_BENCHMARK_REPEAT': str(repeats_per_call),
+                }
+                if block is not None:
+                    env_overrides['DUCKDB_BENCHMARK_FIRST_REPEAT_ID'] = str(block)
+                run_python_script('./venv_', version, './benchmark_script.py', env_overrides)
                 end_time = time.perf_counter()
-                print(f'Running script for version {version} took {round(end_time-start_time,1)} seconds',flush=True)
+                run_eta.finish(position, end_time - start_time)
+                print(f'Work unit {position + 1} of {len(schedule)} (block {block}, version {version}, {storage_placement}, {test}) took {round(end_time-start_time,1)} seconds',flush=True)
+                print(run_eta.summary(),flush=True)
+
+            if schedule:
+                run_python_script('./venv_', calibration_version, './benchmark_script.py', {**calibration_overrides, 'DUCKDB_BENCHMARK_CALIBRATION': 'end'})
+
+        if library_sweep_duckdb_version is not None:
+            for venv_prefix, libraries_list in get_library_sweep(con, library_sweep_details['date'], library_sweep_minimum_versions):
+                if create_environments:
+                    create_virtualenv(venv_prefix, library_sweep_duckdb_version, libraries_list, local_duckdb_source)
+
+                if run_scripts:
+                    start_time = time.perf_counter()
+                    run_python_script(venv_prefix, library_sweep_duckdb_version, './benchmark_script.py', {'DUCKDB_BENCHMARK_TESTS': ','.join(library_sweep_tests)})
+
+                    logger.pprint(logger.get_results())
+                    end_time = time.perf_counter()
+                    print(f'Running library sweep for version {library_sweep_duckdb_version} with {libraries_list} took {round(end_time-start_time,1)} seconds',flush=True)
 
         stop_logging=True
         t.join()
@@ -0,0 +1,164 @@
+# Run the same SQL workloads (see workloads.py) through the DuckDB CLI and through the Python package of the same version.
+# The CLI binaries come from download_cli_versions in benchmark_loop.py, and the Python venvs from benchmark_loop_python.py,
+# so run both of those first. Each client loads the workload into its own database file with the same data and thread count.
+#
+# Logged per (version, client, workload):
+#   901 Workload: query    the time of each query as the client reports it (.timer in the CLI, execute + fetchall in Python)
+#   902 Workload: process  the wall time of the process that runs all queries, with the sum of the query times and the
+#                          client overhead (process start, import or load, connect and result handling) as metrics
+
+import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+from SQLiteLogger import SQLiteLogger
+from benchmark_loop import download_cli_versions, delete_database
+from duckdb_versions import versions
+from workloads import get_workload_bindings, get_workload_directories, is_version_supported, load_workload, load_workload_settings, split_statements
+
+repeat = 3
+# None leaves the default of each client (all cores). Otherwise PRAGMA threads is set in both clients
+workload_threads = None
+# Versions that have both a CLI binary and a ./venv_<version>
+workload_versions = [version for version in versions if version != 'latest']
+python_executable = 'python3.9'
+data_directory = str(Path('_data').resolve())
+
+# Run by the venv Python. Reads its workload from the environment and prints the query times as json
+python_client_script = """
+import json
+import os
+import time
+import duckdb
+
+workload = json.loads(os.environ['DUCKDB_WORKLOAD'])
+con = duckdb.connect(os.environ['DUCKDB_WORKLOAD_DATABASE'])
+for statement in workload['before']:
+    con.execute(statement).fetchall()
+query_times = []
+for statement in workload['queries']:
+    start_time = time.perf_counter()
+    con.execute(statement).fetchall()
+    query_times.append(time.perf_counter() - start_time)
+con.close()
+print('WORKLOAD_RESULT ' + json.dumps(query_times))
+"""
+
+cli_timer_pattern = re.compile(r'Run Time(?: \(s\))?: real ([0-9.]+)')
+
+
+def get_cli_file(version):
+    return 'duckdb_' + version.replace('.', '_')
+
+def get_venv_python(version):
+    return './venv_' + version.replace('.', '_') + '/bin/' + python_executable
+
+def get_threads_statements():
+    return [] if workload_threads is None else [f'PRAGMA threads={workload_threads}']
+
+def run_cli(cli_file, db_file, script):
+    return subprocess.run([f'./{cli_file}', db_file], input=script, capture_output=True, text=True, check=True)
+
+def run_python(version, db_file, before_statements, query_statements):
+    env = {**os.environ, 'DUCKDB_WORKLOAD': json.dumps({'before': before_statements, 'queries': query_statements}), 'DUCKDB_WORKLOAD_DATABASE': db_file}
+    result = subprocess.run([get_venv_python(version), '-c', python_client_script], capture_output=True, text=True, env=env, check=True)
+    result_lines = [line for line in result.stdout.splitlines() if line.startswith('WORKLOAD_RESULT ')]
+    return json.loads(result_lines[-1][len('WORKLOAD_RESULT '):])
+
+def time_cli_queries(cli_file, db_file, workload):
+    """Run every query in one CLI process. Returns (query_times, process_seconds)"""
+    script = ''.join(statement + ';\n' for statement in get_threads_statements())
+    script += '.timer on\n'
+    script += ''.join(sql.rstrip(';') + ';\n' for _, sql in workload['queries'])
+    start_time = time.perf_counter()
+    result = run_cli(cli_file, db_file, script)
+    process_seconds = time.perf_counter() - start_time
+    query_times = [float(seconds) for seconds in cli_timer_pattern.findall(result.stdout)]
+    if len(query_times) != len(workload['queries']):
+        raise Exception(f"Expected {len(workload['queries'])} query times from the CLI, got {len(query_times)}. Each query file must hold a single statement")
+    return query_times, process_seconds
+
+def time_python_queries(version, db_file, workload):
+    """Run every query in one Python process. Returns (query_times, process_seconds)"""
+    start_time = time.perf_counter()
+    query_times = run_python(version, db_file, get_threads_statements(), [sql.rstrip(';') for _, sql in workload['queries']])
+    process_seconds = time.perf_counter() - start_time
+    return query_times, process_seconds
+
+def log_workload_repeat(logger, repeat_id, scenario, workload, query_times, process_seconds):
+    for (query_name, _), query_time in zip(workload['queries'], query_times):
+        logger.log([(repeat_id, '901 Workload: query', json.dumps({**scenario, 'query': query_name}), query_time)])
+    process_scenario = json.dumps(scenario)
+    logger.log([(repeat_id, '902 Workload: process', process_scenario, process_seconds)])
+    logger.log_metrics([
+        (repeat_id, '902 Workload: process', process_scenario, 'query_seconds', sum(query_times)),
+        (repeat_id, '902 Workload: process', process_scenario, 'client_overhead_seconds', process_seconds - sum(query_times)),
+    ])
+
+def run_workload(logger, version, client, workload):
+    db_name = f"workload_{client}_{version.replace('.', '_')}"
+    db_file = db_name + '.duckdb'
+    delete_database(db_name)
+    # duckdb_version matches the version() format that benchmark_script.py logs
+    scenario = {'duckdb_version': 'v' + version, 'client': client, 'workload': workload['name'], 'row_count': workload['row_count'], 'threads': workload_threads}
+    try:
+        setup_statements = split_statements(workload['setup'])
+        teardown_statements = split_statements(workload['teardown'])
+        if client == 'cli':
+            if setup_statements:
+                run_cli(get_cli_file(version), db_file, ''.join(statement + ';\n' for statement in setup_statements))
+            for i in range(repeat):
+                log_workload_repeat(logger, i, scenario, workload, *time_cli_queries(get_cli_file(version), db_file, workload))
+            if teardown_statements:
+                run_cli(get_cli_file(version), db_file, ''.join(statement + ';\n' for statement in teardown_statements))
+        else:
+            if setup_statements:
+                run_python(version, db_file, setup_statements, [])
+            for i in range(repeat):
+                log_workload_repeat(logger, i, scenario, workload, *time_python_queries(version, db_file, workload))
+            if teardown_statements:
+                run_python(version, db_file, teardown_statements, [])
+    except Exception as err:
+        print('ERROR in', version, client, workload['name'])
+        print(err)
+        if isinstance(err, subprocess.CalledProcessError):
+            print(err.stderr)
+    finally:
+        delete_database(db_name)
+
+
+if __name__ == '__main__':
+    # Named like the other logs, so build_results_warehouse.py picks it up
+    logger = SQLiteLogger('benchmark_log_workloads.db', delete_file=False)
+    for version in workload_versions:
+        try:
+            download_cli_versions([version])
+        except Exception as err:
+            print('Failed to download the CLI for', version)
+            print(err)
+    workloads = []
+    for directory in get_workload_directories():
+        settings = load_workload_settings(directory)
+        for row_count in settings['row_counts']:
+            try:
+                workload = load_workload(directory, get_workload_bindings(settings, data_directory, row_count))
+            except FileNotFoundError as err:
+                print('Skipping workload', directory, 'for row count', row_count, '-', err)
+                continue
+            workloads.append({**workload, 'row_count': row_count, 'settings': settings})
+
+    for version in workload_versions:
+        if not os.path.exists(get_cli_file(version)) or not os.path.exists(get_venv_python(version)):
+            print('Skipping', version, '- needs both the CLI and venv_' + version.replace('.', '_'))
+            continue
+        for workload in workloads:
+            if not is_version_supported(workload['settings'], version):
+                continue
+            for client in ['cli', 'python']:
+                print('Running workload', workload['name'], 'with the', client, 'of', version, flush=True)
+                run_workload(logger, version, client, workload)
+
+    logger.pprint(logger.get_results())
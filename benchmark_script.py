@@ -5,20 +5,206 @@ import os
 import time
 import shutil
 import sys
+import gc
+import random
+import subprocess
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from SQLiteLogger import SQLiteLogger
-
-repeat = 3
+from PeakMemoryTracker import PeakMemoryTracker, get_high_water_mark_bytes
+from LatencyHistogram import LatencyHistogram
+from workloads import get_workload_bindings, get_workload_directories, is_version_supported, load_workload, load_workload_settings, split_statements
+
+# The calling loop can override this with DUCKDB_BENCHMARK_REPEAT
+repeat = int(os.environ.get('DUCKDB_BENCHMARK_REPEAT', 3))
+# An interleaved schedule runs one repeat per script call, so the calling loop sets the repeat_id to log
+first_repeat_id = int(os.environ.get('DUCKDB_BENCHMARK_FIRST_REPEAT_ID', 0))
+repeat_ids = range(first_repeat_id, first_repeat_id + repeat)
 versions_without_enums = ['0.2.7', '0.2.8', '0.2.9', '0.3.0', '0.3.1', '0.3.2', '0.3.4', '0.4.0', '0.5.1']
 versions_without_pyarrow = ['0.2.7', '0.2.8', '0.2.9', '0.3.0']
 versions_without_window_ranges = ['0.2.7']
 versions_failing_on_quantiles_full_dataset = ['0.2.7', '0.2.8', '0.2.9', '0.3.0', '0.3.1', '0.3.2', '0.3.4', '0.4.0', '0.5.1', '0.6.1', '0.7.1']
 versions_failing_on_quantiles = ['0.2.7', '0.2.8', '0.2.9', '0.3.0', '0.3.1']
 versions_failing_on_1e9_group_by = ['0.2.7', '0.2.8', '0.2.9', '0.3.0',]
+versions_without_record_batch_reader = versions_without_pyarrow + ['0.3.1']
 test_performance = False
 test_window_performance = False
 test_scale = True
+test_streaming_export = False
+test_parquet_matrix = False
+# The G1 and J1 csv data as one or many files, uncompressed or compressed, read with an explicit schema or auto-detected
+test_csv_matrix = False
+test_arrow_ipc = False
+test_concurrency = False
+test_small_query_latency = False
+test_ingestion = False
+test_window_sweep = False
+# Spawn fresh interpreters to time import duckdb, connect and the first query (cold start)
+test_startup = False
+# Pandas and Arrow exports and scans, for comparing venvs with the same DuckDB version and different pandas/pyarrow versions
+test_library_sweep = False
+# Rerun the test_performance analysis and export steps, each in a fresh child process on a copy of a prebuilt database,
+# so that the peak memory of each step is not inflated by the steps before it
+test_isolated_steps = False
+# After the scale test group by and join suites, time reopening the database and replaying an unflushed WAL
+test_reopen = False
+# Replay the SQL workloads in user_workloads_directory (see workloads.py), skipping the versions outside their min_version/max_version
+test_user_workloads = False
+# Time a CPU, memory and disk calibration suite at the start and end of every run, to compare hosts and spot noisy runs.
+# Each calibration takes a 200M row query, 1 GiB of memory scans and a 1 GiB fsync'd write and read (see the calibration settings),
+# so it is off by default when DUCKDB_BENCHMARK_TESTS selects a single test (one work unit of an interleaved or planned schedule).
+# The calling loop brackets those schedules with calibration-only calls instead (DUCKDB_BENCHMARK_TESTS='none').
+# DUCKDB_BENCHMARK_CALIBRATION=1 or 0 overrides that, and 'start' or 'end' only runs that calibration point
+record_calibration = True
+calibration_points = ['start', 'end']
+# Record the database file size and per table/column storage details after each ingest step
+record_storage_footprint = True
+# Trace Python allocations while export results are converted to Pandas/NumPy/Arrow (see execute_and_fetch).
+# tracemalloc slows down Python allocations, so this also inflates the export times
+record_fetch_allocations = False
+
+# The calling loop can pick the tests to run instead, like DUCKDB_BENCHMARK_TESTS='test_library_sweep,test_startup'
+selected_tests = os.environ.get('DUCKDB_BENCHMARK_TESTS')
+if selected_tests:
+    for test_flag in [name for name in list(globals()) if name.startswith('test_')]:
+        globals()[test_flag] = test_flag in selected_tests.split(',')
+    if len(selected_tests.split(',')) == 1:
+        record_calibration = False
+if os.environ.get('DUCKDB_BENCHMARK_CALIBRATION'):
+    record_calibration = os.environ['DUCKDB_BENCHMARK_CALIBRATION'] != '0'
+    if os.environ['DUCKDB_BENCHMARK_CALIBRATION'] in calibration_points:
+        calibration_points = [os.environ['DUCKDB_BENCHMARK_CALIBRATION']]
+
+# Where the database file and spill (temp_directory) files live.
+# None means the default: the database in the venv folder and spill files in venv/tmp
+storage_placements = {
+    'venv': {'database_directory': None, 'temp_directory': None},
+    'memory': {'database_directory': ':memory:', 'temp_directory': None},
+    # Linux exposes a tmpfs at /dev/shm. On MacOS create a RAM disk first, for example with:
+    #   diskutil erasevolume HFS+ 'duckdb_tmpfs' `hdiutil attach -nomount ram://67108864`
+    'tmpfs': {'database_directory': '/dev/shm/duckdb_benchmarks', 'temp_directory': '/dev/shm/duckdb_benchmarks/tmp'},
+    # A path on the disk to test, and optionally a separate (for example NVMe) spill path. Spill files default to a tmp folder on the same disk
+    'disk': {
+        'database_directory': os.environ.get('DUCKDB_BENCHMARK_DISK_DIRECTORY'),
+        'temp_directory': os.environ.get('DUCKDB_BENCHMARK_DISK_TEMP_DIRECTORY') or (
+            os.environ['DUCKDB_BENCHMARK_DISK_DIRECTORY'] + '/tmp' if os.environ.get('DUCKDB_BENCHMARK_DISK_DIRECTORY') else None),
+    },
+}
+# The calling loop runs this script once per placement to test
+storage_placement = os.environ.get('DUCKDB_BENCHMARK_STORAGE_PLACEMENT', 'venv')
+if storage_placement == 'disk' and storage_placements['disk']['database_directory'] is None:
+    # Otherwise the venv location would be benchmarked and logged as the disk placement
+    raise ValueError("The 'disk' storage placement needs a path to test in DUCKDB_BENCHMARK_DISK_DIRECTORY")
+# Added to every scenario, along with any json object in DUCKDB_BENCHMARK_SCENARIO (like the commit under test when bisecting)
+scenario_dimensions = {'storage_placement': storage_placement, **json.loads(os.environ.get('DUCKDB_BENCHMARK_SCENARIO', '{}'))}
+# The calling loop reads the results from this file
+benchmark_log_file = os.environ.get('DUCKDB_BENCHMARK_LOG_FILE', 'benchmark_log_python.db')
+
+# Schemas to run the group by and join suites on. Versions without enums only run the other variants
+# enum: id columns with few distinct values as ENUMs, varchar: all id columns as loaded from csv, integer: 'id' prefix stripped and cast to integers
+schema_variants = ['enum', 'varchar', 'integer']
+
+# Streaming export settings
+streaming_export_row_counts = ['1e7']
+record_batch_sizes = [10_000, 100_000, 1_000_000]
+
+# Parquet matrix settings
+parquet_matrix_row_counts = ['1e7']
+parquet_codecs = ['uncompressed', 'snappy', 'zstd', 'gzip']
+parquet_row_group_sizes = [100_000, 1_000_000]
+parquet_glob_file_count = 10
+
+# CSV matrix settings
+csv_matrix_row_counts = ['1e7']
+# Every table is written in every combination of compression and file count. Files are read with a glob
+csv_matrix_compressions = ['none', 'gzip', 'zstd']
+csv_matrix_file_counts = [1, 10]
+# Rows the sniffer samples for auto-detection. -1 reads the whole input
+csv_matrix_sample_sizes = [20_480, 100_000, -1]
+
+# Arrow IPC settings
+arrow_ipc_row_counts = ['1e7']
+# Feather V2 compression. Uncompressed files can be scanned without copying out of the memory map
+arrow_ipc_compressions = ['uncompressed', 'lz4', 'zstd']
+
+# Concurrency settings
+concurrency_row_counts = ['1e7']
+concurrency_levels = [1, 2, 4, 8, 16]
+concurrency_duration_seconds = 30
+# 'cursor' shares one database instance through con.cursor(), 'connection' calls duckdb.connect once per thread
+concurrency_connection_modes = ['cursor', 'connection']
+# Relative weights of each query type in the mix
+concurrency_query_mix = {'point_lookup': 0.6, 'small_aggregate': 0.3, 'group_by': 0.1}
+
+# Small query latency settings
+small_query_row_counts = ['1e7']
+small_query_iterations = 10_000
+small_query_warmup_iterations = 100
+# execute_literal: values inlined into the SQL string, so every call is parsed, planned and bound
+# execute_parameters: con.execute(query, [value])
+# prepared: PREPARE once, then EXECUTE with each value
+# executemany: con.executemany in batches. Each histogram sample is the latency of a whole batch, with the batch size as a metric
+small_query_methods = ['execute_literal', 'execute_parameters', 'prepared', 'executemany']
+executemany_batch_size = 100
+
+# Ingestion settings
+ingestion_row_counts = ['1e7']
+ingestion_batch_sizes = [10_000, 100_000, 1_000_000]
+ingestion_executemany_batch_sizes = [100, 1_000, 10_000]
+# executemany is orders of magnitude slower than the other paths, so it only loads the first rows
+ingestion_executemany_row_limit = 100_000
+
+# Window sweep settings. Every combination of function, partition and frame is run at every input row count
+window_sweep_functions = ['sum', 'avg', 'first', 'quantile', 'row_number']
+# None for no partition, a column name for an existing key or an int for a synthetic key with that many distinct values
+window_sweep_partitions = [None, 'id1', 'id2', 'id3', 10, 1_000, 100_000, 10_000_000]
+# (frame_type, frame_size). 'none' has no frame, rows frames order by id3 and range frames order by v2
+window_sweep_frames = [('none', None), ('rows', 1), ('rows', 100), ('rows', 'unbounded'), ('range', 3), ('range', 'unbounded')]
+window_sweep_row_counts = ['1e5', '1e6', '1e7']
+
+# Startup settings
+startup_iterations = 20
+# Modules imported by import duckdb whose own import time is less than this are not logged individually
+startup_import_min_seconds = 0.001
+
+# Library sweep settings
+library_sweep_row_count = '1e7'
+# numpy: the default pandas dtypes, pyarrow: pd.ArrowDtype columns (pandas 2.0 and up, with pyarrow installed)
+library_sweep_dtype_backends = ['numpy', 'pyarrow']
+
+# Calibration settings
+# The CPU query runs in DuckDB, so its times are only comparable between runs of the same DuckDB version
+calibration_cpu_row_count = 200_000_000
+calibration_memory_bytes = 1024**3
+calibration_memory_passes = 5
+calibration_disk_bytes = 1024**3
+calibration_disk_chunk_bytes = 16 * 1024**2
+
+# Isolated steps settings
+isolated_steps_row_count = '1e7'
+# Comma separated benchmark names, to run only some of the isolated steps (for example when bisecting one of them)
+isolated_steps_to_run = os.environ.get('DUCKDB_BENCHMARK_ISOLATED_STEPS')
+# Child processes run the source of this file, so it is read from the working directory of the calling loop
+benchmark_script_file = 'benchmark_script.py'
+
+# User workload settings
+# Relative to the working directory of the calling loop. Point it at a folder of your own workloads with DUCKDB_BENCHMARK_USER_WORKLOADS
+user_workloads_directory = os.environ.get('DUCKDB_BENCHMARK_USER_WORKLOADS', 'workloads')
+
+# Scale test settings
+# Query families run after the group by and join queries, on the same x tables. Sorts, DISTINCT and string results are
+# materialized, so at 1e8/1e9 rows they spill like the group bys. Remove a family to skip it
+scale_query_families = ['sort', 'top_n', 'distinct', 'string']
+
+# Reopen settings
+# Rows copied (and then updated) by the writer process that is killed before it can checkpoint
+wal_replay_row_count = 10_000_000
+
+group_by_result_tables = ['ans'+str(r).zfill(2) for r in range(1, 11)]
+join_result_tables = ['ans'+str(r) for r in range(1, 6)]
 
 def delete_database(filename):
     """Delete .duckdb, .duckdb.wal, .duckdb.tmp and /tmp folder"""
@@ -47,9 +233,39 @@ def delete_database(filename):
     except OSError:
         pass
 
+# Filled in by execute_and_fetch while a time_and_log step runs
+phase_times = None
+
+def execute_and_fetch(con, query, fetch_method):
+    """con.execute(query) followed by a fetch method like 'fetch_df', 'fetchnumpy' or 'fetch_arrow_table', timed separately.
+    execute_seconds covers running the query in DuckDB, up to the first result chunk for streaming results.
+    fetch_seconds covers materializing the result and converting it to Python objects.
+    The times are added to phase_times so time_and_log can log them as metrics of the step"""
+    start_time = time.perf_counter()
+    result = con.execute(query)
+    execute_time = time.perf_counter()
+    if record_fetch_allocations:
+        tracemalloc.start()
+    try:
+        fetched = getattr(result, fetch_method)()
+        fetch_time = time.perf_counter()
+        if record_fetch_allocations:
+            fetch_peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        if record_fetch_allocations:
+            tracemalloc.stop()
+    if phase_times is not None:
+        phase_times['execute_seconds'] = phase_times.get('execute_seconds', 0) + (execute_time - start_time)
+        phase_times['fetch_seconds'] = phase_times.get('fetch_seconds', 0) + (fetch_time - execute_time)
+        if record_fetch_allocations:
+            phase_times['fetch_tracemalloc_peak_bytes'] = max(phase_times.get('fetch_tracemalloc_peak_bytes', 0), fetch_peak_bytes)
+    return fetched
+
 def time_and_log(f, *args, **kwargs):
     """Psuedo decorator for timing and logging.
     r, b, s, and l are special kwargs for logging purposes.
+    The wall clock start of each sample is logged to the metrics table as start_timestamp_seconds, to model drift over a run.
+    If f fetches results with execute_and_fetch, the execute and fetch times are also logged to the metrics table.
     Called like: time_and_log(sleepy,0.3,time_to_sleep_kw=0.5, r=1, b='007.4 Export group by results to Arrow', s=json.dumps({'duckdb_version':duckdb_version}), l=logger)"""
     # Logger schema for reference
     # run_id int, -- Auto-generated when logger is instantiated
@@ -58,49 +274,176 @@ def time_and_log(f, *args, **kwargs):
     # scenario json,
     # time float 
     def wrapped_func(*args, **kwargs):
+        global phase_times
+        phase_times = {}
+        start_timestamp = time.time()
         start_time = time.perf_counter()
         # Exclude repeat_id, benchmark, scenario, logger
         trimmed_kwargs = {k:kwargs.get(k) for k in kwargs if k not in ['r', 'b', 's', 'l'] }
         result = f(*args, **trimmed_kwargs)
         end_time = time.perf_counter()
         kwargs.get('l').log([(kwargs.get('r'),kwargs.get('b'),kwargs.get('s'),(end_time - start_time))])
+        metrics = {'start_timestamp_seconds': start_timestamp, **phase_times}
+        kwargs.get('l').log_metrics([(kwargs.get('r'),kwargs.get('b'),kwargs.get('s'),metric,value) for metric, value in metrics.items()])
+        phase_times = None
         return result
     return wrapped_func(*args, **kwargs)
 
+def time_and_log_metrics(f, *args, **kwargs):
+    """Like time_and_log, but also tracks the peak RSS of the process while f runs.
+    f returns a dict of metrics (like {'rows': 1000}) that are logged to the metrics table
+    along with rows_per_second (if rows were returned), megabytes_per_second (if csv_bytes were returned), peak_rss_bytes, rss_growth_bytes, start_timestamp_seconds and any execute_and_fetch times.
+    Called like: time_and_log_metrics(export_numpy, con, tables, r=1, b='403 Streaming export: NumPy', s=scenario, l=logger)"""
+    def wrapped_func(*args, **kwargs):
+        global phase_times
+        phase_times = {}
+        # Exclude repeat_id, benchmark, scenario, logger
+        trimmed_kwargs = {k:kwargs.get(k) for k in kwargs if k not in ['r', 'b', 's', 'l'] }
+        start_timestamp = time.time()
+        with PeakMemoryTracker() as tracker:
+            start_time = time.perf_counter()
+            metrics = f(*args, **trimmed_kwargs)
+            end_time = time.perf_counter()
+        elapsed_time = end_time - start_time
+        metrics = {**phase_times, **(metrics or {})}
+        phase_times = None
+        if 'rows' in metrics and elapsed_time > 0:
+            metrics['rows_per_second'] = metrics['rows'] / elapsed_time
+        if 'csv_bytes' in metrics and elapsed_time > 0:
+            metrics['megabytes_per_second'] = metrics['csv_bytes'] / 1e6 / elapsed_time
+        if tracker.peak_rss_bytes is not None:
+            metrics['peak_rss_bytes'] = tracker.peak_rss_bytes
+            metrics['rss_growth_bytes'] = tracker.rss_growth_bytes
+        metrics['start_timestamp_seconds'] = start_timestamp
+
+        r, b, s, l = kwargs.get('r'), kwargs.get('b'), kwargs.get('s'), kwargs.get('l')
+        l.log([(r, b, s, elapsed_time)])
+        l.log_metrics([(r, b, s, metric, value) for metric, value in metrics.items()])
+        return metrics
+    return wrapped_func(*args, **kwargs)
+
+def make_scenario(duckdb_version, **dimensions):
+    """JSON scenario for logging: the DuckDB version, the scenario_dimensions of this run and any other benchmark dimensions"""
+    return json.dumps({'duckdb_version':duckdb_version, **scenario_dimensions, **dimensions})
+
 def get_duckdb_version_and_scenario():
     con = duckdb.connect(':memory:')
     duckdb_version = con.execute('select version()').fetchall()[0][0]
     print(duckdb_version)
-    scenario = json.dumps({'duckdb_version':duckdb_version})
+    scenario = make_scenario(duckdb_version)
     con.close()
     return duckdb_version, scenario
 
+def get_database_file(venv_location, duckdb_version):
+    """Path to the database file for the storage_placement of this run, or ':memory:'"""
+    database_directory = storage_placements[storage_placement]['database_directory'] or venv_location
+    if database_directory == ':memory:':
+        return database_directory
+    return database_directory+'/'+duckdb_version.replace('.','_')+'.duckdb'
+
+def get_temp_directory(venv_location):
+    return storage_placements[storage_placement]['temp_directory'] or venv_location+'/tmp'
+
 def connect_to_duckdb(venv_location, duckdb_version):
-    db_filepath = venv_location+'/'+duckdb_version.replace('.','_')
-    delete_database(db_filepath)
+    db_file = get_database_file(venv_location, duckdb_version)
+    if db_file != ':memory:':
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        delete_database(db_file[:-len('.duckdb')])
 
-    con = duckdb.connect(db_filepath+'.duckdb')
-    temp_dir = venv_location+'/tmp'
+    con = duckdb.connect(db_file)
+    temp_dir = get_temp_directory(venv_location)
     
     try:
         shutil.rmtree(temp_dir)
     except OSError:
         pass
 
-    Path(temp_dir).mkdir()
+    Path(temp_dir).mkdir(parents=True)
 
     print(con.execute(f"pragma temp_directory='{temp_dir}'").fetchall())
     return con 
 
+def get_group_by_csv(venv_location, row_count):
+    """Path to the G1 csv file for a row_count like '1e7'"""
+    return str(Path(venv_location).parent) + f'/_data/G1_{row_count}_1e2_0_0.csv'
+
+def get_join_csvs(venv_location, row_count):
+    """Paths to the J1 csv files for a row_count like '1e7'.
+    small has row_count / 1e6 rows, medium has row_count / 1e3 rows and big has row_count rows"""
+    exponent = int(row_count.split('e')[1])
+    data_path = str(Path(venv_location).parent) + '/_data/'
+    return {
+        'x_csv': data_path + f'J1_{row_count}_NA_0_0.csv',
+        'small_csv': data_path + f'J1_{row_count}_1e{exponent - 6}_0_0.csv',
+        'medium_csv': data_path + f'J1_{row_count}_1e{exponent - 3}_0_0.csv',
+        'big_csv': data_path + f'J1_{row_count}_{row_count}_0_0.csv',
+    }
+
+def log_storage_footprint(con, schema, r, b, s, l):
+    """Log the database file size, approximate bytes per table and per column compression to the metrics table.
+    Called right after a step that ends in CHECKPOINT, with the same r, b, s and l as the time_and_log call for that step.
+    schema is the physical layout of the tables at this step, logged as storage_schema so that the schema of the run (if any) is kept.
+    The table, column and compression are added to the scenario of the per table and per column metrics."""
+    try:
+        # The database is named 'main' in older versions and after the file name in newer versions
+        _, database_name, db_file = con.execute("PRAGMA database_list").fetchall()[0]
+        scenario = json.loads(s)
+        scenario['storage_schema'] = schema
+        metrics = []
+        # In-memory databases have no file
+        if db_file:
+            metrics.append((r, b, json.dumps(scenario), 'database_file_bytes', os.path.getsize(db_file)))
+
+        database_size = con.execute("PRAGMA database_size").df()
+        if 'database_name' in database_size.columns:
+            database_size = database_size[database_size['database_name'] == database_name].reset_index()
+        block_size = int(database_size['block_size'][0])
+        metrics.append((r, b, json.dumps(scenario), 'database_used_blocks', int(database_size['used_blocks'][0])))
+
+        table_names = [row[0] for row in con.execute("SELECT table_name FROM duckdb_tables() WHERE NOT temporary").fetchall()]
+        for table_name in table_names:
+            table_scenario = json.dumps({**scenario, 'table': table_name})
+            # Segments of different columns can share a block, so this slightly overestimates
+            table_blocks = con.execute(f"SELECT count(DISTINCT block_id) FROM pragma_storage_info('{table_name}') WHERE block_id >= 0").fetchall()[0][0]
+            estimated_rows = con.execute(f"SELECT estimated_size FROM duckdb_tables() WHERE table_name = '{table_name}'").fetchall()[0][0]
+            metrics.append((r, b, table_scenario, 'table_blocks', table_blocks))
+            metrics.append((r, b, table_scenario, 'table_bytes', table_blocks * block_size))
+            metrics.append((r, b, table_scenario, 'table_rows', estimated_rows))
+
+            column_compression = con.execute(f"""
+                SELECT column_name, segment_type, compression, count(*) AS segments, sum(count) AS rows, count(DISTINCT block_id) AS blocks
+                FROM pragma_storage_info('{table_name}')
+                GROUP BY column_name, segment_type, compression
+                ORDER BY column_name, segment_type, compression""").fetchall()
+            for column_name, segment_type, compression, segments, rows, blocks in column_compression:
+                # segment_type separates the validity mask from the values of each column
+                column_scenario = json.dumps({**scenario, 'table': table_name, 'column': column_name, 'segment_type': segment_type, 'compression': compression})
+                metrics.append((r, b, column_scenario, 'column_segments', segments))
+                metrics.append((r, b, column_scenario, 'column_rows', rows))
+                metrics.append((r, b, column_scenario, 'column_blocks', blocks))
+        l.log_metrics(metrics)
+    except Exception as err:
+        # duckdb_tables() and pragma_storage_info are not available in the oldest versions
+        print("ERROR logging storage footprint for", b)
+        print(err)
+
 def pandas_test(con):
     my_df = pd.DataFrame.from_dict({'a': [42]})
     return con.execute("select * from my_df").df()
 
-def ingest_group_by_csv(con, csv_file, duckdb_version, versions_without_enums):
+def get_schema_variants(duckdb_version):
+    if duckdb_version in versions_without_enums:
+        return [schema for schema in schema_variants if schema != 'enum']
+    return schema_variants
+
+def ingest_group_by_csv(con, csv_file, duckdb_version, versions_without_enums, schema='enum'):
+    # Load into y first if x will be converted to a different schema afterwards
     table_name = 'y'
 
     # If Enum from query support is not present, insert directly into table x
-    if duckdb_version in versions_without_enums:
+    if duckdb_version in versions_without_enums and schema == 'enum':
+        table_name = 'x'
+    elif schema == 'varchar':
         table_name = 'x'
     create_table_queries = [
         f"DROP TABLE IF EXISTS {table_name}",
@@ -127,32 +470,42 @@ def convert_to_enums_group_by(con, duckdb_version):
     for query in convert_to_enum_queries:
         con.execute(query).fetchall()
 
+def convert_to_integers_group_by(con):
+    # id1, id2 and id3 look like 'id001', so strip the prefix and store the number
+    convert_to_integer_queries = [
+        "DROP TABLE IF EXISTS x",
+        "CREATE TABLE x(id1 INT, id2 INT, id3 INT, id4 INT, id5 INT, id6 INT, v1 INT, v2 INT, v3 FLOAT)",
+        """INSERT INTO x (SELECT replace(id1, 'id', '')::INT, replace(id2, 'id', '')::INT, replace(id3, 'id', '')::INT, 
+                id4, id5, id6, v1, v2, v3 FROM y)""",
+        "DROP TABLE IF EXISTS y",
+        "CHECKPOINT",
+    ]
+    for query in convert_to_integer_queries:
+        con.execute(query).fetchall()
+
+group_by_select_queries = [
+    "SELECT id1, sum(v1)::bigint AS v1 FROM x GROUP BY id1",
+    "SELECT id1, id2, sum(v1)::bigint AS v1 FROM x GROUP BY id1, id2",
+    "SELECT id3, sum(v1)::bigint AS v1, avg(v3) AS v3 FROM x GROUP BY id3",
+    "SELECT id4, avg(v1) AS v1, avg(v2) AS v2, avg(v3) AS v3 FROM x GROUP BY id4",
+    "SELECT id6, sum(v1)::bigint AS v1, sum(v2)::bigint AS v2, sum(v3)::bigint AS v3 FROM x GROUP BY id6",
+    "SELECT id4, id5, quantile_cont(v3, 0.5) AS median_v3, stddev(v3) AS sd_v3 FROM x GROUP BY id4, id5",
+    "SELECT id3, max(v1)-min(v2) AS range_v1_v2 FROM x GROUP BY id3",
+    "SELECT id6, v3 AS largest2_v3 FROM (SELECT id6, v3, row_number() OVER (PARTITION BY id6 ORDER BY v3 DESC) AS order_v3 FROM x WHERE v3 IS NOT NULL) sub_query WHERE order_v3 <= 2",
+    "SELECT id2, id4, pow(corr(v1, v2), 2) AS r2 FROM x GROUP BY id2, id4",
+    "SELECT id1, id2, id3, id4, id5, id6, sum(v3)::bigint AS v3, count(*)::bigint AS count FROM x GROUP BY id1, id2, id3, id4, id5, id6",
+]
+
 def group_by_queries(con):
     # From 33 seconds in 0.2.7 to 1.5 seconds in 0.10!
     # Using bigint instead of hugeint due to older parquet writer issues 
-    group_by_queries = [
-        "DROP TABLE IF EXISTS ans01",
-        "DROP TABLE IF EXISTS ans02",
-        "DROP TABLE IF EXISTS ans03",
-        "DROP TABLE IF EXISTS ans04",
-        "DROP TABLE IF EXISTS ans05",
-        "DROP TABLE IF EXISTS ans06",
-        "DROP TABLE IF EXISTS ans07",
-        "DROP TABLE IF EXISTS ans08",
-        "DROP TABLE IF EXISTS ans09",
-        "DROP TABLE IF EXISTS ans10",
-        "CREATE TABLE ans01 AS SELECT id1, sum(v1)::bigint AS v1 FROM x GROUP BY id1",
-        "CREATE TABLE ans02 AS SELECT id1, id2, sum(v1)::bigint AS v1 FROM x GROUP BY id1, id2",
-        "CREATE TABLE ans03 AS SELECT id3, sum(v1)::bigint AS v1, avg(v3) AS v3 FROM x GROUP BY id3",
-        "CREATE TABLE ans04 AS SELECT id4, avg(v1) AS v1, avg(v2) AS v2, avg(v3) AS v3 FROM x GROUP BY id4",
-        "CREATE TABLE ans05 AS SELECT id6, sum(v1)::bigint AS v1, sum(v2)::bigint AS v2, sum(v3)::bigint AS v3 FROM x GROUP BY id6",
-        "CREATE TABLE ans06 AS SELECT id4, id5, quantile_cont(v3, 0.5) AS median_v3, stddev(v3) AS sd_v3 FROM x GROUP BY id4, id5",
-        "CREATE TABLE ans07 AS SELECT id3, max(v1)-min(v2) AS range_v1_v2 FROM x GROUP BY id3",
-        "CREATE TABLE ans08 AS SELECT id6, v3 AS largest2_v3 FROM (SELECT id6, v3, row_number() OVER (PARTITION BY id6 ORDER BY v3 DESC) AS order_v3 FROM x WHERE v3 IS NOT NULL) sub_query WHERE order_v3 <= 2",
-        "CREATE TABLE ans09 AS SELECT id2, id4, pow(corr(v1, v2), 2) AS r2 FROM x GROUP BY id2, id4",
-        "CREATE TABLE ans10 AS SELECT id1, id2, id3, id4, id5, id6, sum(v3)::bigint AS v3, count(*)::bigint AS count FROM x GROUP BY id1, id2, id3, id4, id5, id6",
-        "CHECKPOINT",
-    ]
+    group_by_queries = []
+    for result_table in group_by_result_tables:
+        group_by_queries.append(f"DROP TABLE IF EXISTS {result_table}")
+    for result_table, select_query in zip(group_by_result_tables, group_by_select_queries):
+        group_by_queries.append(f"CREATE TABLE {result_table} AS {select_query}")
+    group_by_queries.append("CHECKPOINT")
+
     print('Beginning group by queries')
     for query in group_by_queries:
         con.execute(query).fetchall()
@@ -162,7 +515,7 @@ def export_group_by_to_pandas(con):
     # (exporting over 10 million rows)
     for r in range(1, 11):
         result_table = "ans"+str(r).zfill(2)
-        pandas_df = con.execute(f"select * from {result_table}").fetch_df()
+        pandas_df = execute_and_fetch(con, f"select * from {result_table}", 'fetch_df')
         print(result_table, len(pandas_df), "rows")
     # Return the final df for next step
     return pandas_df
@@ -189,7 +542,7 @@ def export_group_by_to_arrow(con):
     # (exporting over 10 million rows)
     for r in range(1, 11):
         result_table = "ans"+str(r).zfill(2)
-        arrow_df = con.execute(f"select * from {result_table}").fetch_arrow_table()
+        arrow_df = execute_and_fetch(con, f"select * from {result_table}", 'fetch_arrow_table')
     # Return the final arrow_df for the next step
     return arrow_df
 
@@ -197,10 +550,12 @@ def read_arrow(con, arrow_df):
     # Read from a 10,000,000 row Pandas dataframe (from 0.45 seconds in 0.2.7 to 0.008 seconds in 0.10)
     arrow_df_summary = con.execute("select sum(v3) as v3 from arrow_df").fetch_arrow_table()
 
-def ingest_join_csvs(con, x_csv, small_csv, medium_csv, big_csv, duckdb_version, versions_without_enums):
+def ingest_join_csvs(con, x_csv, small_csv, medium_csv, big_csv, duckdb_version, versions_without_enums, schema='enum'):
     # Load data for join queries (10.4 seconds to 3.4 seconds)
     table_suffix = '_csv'
-    if duckdb_version in versions_without_enums:
+    if duckdb_version in versions_without_enums and schema == 'enum':
+        table_suffix = ''
+    elif schema == 'varchar':
         table_suffix = ''
     create_table_queries_joins = [
         f"DROP TABLE IF EXISTS x{table_suffix}",
@@ -253,6 +608,35 @@ def convert_to_enums_joins(con):
     for query in convert_to_enum_queries_joins:
         con.execute(query).fetchall()
 
+def convert_to_integers_joins(con):
+    # id4, id5 and id6 look like 'id123', so strip the prefix and store the number
+    convert_to_integer_queries_joins = [
+        "DROP TABLE IF EXISTS small",
+        "CREATE TABLE small(id1 INT64, id4 INT64, v2 DOUBLE)",
+        "INSERT INTO small (SELECT id1, replace(id4, 'id', '')::INT64, v2 FROM small_csv)",
+
+        "DROP TABLE IF EXISTS medium",
+        "CREATE TABLE medium(id1 INT64, id2 INT64, id4 INT64, id5 INT64, v2 DOUBLE)",
+        "INSERT INTO medium (SELECT id1, id2, replace(id4, 'id', '')::INT64, replace(id5, 'id', '')::INT64, v2 FROM medium_csv)",
+
+        "DROP TABLE IF EXISTS big",
+        "CREATE TABLE big(id1 INT64, id2 INT64, id3 INT64, id4 INT64, id5 INT64, id6 INT64, v2 DOUBLE)",
+        "INSERT INTO big (SELECT id1, id2, id3, replace(id4, 'id', '')::INT64, replace(id5, 'id', '')::INT64, replace(id6, 'id', '')::INT64, v2 FROM big_csv)",
+
+        "DROP TABLE IF EXISTS x",
+        "CREATE TABLE x(id1 INT64, id2 INT64, id3 INT64, id4 INT64, id5 INT64, id6 INT64, v1 DOUBLE)",
+        "INSERT INTO x (SELECT id1, id2, id3, replace(id4, 'id', '')::INT64, replace(id5, 'id', '')::INT64, replace(id6, 'id', '')::INT64, v1 FROM x_csv)",
+
+        # drop all the csv ingested tables
+        "DROP TABLE x_csv",
+        "DROP TABLE small_csv",
+        "DROP TABLE medium_csv",
+        "DROP TABLE big_csv",
+        "CHECKPOINT"
+    ]
+    for query in convert_to_integer_queries_joins:
+        con.execute(query).fetchall()
+
 def join_queries(con):
     # Join queries from 28.5 seconds to 4.1 seconds
     join_queries = [
@@ -272,17 +656,89 @@ def join_queries(con):
     for query in join_queries:
         con.execute(query).fetchall()
 
+# Sort, top-N, DISTINCT and string queries over the G1 table x.
+# Ids are cast to VARCHAR for the string functions, since some schema variants store them as ENUMs or integers
+group_by_query_families = {
+    'sort': ('104 Group By Scale test: Sort queries', [
+        "SELECT * FROM x ORDER BY v3",
+        "SELECT * FROM x ORDER BY id3, id6 DESC",
+        "SELECT id3, id6, v1 FROM x ORDER BY id4, id5, id6, v3",
+    ]),
+    'top_n': ('105 Group By Scale test: Top-N queries', [
+        "SELECT * FROM x ORDER BY v3 DESC LIMIT 100",
+        "SELECT * FROM x ORDER BY id3, v1 LIMIT 1000",
+        "SELECT id6, v3 FROM x ORDER BY v3 DESC, id6 LIMIT 1000000",
+    ]),
+    'distinct': ('106 Group By Scale test: Distinct queries', [
+        "SELECT count(DISTINCT id3) AS distinct_id3, count(DISTINCT id6) AS distinct_id6 FROM x",
+        "SELECT id1, count(DISTINCT id3) AS distinct_id3 FROM x GROUP BY id1",
+        "SELECT DISTINCT id3, id6 FROM x",
+        "SELECT count(*) AS distinct_rows FROM (SELECT DISTINCT id1, id2, id3, id4, id5, id6 FROM x) distinct_ids",
+    ]),
+    'string': ('107 Group By Scale test: String queries', [
+        "SELECT count(*) AS matches FROM x WHERE id3::VARCHAR LIKE '%99%'",
+        "SELECT count(*) AS matches FROM x WHERE regexp_matches(id3::VARCHAR, '7[0-9]7')",
+        "SELECT id1::VARCHAR || '_' || id2::VARCHAR || '_' || id3::VARCHAR AS id123, v1 FROM x",
+        "SELECT id6, string_agg(id3::VARCHAR, ',') AS id3_list FROM x GROUP BY id6",
+    ]),
+}
+
+# The same families over the J1 table x, with id6 as the string column
+join_query_families = {
+    'sort': ('204 Join Scale test: Sort queries', [
+        "SELECT * FROM x ORDER BY v1",
+        "SELECT * FROM x ORDER BY id6, id1 DESC",
+        "SELECT id4, id6, v1 FROM x ORDER BY id4, id5, v1",
+    ]),
+    'top_n': ('205 Join Scale test: Top-N queries', [
+        "SELECT * FROM x ORDER BY v1 DESC LIMIT 100",
+        "SELECT * FROM x ORDER BY id6, v1 LIMIT 1000",
+        "SELECT id3, v1 FROM x ORDER BY v1 DESC, id3 LIMIT 1000000",
+    ]),
+    'distinct': ('206 Join Scale test: Distinct queries', [
+        "SELECT count(DISTINCT id3) AS distinct_id3, count(DISTINCT id6) AS distinct_id6 FROM x",
+        "SELECT id4, count(DISTINCT id6) AS distinct_id6 FROM x GROUP BY id4",
+        "SELECT DISTINCT id5, id6 FROM x",
+    ]),
+    'string': ('207 Join Scale test: String queries', [
+        "SELECT count(*) AS matches FROM x WHERE id6::VARCHAR LIKE '%99%'",
+        "SELECT count(*) AS matches FROM x WHERE regexp_matches(id6::VARCHAR, '7[0-9]7')",
+        "SELECT id4::VARCHAR || '_' || id5::VARCHAR || '_' || id6::VARCHAR AS id456, v1 FROM x",
+        "SELECT id5, string_agg(id6::VARCHAR, ',') AS id6_list FROM x GROUP BY id5",
+    ]),
+}
+
+def query_family_result_tables(select_queries):
+    return ['family_ans' + str(r) for r in range(1, len(select_queries) + 1)]
+
+def query_family_queries(con, select_queries):
+    # Like group_by_queries, each result is written to a table
+    family_queries = []
+    for result_table, select_query in zip(query_family_result_tables(select_queries), select_queries):
+        family_queries.append(f"DROP TABLE IF EXISTS {result_table}")
+        family_queries.append(f"CREATE TABLE {result_table} AS {select_query}")
+    family_queries.append("CHECKPOINT")
+
+    for query in family_queries:
+        con.execute(query).fetchall()
+
+def drop_query_family_results(con, select_queries):
+    # The sort and string results are as large as x, so drop them before the next family (untimed)
+    for result_table in query_family_result_tables(select_queries):
+        con.execute(f"DROP TABLE IF EXISTS {result_table}").fetchall()
+    con.execute("CHECKPOINT").fetchall()
+
 def export_join_results_to_pandas(con):
     # Export join results to Pandas from 47 seconds to 10 seconds
     for r in range(1, 6):
         result_table = "ans"+str(r)
-        pandas_df = con.execute(f"select * from {result_table}").fetch_df()
+        pandas_df = execute_and_fetch(con, f"select * from {result_table}", 'fetch_df')
 
 def export_join_to_arrow(con):
     # Export join results to Arrow from  seconds to  seconds
     for r in range(1, 6):
         result_table = "ans"+str(r)
-        arrow_df = con.execute(f"select * from {result_table}").fetch_arrow_table()
+        arrow_df = execute_and_fetch(con, f"select * from {result_table}", 'fetch_arrow_table')
 
 def export_join_to_parquet(con, venv_location):
     # Write out group by results to parquet (from 2.5 seconds to 1.8 seconds in 0.10)
@@ -293,6 +749,362 @@ def export_join_to_parquet(con, venv_location):
     # Return the final parquet file for next step
     return parquet_file
 
+def stream_export_record_batches(con, result_tables, batch_size):
+    # Stream each result table out through an Arrow RecordBatchReader, holding one batch at a time
+    rows = 0
+    for result_table in result_tables:
+        record_batch_reader = con.execute(f"select * from {result_table}").fetch_record_batch(batch_size)
+        for record_batch in record_batch_reader:
+            rows += record_batch.num_rows
+    return {'rows': rows}
+
+def stream_export_df_chunks(con, result_tables):
+    # Stream each result table out as a series of small Pandas dataframes
+    rows = 0
+    for result_table in result_tables:
+        con.execute(f"select * from {result_table}")
+        while True:
+            pandas_df_chunk = con.fetch_df_chunk()
+            if len(pandas_df_chunk) == 0:
+                break
+            rows += len(pandas_df_chunk)
+    return {'rows': rows}
+
+def export_numpy(con, result_tables):
+    rows = 0
+    for result_table in result_tables:
+        numpy_arrays = execute_and_fetch(con, f"select * from {result_table}", 'fetchnumpy')
+        rows += len(next(iter(numpy_arrays.values())))
+    return {'rows': rows}
+
+def export_full_df(con, result_tables):
+    # Baseline for the streaming exports: materialize each whole result table at once
+    rows = 0
+    for result_table in result_tables:
+        pandas_df = execute_and_fetch(con, f"select * from {result_table}", 'fetch_df')
+        rows += len(pandas_df)
+    return {'rows': rows}
+
+def export_full_arrow(con, result_tables):
+    rows = 0
+    for result_table in result_tables:
+        arrow_df = execute_and_fetch(con, f"select * from {result_table}", 'fetch_arrow_table')
+        rows += arrow_df.num_rows
+    return {'rows': rows}
+
+def write_parquet_with_settings(con, table_name, parquet_file, codec, row_group_size):
+    con.execute(f"COPY {table_name} TO '{parquet_file}' (FORMAT PARQUET, CODEC '{codec}', ROW_GROUP_SIZE {row_group_size})").fetchall()
+    return {'file_size_bytes': os.path.getsize(parquet_file)}
+
+def write_parquet_files_with_settings(con, table_name, parquet_directory, codec, row_group_size, file_count):
+    # Split the table into file_count files to be read back with a glob
+    Path(parquet_directory).mkdir(parents=True, exist_ok=True)
+    file_size_bytes = 0
+    for file_number in range(file_count):
+        parquet_file = parquet_directory + f'/part_{file_number}.parquet'
+        con.execute(f"""COPY (SELECT * FROM {table_name} WHERE id6 % {file_count} = {file_number}) 
+                        TO '{parquet_file}' (FORMAT PARQUET, CODEC '{codec}', ROW_GROUP_SIZE {row_group_size})""").fetchall()
+        file_size_bytes += os.path.getsize(parquet_file)
+    return {'file_size_bytes': file_size_bytes}
+
+# Explicit schemas of the csv matrix tables, matching the types that read_csv_auto detects
+csv_matrix_tables = {
+    'group_by': "id1 VARCHAR, id2 VARCHAR, id3 VARCHAR, id4 INT, id5 INT, id6 INT, v1 INT, v2 INT, v3 FLOAT",
+    'join': "id1 BIGINT, id2 BIGINT, id3 BIGINT, id4 VARCHAR, id5 VARCHAR, id6 VARCHAR, v1 DOUBLE",
+}
+csv_matrix_extensions = {'none': '.csv', 'gzip': '.csv.gz', 'zstd': '.csv.zst'}
+
+def get_csv_matrix_source(venv_location, table_name, row_count):
+    if table_name == 'group_by':
+        return get_group_by_csv(venv_location, row_count)
+    return get_join_csvs(venv_location, row_count)['x_csv']
+
+def write_csv_matrix_files(con, table_name, csv_directory, compression, file_count, source_row_count):
+    """Split table_name into file_count csv files of consecutive rows. Returns the glob that reads them back and their size on disk"""
+    Path(csv_directory).mkdir(parents=True, exist_ok=True)
+    compression_option = '' if compression == 'none' else f", COMPRESSION '{compression}'"
+    rows_per_file = -(-source_row_count // file_count)
+    file_size_bytes = 0
+    for file_number in range(file_count):
+        csv_file = csv_directory + f'/part_{file_number}' + csv_matrix_extensions[compression]
+        con.execute(f"""COPY (SELECT * FROM {table_name} WHERE rowid >= {file_number * rows_per_file} AND rowid < {(file_number + 1) * rows_per_file})
+                        TO '{csv_file}' (FORMAT CSV, HEADER{compression_option})""").fetchall()
+        file_size_bytes += os.path.getsize(csv_file)
+    return csv_directory + '/*' + csv_matrix_extensions[compression], file_size_bytes
+
+def create_csv_matrix_target(con, table_columns):
+    con.execute("DROP TABLE IF EXISTS csv_matrix_target").fetchall()
+    if table_columns is not None:
+        con.execute(f"CREATE TABLE csv_matrix_target({table_columns})").fetchall()
+
+def read_csv_explicit_schema(con, csv_glob, row_count, csv_bytes, file_size_bytes):
+    # The target table fixes the types and the dialect is given, so nothing is sniffed
+    con.execute(f"COPY csv_matrix_target FROM '{csv_glob}' (HEADER TRUE, AUTO_DETECT FALSE)").fetchall()
+    return {'rows': row_count, 'csv_bytes': csv_bytes, 'file_size_bytes': file_size_bytes}
+
+def read_csv_auto_detect(con, csv_glob, sample_size, row_count, csv_bytes, file_size_bytes):
+    con.execute(f"CREATE TABLE csv_matrix_target AS SELECT * FROM read_csv_auto('{csv_glob}', SAMPLE_SIZE={sample_size})").fetchall()
+    return {'rows': row_count, 'csv_bytes': csv_bytes, 'file_size_bytes': file_size_bytes}
+
+def sniff_csv(con, csv_glob, sample_size):
+    # Binding the scan runs the sniffer, and DESCRIBE stops before reading any rows
+    con.execute(f"DESCRIBE SELECT * FROM read_csv_auto('{csv_glob}', SAMPLE_SIZE={sample_size})").fetchall()
+
+def scan_parquet_all_columns(con, parquet_path):
+    parquet_summary = con.execute(f"""
+        SELECT min(id1), min(id2), min(id3), max(id4), max(id5), max(id6), sum(v1), sum(v2), sum(v3) 
+        FROM parquet_scan('{parquet_path}')""").fetchall()
+
+def scan_parquet_projection(con, parquet_path):
+    # Only one column needs to be read and decompressed
+    parquet_summary = con.execute(f"SELECT sum(v3) AS v3 FROM parquet_scan('{parquet_path}')").fetchall()
+
+def scan_parquet_selective_filter(con, parquet_path, id6_threshold):
+    # The file is sorted by id6, so row group statistics should allow most row groups to be skipped
+    parquet_summary = con.execute(f"SELECT count(*), sum(v3) AS v3 FROM parquet_scan('{parquet_path}') WHERE id6 <= {id6_threshold}").fetchall()
+
+integer_types = ['TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT']
+numeric_types = integer_types + ['HUGEINT', 'FLOAT', 'DOUBLE']
+
+def get_arrow_ipc_filter(con, table_name):
+    """(filter_column, threshold, sum_column) for a selective scan of a result table:
+    the first integer column filtered to roughly the lowest 10% of its range, and the last numeric column to aggregate"""
+    # PRAGMA table_info rows are (cid, name, type, notnull, dflt_value, pk)
+    columns = con.execute(f"PRAGMA table_info('{table_name}')").fetchall()
+    filter_column = [column[1] for column in columns if column[2] in integer_types][0]
+    sum_column = [column[1] for column in columns if column[2] in numeric_types or column[2].startswith('DECIMAL')][-1]
+    # Integer division in Python, since DuckDB only has the // operator from 0.8.0
+    minimum, maximum = con.execute(f'SELECT min("{filter_column}"), max("{filter_column}") FROM {table_name}').fetchall()[0]
+    return filter_column, minimum + (maximum - minimum) // 10, sum_column
+
+def write_arrow_ipc(con, result_tables, ipc_directory, compression):
+    import pyarrow.feather
+    Path(ipc_directory).mkdir(parents=True, exist_ok=True)
+    rows = 0
+    file_size_bytes = 0
+    for result_table in result_tables:
+        arrow_table = execute_and_fetch(con, f"select * from {result_table}", 'fetch_arrow_table')
+        ipc_file = f'{ipc_directory}/{result_table}.arrow'
+        pyarrow.feather.write_feather(arrow_table, ipc_file, compression=compression)
+        rows += arrow_table.num_rows
+        file_size_bytes += os.path.getsize(ipc_file)
+    return {'rows': rows, 'file_size_bytes': file_size_bytes}
+
+def open_memory_mapped_dataset(ipc_file):
+    import pyarrow.dataset
+    import pyarrow.fs
+    return pyarrow.dataset.dataset(ipc_file, format='ipc', filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+
+def scan_arrow_ipc_dataset_all_columns(con, ipc_directory, result_tables):
+    # max() of every column, so every column is read. Mapped pages count towards RSS, so compare rss_growth_bytes to file_size_bytes
+    rows = 0
+    file_size_bytes = 0
+    for result_table in result_tables:
+        ipc_file = f'{ipc_directory}/{result_table}.arrow'
+        arrow_dataset = open_memory_mapped_dataset(ipc_file)
+        column_maxes = ', '.join(f'max("{column_name}")' for column_name in arrow_dataset.schema.names)
+        rows += con.execute(f"SELECT count(*), {column_maxes} FROM arrow_dataset").fetchall()[0][0]
+        file_size_bytes += os.path.getsize(ipc_file)
+    return {'rows': rows, 'file_size_bytes': file_size_bytes}
+
+def scan_arrow_ipc_dataset_filtered(con, ipc_directory, ipc_filters):
+    # DuckDB pushes the projection and filter down into the dataset scan. rows counts the rows that pass the filter
+    rows = 0
+    for result_table, (filter_column, threshold, sum_column) in ipc_filters.items():
+        arrow_dataset = open_memory_mapped_dataset(f'{ipc_directory}/{result_table}.arrow')
+        rows += con.execute(f'SELECT count(*), sum("{sum_column}") FROM arrow_dataset WHERE "{filter_column}" < {threshold}').fetchall()[0][0]
+    return {'rows': rows}
+
+def scan_arrow_ipc_file_record_batches(con, ipc_directory, result_tables):
+    # Read the batches of the IPC file straight out of the memory map, without the dataset layer
+    import pyarrow
+    rows = 0
+    file_size_bytes = 0
+    for result_table in result_tables:
+        ipc_file = f'{ipc_directory}/{result_table}.arrow'
+        ipc_reader = pyarrow.ipc.open_file(pyarrow.memory_map(ipc_file))
+        record_batch_reader = pyarrow.RecordBatchReader.from_batches(ipc_reader.schema, (ipc_reader.get_batch(b) for b in range(ipc_reader.num_record_batches)))
+        column_maxes = ', '.join(f'max("{column_name}")' for column_name in ipc_reader.schema.names)
+        rows += con.execute(f"SELECT count(*), {column_maxes} FROM record_batch_reader").fetchall()[0][0]
+        file_size_bytes += os.path.getsize(ipc_file)
+    return {'rows': rows, 'file_size_bytes': file_size_bytes}
+
+def scan_arrow_ipc_scanner_record_batches(con, ipc_directory, ipc_filters):
+    # pyarrow applies the projection and filter, and DuckDB reads the remaining batches through a record batch reader
+    import pyarrow.dataset
+    rows = 0
+    for result_table, (filter_column, threshold, sum_column) in ipc_filters.items():
+        arrow_dataset = open_memory_mapped_dataset(f'{ipc_directory}/{result_table}.arrow')
+        scanner = arrow_dataset.scanner(columns=list(dict.fromkeys([filter_column, sum_column])), filter=pyarrow.dataset.field(filter_column) < threshold)
+        record_batch_reader = scanner.to_reader()
+        rows += con.execute(f'SELECT count(*), sum("{sum_column}") FROM record_batch_reader').fetchall()[0][0]
+    return {'rows': rows}
+
+def get_concurrency_lookup_values(con, sample_size=1000):
+    id3_values = [row[0] for row in con.execute(f"SELECT DISTINCT id3 FROM x LIMIT {sample_size}").fetchall()]
+    id6_values = [row[0] for row in con.execute(f"SELECT DISTINCT id6 FROM x LIMIT {sample_size}").fetchall()]
+    return id3_values, id6_values
+
+def get_concurrency_query(query_type, rng, id3_values, id6_values):
+    if query_type == 'point_lookup':
+        return "SELECT * FROM x WHERE id3 = ?", [rng.choice(id3_values)]
+    elif query_type == 'small_aggregate':
+        return "SELECT id4, sum(v1) AS v1, avg(v3) AS v3 FROM x WHERE id6 = ? GROUP BY id4", [rng.choice(id6_values)]
+    elif query_type == 'group_by':
+        return rng.choice(group_by_select_queries), None
+    raise ValueError(f'Unknown concurrency query type {query_type}')
+
+def run_concurrent_query_mix(con, db_file, concurrency, connection_mode, duration_seconds, query_mix, id3_values, id6_values):
+    """Run the query mix from concurrency threads until duration_seconds have passed.
+    Returns a dict of query_type to LatencyHistogram (plus 'all') and the number of failed queries"""
+    query_types = list(query_mix.keys())
+    query_weights = list(query_mix.values())
+    deadline = time.perf_counter() + duration_seconds
+
+    def worker(worker_id):
+        # Each thread records into its own histograms so no locking is needed
+        histograms = {query_type: LatencyHistogram() for query_type in query_types}
+        errors = 0
+        rng = random.Random(worker_id)
+        if connection_mode == 'cursor':
+            worker_con = con.cursor()
+        else:
+            worker_con = duckdb.connect(db_file)
+        try:
+            while time.perf_counter() < deadline:
+                query_type = rng.choices(query_types, query_weights)[0]
+                query, parameters = get_concurrency_query(query_type, rng, id3_values, id6_values)
+                start_time = time.perf_counter()
+                try:
+                    if parameters is None:
+                        worker_con.execute(query).fetchall()
+                    else:
+                        worker_con.execute(query, parameters).fetchall()
+                except Exception:
+                    errors += 1
+                    continue
+                histograms[query_type].record(time.perf_counter() - start_time)
+        finally:
+            worker_con.close()
+        return histograms, errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        worker_results = list(executor.map(worker, range(concurrency)))
+
+    merged_histograms = {query_type: LatencyHistogram() for query_type in query_types + ['all']}
+    total_errors = 0
+    for histograms, errors in worker_results:
+        total_errors += errors
+        for query_type, histogram in histograms.items():
+            merged_histograms[query_type].merge(histogram)
+            merged_histograms['all'].merge(histogram)
+    return merged_histograms, total_errors
+
+def log_concurrency_results(histograms, errors, elapsed_time, r, b, s, l):
+    metrics = [(r, b, s, 'errors', errors)]
+    for query_type, histogram in histograms.items():
+        metrics.append((r, b, s, f'{query_type}_qps', histogram.total_count / elapsed_time))
+        for metric, value in histogram.summary().items():
+            if value is not None:
+                metrics.append((r, b, s, f'{query_type}_{metric}', value))
+    l.log([(r, b, s, elapsed_time)])
+    l.log_metrics(metrics)
+    l.log_histograms([(r, b, s, query_type, histogram.to_json()) for query_type, histogram in histograms.items()])
+
+small_queries = {
+    '651 Small query latency: Point lookup': "SELECT * FROM x WHERE id3 = ?",
+    '652 Small query latency: Tiny aggregate': "SELECT avg(v1) AS v1, max(v2) AS v2 FROM ans04 WHERE id4 <= ?",
+    '653 Small query latency: Metadata query': "SELECT count(*) FROM information_schema.columns WHERE table_name = ?",
+}
+
+def sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+def run_small_query_latency(con, query, parameter_values, method, iterations, warmup_iterations):
+    """Run query iterations times, cycling through parameter_values, and return a LatencyHistogram.
+    For executemany every sample is one batch of executemany_batch_size queries"""
+    histogram = LatencyHistogram()
+    if method == 'prepared':
+        con.execute(f"PREPARE small_query AS {query}").fetchall()
+
+    def run_once(value):
+        if method == 'execute_literal':
+            con.execute(query.replace('?', sql_literal(value))).fetchall()
+        elif method == 'execute_parameters':
+            con.execute(query, [value]).fetchall()
+        elif method == 'prepared':
+            con.execute(f"EXECUTE small_query({sql_literal(value)})").fetchall()
+        else:
+            raise ValueError(f'Unknown small query method {method}')
+
+    if method == 'executemany':
+        for batch_start in range(-warmup_iterations, iterations, executemany_batch_size):
+            batch = [[parameter_values[(batch_start + j) % len(parameter_values)]] for j in range(executemany_batch_size)]
+            start_time = time.perf_counter()
+            con.executemany(query, batch)
+            end_time = time.perf_counter()
+            if batch_start >= 0:
+                histogram.record(end_time - start_time)
+    else:
+        for iteration in range(-warmup_iterations, iterations):
+            value = parameter_values[iteration % len(parameter_values)]
+            start_time = time.perf_counter()
+            run_once(value)
+            end_time = time.perf_counter()
+            if iteration >= 0:
+                histogram.record(end_time - start_time)
+
+    if method == 'prepared':
+        con.execute("DEALLOCATE small_query").fetchall()
+    return histogram
+
+def log_latency_histogram(histogram, elapsed_time, r, b, s, l):
+    l.log([(r, b, s, elapsed_time)])
+    l.log_metrics([(r, b, s, metric, value) for metric, value in histogram.summary().items() if value is not None])
+    l.log_histograms([(r, b, s, 'all', histogram.to_json())])
+
+def create_ingestion_target(con):
+    create_table_queries = [
+        "DROP TABLE IF EXISTS ingestion_target",
+        "CREATE TABLE ingestion_target(id1 VARCHAR, id2 VARCHAR, id3 VARCHAR, id4 INT, id5 INT, id6 INT, v1 INT, v2 INT, v3 FLOAT)",
+    ]
+    for query in create_table_queries:
+        con.execute(query).fetchall()
+
+def ingest_executemany(con, rows, batch_size):
+    for batch_start in range(0, len(rows), batch_size):
+        con.executemany("INSERT INTO ingestion_target VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows[batch_start:batch_start + batch_size])
+    return {'rows': len(rows)}
+
+def ingest_pandas_batches(con, pandas_df, batch_size):
+    for batch_start in range(0, len(pandas_df), batch_size):
+        pandas_df_batch = pandas_df.iloc[batch_start:batch_start + batch_size]
+        con.execute("INSERT INTO ingestion_target SELECT * FROM pandas_df_batch").fetchall()
+    return {'rows': len(pandas_df)}
+
+def ingest_arrow_batches(con, arrow_table, batch_size):
+    for batch_start in range(0, arrow_table.num_rows, batch_size):
+        arrow_table_batch = arrow_table.slice(batch_start, batch_size)
+        con.execute("INSERT INTO ingestion_target SELECT * FROM arrow_table_batch").fetchall()
+    return {'rows': arrow_table.num_rows}
+
+def ingest_record_batch_reader(con, arrow_table, batch_size):
+    # A single INSERT that pulls batch_size rows at a time from a stream
+    import pyarrow
+    record_batch_reader = pyarrow.RecordBatchReader.from_batches(arrow_table.schema, arrow_table.to_batches(max_chunksize=batch_size))
+    con.execute("INSERT INTO ingestion_target SELECT * FROM record_batch_reader").fetchall()
+    return {'rows': arrow_table.num_rows}
+
+def ingest_csv_copy(con, csv_file, row_count):
+    con.execute(f"COPY ingestion_target FROM '{csv_file}' (AUTO_DETECT TRUE)").fetchall()
+    return {'rows': row_count}
+
+def ingest_parquet_insert(con, parquet_file, row_count):
+    con.execute(f"INSERT INTO ingestion_target SELECT * FROM parquet_scan('{parquet_file}')").fetchall()
+    return {'rows': row_count}
+
 
 def ingest_windowing_csv(con, big_csv):
     # Load data for windowing queries
@@ -604,86 +1416,545 @@ def window_quantiles_partition_by_rows_between(con):
     for query in windowing_queries:
         print(con.execute(query).fetchall())
 
-# This needs to match the filename in the calling loop
-logger = SQLiteLogger('benchmark_log_python.db', delete_file=False)
-
-if test_performance:
-    for i in range(repeat):
-        try:
-            duckdb_version, scenario = get_duckdb_version_and_scenario()
-            venv_location = str(Path(sys.executable).parent.parent)
-            con = connect_to_duckdb(venv_location, duckdb_version)
-            
-            time_and_log(pandas_test, con, 
-                        r=i, b='001 Query pandas', s=scenario, l=logger)
-
-            csv_file = str(Path(venv_location).parent) + '/_data/G1_1e7_1e2_0_0.csv'
-            time_and_log(ingest_group_by_csv, con, csv_file, duckdb_version, versions_without_enums,
-                        r=i, b='002 Create table from csv', s=scenario, l=logger)
-            
-            if duckdb_version not in versions_without_enums:
-                time_and_log(convert_to_enums_group_by, con, duckdb_version,
-                            r=i, b='003 Convert to Enums', s=scenario, l=logger)
-
-            time_and_log(group_by_queries, con,
-                        r=i, b='004 Group by queries', s=scenario, l=logger)
-
-            pandas_df = time_and_log(export_group_by_to_pandas, con,
-                        r=i, b='005 Export group by results to Pandas', s=scenario, l=logger)
-
-            time_and_log(read_pandas, con, pandas_df,
-                        r=i, b='006 Scan and aggregate over Pandas df', s=scenario, l=logger)
-
-            parquet_file = time_and_log(export_group_by_to_parquet, con, venv_location,
-                        r=i, b='007 Export group by results to Parquet', s=scenario, l=logger)
+window_sweep_function_sql = {
+    'sum': 'sum(v2)',
+    'avg': 'avg(v2)',
+    'first': 'first(v2)',
+    'quantile': 'quantile_cont(v2, 0.5)',
+    'row_number': 'row_number()',
+}
+
+def generate_window_sweep(functions, partitions, frames):
+    """Yield every (function, partition, frame_type, frame_size) combination that makes sense"""
+    for function in functions:
+        for partition in partitions:
+            for frame_type, frame_size in frames:
+                # row_number ignores the frame
+                if function == 'row_number' and frame_type != 'none':
+                    continue
+                yield function, partition, frame_type, frame_size
+
+def get_window_sweep_partition_column(partition):
+    if partition is None or isinstance(partition, str):
+        return partition
+    return f'p_{partition}'
+
+def build_window_sweep_query(function, partition, frame_type, frame_size):
+    over_clause = []
+    partition_column = get_window_sweep_partition_column(partition)
+    if partition_column is not None:
+        over_clause.append(f'partition by {partition_column}')
+
+    frame_start = 'unbounded preceding' if frame_size == 'unbounded' else f'{frame_size} preceding'
+    if frame_type == 'rows':
+        over_clause.append(f'order by id3 rows between {frame_start} and current row')
+    elif frame_type == 'range':
+        over_clause.append(f'order by v2 range between {frame_start} and current row')
+    elif function == 'row_number':
+        over_clause.append('order by id3')
+
+    return f"""
+        CREATE TABLE windowing_results AS
+        SELECT 
+            id1,
+            id2,
+            id3,
+            v2,
+            {window_sweep_function_sql[function]} over ({' '.join(over_clause)}) as window_sweep
+        FROM windowing_sweep
+        """
 
-            time_and_log(read_parquet, con, parquet_file,
-                        r=i, b='008 Scan and aggregate over Parquet file', s=scenario, l=logger)
+def create_windowing_sweep_table(con, input_row_count, partitions):
+    # id3 is unique in the big J1 table, so id3 % n gives a key with n distinct values
+    synthetic_columns = ''.join(f', id3 % {partition} AS p_{partition}' for partition in partitions if isinstance(partition, int))
+    create_table_queries = [
+        "DROP TABLE IF EXISTS windowing_sweep",
+        f"CREATE TABLE windowing_sweep AS SELECT id1, id2, id3, v2{synthetic_columns} FROM windowing LIMIT {input_row_count}",
+        "CHECKPOINT",
+    ]
+    for query in create_table_queries:
+        con.execute(query).fetchall()
 
-            # Skip pyarrow tests on version 0.2.7-0.3.0 since numpy wouldn't compile correctly on M1 Mac
-            if not duckdb_version in versions_without_pyarrow: 
-                import pyarrow
-                arrow_df = time_and_log(export_group_by_to_arrow, con,
-                        r=i, b='009 Export group by results to Arrow', s=scenario, l=logger)
-                
-                time_and_log(read_arrow, con, arrow_df,
-                        r=i, b='010 Scan and aggregate over Arrow df', s=scenario, l=logger)
+def get_window_sweep_partition_cardinality(con, partition):
+    if partition is None:
+        return 1
+    partition_column = get_window_sweep_partition_column(partition)
+    return con.execute(f"SELECT count(DISTINCT {partition_column}) FROM windowing_sweep").fetchall()[0][0]
 
-            x_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_NA_0_0.csv'
-            small_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_1e1_0_0.csv'
-            medium_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_1e4_0_0.csv'
-            big_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_1e7_0_0.csv'
-            time_and_log(ingest_join_csvs, con, x_csv, small_csv, medium_csv, big_csv, duckdb_version, versions_without_enums,
-                        r=i, b='011 Create tables from csvs joins', s=scenario, l=logger)
+def window_sweep(con, query):
+    windowing_queries = [
+        "DROP TABLE IF EXISTS windowing_results",
+        query,
+    ]
+    for query in windowing_queries:
+        con.execute(query).fetchall()
 
-            if duckdb_version not in versions_without_enums:
-                time_and_log(convert_to_enums_joins, con,
-                        r=i, b='012 Convert to Enums for joins', s=scenario, l=logger)
+unflushed_wal_writer_script = '''
+import sys
+import duckdb
+con = duckdb.connect(sys.argv[1])
+# Make sure nothing is checkpointed before the process is killed
+for pragma in ["PRAGMA disable_checkpoint_on_shutdown", "PRAGMA wal_autocheckpoint='1TB'"]:
+    try:
+        con.execute(pragma).fetchall()
+    except Exception as err:
+        print(err, file=sys.stderr)
+con.execute("DROP TABLE IF EXISTS wal_replay").fetchall()
+con.execute(f"CREATE TABLE wal_replay AS SELECT * FROM {sys.argv[2]} LIMIT {sys.argv[3]}").fetchall()
+con.execute("UPDATE wal_replay SET v1 = v1 + 1").fetchall()
+print('ready', flush=True)
+input()
+'''
+
+def create_unflushed_wal(db_file, source_table, row_count):
+    """Write to db_file from a child process and kill it before it checkpoints, leaving a WAL to replay.
+    Returns the size of the WAL in bytes, or 0 if the writer left none (for example when it checkpointed anyway)"""
+    writer = subprocess.Popen([sys.executable, '-c', unflushed_wal_writer_script, db_file, source_table, str(row_count)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        ready = writer.stdout.readline()
+        if ready.strip() != 'ready':
+            raise Exception(f'WAL writer process exited with {writer.wait()} before writing')
+    finally:
+        writer.kill()
+        writer.wait()
+    if not os.path.exists(db_file + '.wal'):
+        return 0
+    return os.path.getsize(db_file + '.wal')
+
+def first_query(con, query):
+    con.execute(query).fetchall()
+
+def run_reopen_benchmarks(db_file, source_table, query, r, s, l):
+    """Time reopening a closed database plus a first query, then do the same after an unclean shutdown.
+    The database must already be closed. Returns the reopened connection"""
+    l.log_metrics([(r, '551 Reopen: Open persisted database', s, 'database_file_bytes', os.path.getsize(db_file))])
+    con = time_and_log(duckdb.connect, db_file,
+                r=r, b='551 Reopen: Open persisted database', s=s, l=l)
+    try:
+        time_and_log(first_query, con, query,
+                    r=r, b='552 Reopen: First query after open', s=s, l=l)
+    finally:
+        con.close()
+
+    wal_bytes = create_unflushed_wal(db_file, source_table, wal_replay_row_count)
+    if wal_bytes == 0:
+        # Timing 553/554 would only repeat 551/552
+        print('Skipping WAL replay, the writer left no WAL for', db_file)
+        return duckdb.connect(db_file)
+    l.log_metrics([(r, '553 Reopen: Open database and replay WAL', s, 'wal_bytes', wal_bytes)])
+    con = time_and_log(duckdb.connect, db_file,
+                r=r, b='553 Reopen: Open database and replay WAL', s=s, l=l)
+    try:
+        time_and_log(first_query, con, query,
+                    r=r, b='554 Reopen: First query after WAL replay', s=s, l=l)
+    except Exception:
+        con.close()
+        raise
+    return con
+
+startup_script = '''
+import json
+import sys
+import time
+start_time = time.perf_counter()
+import duckdb
+import_time = time.perf_counter()
+con = duckdb.connect()
+connect_time = time.perf_counter()
+con.execute('select 42').fetchall()
+query_time = time.perf_counter()
+print(json.dumps({
+    'import_seconds': import_time - start_time,
+    'connect_seconds': connect_time - import_time,
+    'first_query_seconds': query_time - connect_time,
+    # Whether import duckdb pulled these in
+    'imported_pandas': int('pandas' in sys.modules),
+    'imported_pyarrow': int('pyarrow' in sys.modules),
+    'imported_numpy': int('numpy' in sys.modules),
+}), flush=True)
+'''
+
+def get_library_versions():
+    """pandas and pyarrow versions installed in this venv, for the startup scenario"""
+    library_versions = {'pandas_version': pd.__version__, 'pyarrow_version': None}
+    try:
+        import pyarrow
+        library_versions['pyarrow_version'] = pyarrow.__version__
+    except ImportError:
+        pass
+    return library_versions
+
+def run_startup_process(profile_imports=False):
+    """Run startup_script in a new interpreter of this venv.
+    Returns the timings printed by the child, the wall time from spawning it to reading its result,
+    and the -X importtime output if profile_imports"""
+    commands = [sys.executable] + (['-X', 'importtime'] if profile_imports else []) + ['-c', startup_script]
+    # stderr goes to a file, since the -X importtime output can fill a pipe while the result line is read from stdout
+    with tempfile.TemporaryFile(mode='w+') as stderr_file:
+        start_time = time.perf_counter()
+        child = subprocess.Popen(commands, stdout=subprocess.PIPE, stderr=stderr_file, text=True)
+        result_line = child.stdout.readline()
+        first_result_time = time.perf_counter()
+        child.communicate()
+        stderr_file.seek(0)
+        importtime_output = stderr_file.read()
+    if child.returncode != 0 or not result_line:
+        raise Exception(f'Startup process exited with {child.returncode}: {importtime_output[-1000:]}')
+    return json.loads(result_line), first_result_time - start_time, importtime_output
+
+def parse_importtime(importtime_output):
+    """Parse -X importtime lines like 'import time:       317 |        921 |   duckdb.typing'
+    into (module, depth, self_seconds, cumulative_seconds)"""
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_microseconds, cumulative_microseconds, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by 2 spaces per level after the separator space
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        modules.append((name.strip(), depth, int(self_microseconds) / 1_000_000, int(cumulative_microseconds) / 1_000_000))
+    return modules
+
+def get_duckdb_import_subtree(modules):
+    """The modules imported by the top level import duckdb, including duckdb itself.
+    -X importtime prints each module after the modules it imports, so these are the lines just before the depth 0 duckdb line.
+    Interpreter startup modules (site, encodings) and the imports of startup_script before duckdb are left out"""
+    for position, (module, depth, _, _) in enumerate(modules):
+        if module == 'duckdb' and depth == 0:
+            subtree_start = position
+            while subtree_start > 0 and modules[subtree_start - 1][1] > 0:
+                subtree_start -= 1
+            return modules[subtree_start:position + 1]
+    return []
+
+def run_startup_benchmarks(duckdb_version, iterations, l):
+    scenario = make_scenario(duckdb_version, **get_library_versions())
+    for i in range(iterations):
+        timings, process_seconds, _ = run_startup_process()
+        l.log([
+            (i, '801 Startup: import duckdb', scenario, timings['import_seconds']),
+            (i, '802 Startup: connect', scenario, timings['connect_seconds']),
+            (i, '803 Startup: first query', scenario, timings['first_query_seconds']),
+            (i, '804 Startup: process start to first result', scenario, process_seconds),
+        ])
+        l.log_metrics([(i, '801 Startup: import duckdb', scenario, metric, timings[metric]) for metric in ['imported_pandas', 'imported_pyarrow', 'imported_numpy']])
+
+        # A separate process, since -X importtime slows down the imports it measures
+        _, _, importtime_output = run_startup_process(profile_imports=True)
+        duckdb_modules = get_duckdb_import_subtree(parse_importtime(importtime_output))
+        if not duckdb_modules:
+            continue
+        l.log([(i, '805 Startup: import duckdb with -X importtime', scenario, duckdb_modules[-1][3])])
+        module_metrics = []
+        for module, depth, self_seconds, cumulative_seconds in duckdb_modules:
+            if self_seconds < startup_import_min_seconds:
+                continue
+            module_scenario = make_scenario(duckdb_version, **get_library_versions(), module=module)
+            module_metrics.append((i, '805 Startup: import duckdb with -X importtime', module_scenario, 'import_self_seconds', self_seconds))
+            module_metrics.append((i, '805 Startup: import duckdb with -X importtime', module_scenario, 'import_cumulative_seconds', cumulative_seconds))
+            module_metrics.append((i, '805 Startup: import duckdb with -X importtime', module_scenario, 'import_depth', depth))
+        l.log_metrics(module_metrics)
+
+def get_pandas_dtype_backends(duckdb_version):
+    if duckdb_version in versions_without_pyarrow or get_library_versions()['pyarrow_version'] is None or int(pd.__version__.split('.')[0]) < 2:
+        return ['numpy']
+    return library_sweep_dtype_backends
+
+def fetch_pandas_with_backend(con, query, dtype_backend):
+    if dtype_backend == 'numpy':
+        return execute_and_fetch(con, query, 'fetch_df')
+    arrow_table = execute_and_fetch(con, query, 'fetch_arrow_table')
+    start_time = time.perf_counter()
+    pandas_df = arrow_table.to_pandas(types_mapper=pd.ArrowDtype)
+    if phase_times is not None:
+        phase_times['convert_seconds'] = phase_times.get('convert_seconds', 0) + (time.perf_counter() - start_time)
+    return pandas_df
 
-            time_and_log(join_queries, con,
-                        r=i, b='013 Join queries', s=scenario, l=logger)
+def export_pandas_with_backend(con, result_tables, dtype_backend):
+    rows = 0
+    for result_table in result_tables:
+        pandas_df = fetch_pandas_with_backend(con, f"select * from {result_table}", dtype_backend)
+        rows += len(pandas_df)
+    return {'rows': rows}
+
+def run_user_workload_script(con, sql):
+    for statement in split_statements(sql):
+        con.execute(statement)
+
+def run_user_workload_query(con, sql):
+    # Any statements before the last one are run too, but only the last one returns the result
+    statements = split_statements(sql)
+    for statement in statements[:-1]:
+        con.execute(statement)
+    result = con.execute(statements[-1]).fetchall()
+    return {'result_rows': len(result)}
+
+def calibrate_cpu(con, row_count):
+    # Integer arithmetic over a generated range: no I/O and little memory, so it tracks the CPU (and its clock speed)
+    con.execute(f"select sum((range * range) % 1000003) from range({row_count})").fetchall()
+    return {'rows': row_count}
+
+def calibrate_memory(memory_bytes, passes):
+    """Returns the time of the timed passes and their metrics. Unlike the other calibrations this is not wrapped in
+    time_and_log_metrics, since the allocation and the first pass (which faults the pages in) are left out of the time"""
+    import numpy as np
+    array = np.ones(memory_bytes // 8)
+    array.sum()
+    start_time = time.perf_counter()
+    for _ in range(passes):
+        array.sum()
+    elapsed_time = time.perf_counter() - start_time
+    return elapsed_time, {'bytes': memory_bytes * passes, 'scan_bytes_per_second': memory_bytes * passes / elapsed_time}
+
+def calibrate_disk_write(calibration_file, disk_bytes, chunk_bytes):
+    chunk = os.urandom(chunk_bytes)
+    with open(calibration_file, 'wb') as f:
+        for _ in range(disk_bytes // chunk_bytes):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    return {'bytes': disk_bytes}
+
+def calibrate_disk_read(calibration_file, chunk_bytes):
+    with open(calibration_file, 'rb') as f:
+        # Drop the file from the page cache where the OS allows it, so the read goes to the disk
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        read_bytes = 0
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            read_bytes += len(chunk)
+    return {'bytes': read_bytes}
+
+def run_calibration(venv_location, calibration_point, l):
+    """Log the 85x calibration benchmarks with calibration_point ('start' or 'end') in the scenario.
+    build_results_warehouse.py turns them into a speed index per calibration window and flags the windows where start and end disagree"""
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    scenario = make_scenario(duckdb_version, calibration=calibration_point)
+    con = duckdb.connect(':memory:')
+    try:
+        time_and_log_metrics(calibrate_cpu, con, calibration_cpu_row_count,
+                    r=0, b='851 Calibration: CPU bound query', s=scenario, l=l)
+    finally:
+        con.close()
+
+    start_timestamp = time.time()
+    elapsed_time, metrics = calibrate_memory(calibration_memory_bytes, calibration_memory_passes)
+    l.log([(0, '852 Calibration: memory scan', scenario, elapsed_time)])
+    l.log_metrics([(0, '852 Calibration: memory scan', scenario, metric, value) for metric, value in {'start_timestamp_seconds': start_timestamp, **metrics}.items()])
+
+    # Next to the database file, so the probe measures the storage_placement under test
+    db_file = get_database_file(venv_location, duckdb_version)
+    calibration_directory = venv_location if db_file == ':memory:' else str(Path(db_file).parent)
+    Path(calibration_directory).mkdir(parents=True, exist_ok=True)
+    calibration_file = calibration_directory + '/calibration.bin'
+    try:
+        time_and_log_metrics(calibrate_disk_write, calibration_file, calibration_disk_bytes, calibration_disk_chunk_bytes,
+                    r=0, b='853 Calibration: disk write', s=scenario, l=l)
+        time_and_log_metrics(calibrate_disk_read, calibration_file, calibration_disk_chunk_bytes,
+                    r=0, b='854 Calibration: disk read', s=scenario, l=l)
+    finally:
+        try:
+            os.remove(calibration_file)
+        except OSError:
+            pass
+
+def no_setup(con, venv_location):
+    return ()
+
+# benchmark -> (snapshot, step function, setup function). The setup runs untimed in the child before the step,
+# and returns the arguments for the step after con, since nothing carries over from earlier steps
+isolated_steps = {
+    '004 Group by queries': ('group_by', group_by_queries, no_setup),
+    '005 Export group by results to Pandas': ('group_by', export_group_by_to_pandas, no_setup),
+    '006 Scan and aggregate over Pandas df': ('group_by', read_pandas, lambda con, venv_location: (con.execute(f"select * from {group_by_result_tables[-1]}").fetch_df(),)),
+    '007 Export group by results to Parquet': ('group_by', export_group_by_to_parquet, lambda con, venv_location: (venv_location,)),
+    '008 Scan and aggregate over Parquet file': ('group_by', read_parquet, lambda con, venv_location: (export_group_by_to_parquet(con, venv_location),)),
+    '009 Export group by results to Arrow': ('group_by', export_group_by_to_arrow, no_setup),
+    '010 Scan and aggregate over Arrow df': ('group_by', read_arrow, lambda con, venv_location: (export_group_by_to_arrow(con),)),
+    '013 Join queries': ('join', join_queries, no_setup),
+    '014 Export join results to Pandas': ('join', export_join_results_to_pandas, no_setup),
+    '015 Export join results to Arrow': ('join', export_join_to_arrow, no_setup),
+    '016 Export join results to Parquet': ('join', export_join_to_parquet, lambda con, venv_location: (venv_location,)),
+}
+arrow_isolated_steps = ['009 Export group by results to Arrow', '010 Scan and aggregate over Arrow df', '015 Export join results to Arrow']
+isolated_step_result_prefix = 'ISOLATED_STEP_RESULT '
+
+def get_snapshot_file(db_file, snapshot):
+    return db_file[:-len('.duckdb')] + f'_{snapshot}_snapshot.duckdb'
+
+def save_snapshot(con, db_file, snapshot):
+    """Checkpoint and close con, then copy its database file for the isolated steps to start from"""
+    con.execute("CHECKPOINT").fetchall()
+    con.close()
+    shutil.copyfile(db_file, get_snapshot_file(db_file, snapshot))
 
-            time_and_log(export_join_results_to_pandas, con,
-                        r=i, b='014 Export join results to Pandas', s=scenario, l=logger)
+def run_step_in_this_process(benchmark, db_file):
+    """Child side of run_step_in_child_process. Returns the time and metrics of the step"""
+    global phase_times
+    venv_location = str(Path(sys.executable).parent.parent)
+    snapshot, step, setup = isolated_steps[benchmark]
+    con = duckdb.connect(db_file)
+    temp_dir = get_temp_directory(venv_location)
+    Path(temp_dir).mkdir(parents=True, exist_ok=True)
+    con.execute(f"pragma temp_directory='{temp_dir}'").fetchall()
+    step_args = setup(con, venv_location)
+    gc.collect()
+
+    phase_times = {}
+    with PeakMemoryTracker() as tracker:
+        start_time = time.perf_counter()
+        step(con, *step_args)
+        end_time = time.perf_counter()
+    metrics = dict(phase_times)
+    if tracker.peak_rss_bytes is not None:
+        metrics.update({'start_rss_bytes': tracker.start_rss_bytes, 'peak_rss_bytes': tracker.peak_rss_bytes, 'rss_growth_bytes': tracker.rss_growth_bytes})
+    # Includes the setup and the import of duckdb, but catches peaks between two samples of the tracker
+    high_water_mark_bytes = get_high_water_mark_bytes()
+    if high_water_mark_bytes is not None:
+        metrics['child_max_rss_bytes'] = high_water_mark_bytes
+    con.close()
+    return {'time': end_time - start_time, 'metrics': metrics}
+
+def run_step_in_child_process(benchmark, snapshot_file, db_file):
+    """Copy the snapshot to db_file and run one step on it in a new interpreter.
+    Returns the time and metrics reported by the child. Raises if the child fails or is killed (for example out of memory)"""
+    delete_database(db_file[:-len('.duckdb')])
+    shutil.copyfile(snapshot_file, db_file)
+    with open(benchmark_script_file, 'r') as script_file:
+        python_script = script_file.read()
+    env = {**os.environ, 'DUCKDB_BENCHMARK_ISOLATED_STEP': benchmark, 'DUCKDB_BENCHMARK_ISOLATED_DATABASE': db_file}
+    child = subprocess.Popen([sys.executable, '-c', python_script], stdout=subprocess.PIPE, text=True, env=env)
+    output, _ = child.communicate()
+    if child.returncode != 0:
+        raise Exception(f'{benchmark} exited with {child.returncode}')
+    result_lines = [line for line in output.splitlines() if line.startswith(isolated_step_result_prefix)]
+    return json.loads(result_lines[-1][len(isolated_step_result_prefix):])
+
+# In a child process started by run_step_in_child_process, run that one step and skip everything below
+if os.environ.get('DUCKDB_BENCHMARK_ISOLATED_STEP'):
+    isolated_step_result = run_step_in_this_process(os.environ['DUCKDB_BENCHMARK_ISOLATED_STEP'], os.environ['DUCKDB_BENCHMARK_ISOLATED_DATABASE'])
+    print(isolated_step_result_prefix + json.dumps(isolated_step_result), flush=True)
+    sys.exit(0)
 
-            # Skip pyarrow tests on version 0.2.7-0.3.0 since numpy wouldn't compile correctly
-            if not duckdb_version in versions_without_pyarrow: 
-                time_and_log(export_join_to_arrow, con,
-                        r=i, b='015 Export join results to Arrow', s=scenario, l=logger)
+# This needs to match the filename in the calling loop
+logger = SQLiteLogger(benchmark_log_file, delete_file=False)
 
-            time_and_log(export_join_to_parquet, con, venv_location, 
-                        r=i, b='016 Export join results to Parquet', s=scenario, l=logger)
+if record_calibration and 'start' in calibration_points:
+    try:
+        run_calibration(str(Path(sys.executable).parent.parent), 'start', logger)
+    except Exception as err:
+        import traceback
+        print("ERROR in calibration")
+        print(err)
+        print(traceback.print_exc())
 
-        except Exception as err:
-            import traceback
-            print("ERROR in duckdb_version",duckdb_version)
-            print(err)
-            print(traceback.print_exc())
-        finally:
-            con.close()
+if test_performance:
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    for i in repeat_ids:
+        for schema in get_schema_variants(duckdb_version):
+            try:
+                scenario = make_scenario(duckdb_version, schema=schema)
+                venv_location = str(Path(sys.executable).parent.parent)
+                con = connect_to_duckdb(venv_location, duckdb_version)
+            
+                time_and_log(pandas_test, con, 
+                            r=i, b='001 Query pandas', s=scenario, l=logger)
+
+                csv_file = str(Path(venv_location).parent) + '/_data/G1_1e7_1e2_0_0.csv'
+                time_and_log(ingest_group_by_csv, con, csv_file, duckdb_version, versions_without_enums, schema,
+                            r=i, b='002 Create table from csv', s=scenario, l=logger)
+                if record_storage_footprint:
+                    log_storage_footprint(con, 'varchar',
+                                r=i, b='002 Create table from csv', s=scenario, l=logger)
+            
+                if schema == 'enum':
+                    time_and_log(convert_to_enums_group_by, con, duckdb_version,
+                                r=i, b='003 Convert to Enums', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'enum',
+                                    r=i, b='003 Convert to Enums', s=scenario, l=logger)
+                elif schema == 'integer':
+                    time_and_log(convert_to_integers_group_by, con,
+                                r=i, b='003.2 Convert to integer ids', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'integer',
+                                    r=i, b='003.2 Convert to integer ids', s=scenario, l=logger)
+
+                time_and_log(group_by_queries, con,
+                            r=i, b='004 Group by queries', s=scenario, l=logger)
+
+                pandas_df = time_and_log(export_group_by_to_pandas, con,
+                            r=i, b='005 Export group by results to Pandas', s=scenario, l=logger)
+
+                time_and_log(read_pandas, con, pandas_df,
+                            r=i, b='006 Scan and aggregate over Pandas df', s=scenario, l=logger)
+
+                parquet_file = time_and_log(export_group_by_to_parquet, con, venv_location,
+                            r=i, b='007 Export group by results to Parquet', s=scenario, l=logger)
+
+                time_and_log(read_parquet, con, parquet_file,
+                            r=i, b='008 Scan and aggregate over Parquet file', s=scenario, l=logger)
+
+                # Skip pyarrow tests on version 0.2.7-0.3.0 since numpy wouldn't compile correctly on M1 Mac
+                if not duckdb_version in versions_without_pyarrow: 
+                    import pyarrow
+                    arrow_df = time_and_log(export_group_by_to_arrow, con,
+                            r=i, b='009 Export group by results to Arrow', s=scenario, l=logger)
+                
+                    time_and_log(read_arrow, con, arrow_df,
+                            r=i, b='010 Scan and aggregate over Arrow df', s=scenario, l=logger)
+
+                x_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_NA_0_0.csv'
+                small_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_1e1_0_0.csv'
+                medium_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_1e4_0_0.csv'
+                big_csv = str(Path(venv_location).parent) + '/_data/J1_1e7_1e7_0_0.csv'
+                time_and_log(ingest_join_csvs, con, x_csv, small_csv, medium_csv, big_csv, duckdb_version, versions_without_enums, schema,
+                            r=i, b='011 Create tables from csvs joins', s=scenario, l=logger)
+                if record_storage_footprint:
+                    log_storage_footprint(con, 'varchar',
+                                r=i, b='011 Create tables from csvs joins', s=scenario, l=logger)
+
+                if schema == 'enum':
+                    time_and_log(convert_to_enums_joins, con,
+                            r=i, b='012 Convert to Enums for joins', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'enum',
+                                    r=i, b='012 Convert to Enums for joins', s=scenario, l=logger)
+                elif schema == 'integer':
+                    time_and_log(convert_to_integers_joins, con,
+                            r=i, b='012.2 Convert to integer ids for joins', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'integer',
+                                    r=i, b='012.2 Convert to integer ids for joins', s=scenario, l=logger)
+
+                time_and_log(join_queries, con,
+                            r=i, b='013 Join queries', s=scenario, l=logger)
+
+                time_and_log(export_join_results_to_pandas, con,
+                            r=i, b='014 Export join results to Pandas', s=scenario, l=logger)
+
+                # Skip pyarrow tests on version 0.2.7-0.3.0 since numpy wouldn't compile correctly
+                if not duckdb_version in versions_without_pyarrow: 
+                    time_and_log(export_join_to_arrow, con,
+                            r=i, b='015 Export join results to Arrow', s=scenario, l=logger)
+
+                time_and_log(export_join_to_parquet, con, venv_location, 
+                            r=i, b='016 Export join results to Parquet', s=scenario, l=logger)
+
+            except Exception as err:
+                import traceback
+                print("ERROR in duckdb_version",duckdb_version, 'schema', schema)
+                print(err)
+                print(traceback.print_exc())
+            finally:
+                con.close()
 
 if test_window_performance:
-    for i in range(repeat):
+    for i in repeat_ids:
         try:
             duckdb_version, scenario = get_duckdb_version_and_scenario()
             venv_location = str(Path(sys.executable).parent.parent)
@@ -759,33 +2030,65 @@ if test_scale:
             str(Path(venv_location).parent) + '/_data/G1_1e8_1e2_0_0.csv',
             str(Path(venv_location).parent) + '/_data/G1_1e9_1e2_0_0.csv'
         ]
-    for csv_file in csv_files:
-        try:
-            duckdb_version, scenario = get_duckdb_version_and_scenario()
-            venv_location = str(Path(sys.executable).parent.parent)
-            con = connect_to_duckdb(venv_location, duckdb_version)
-            row_count = csv_file.split('/')[-1].split('_')[1]
-            scenario = json.dumps({'duckdb_version':duckdb_version, "row_count":row_count})
-
-            time_and_log(ingest_group_by_csv, con, csv_file, duckdb_version, versions_without_enums,
-                        r=i, b='101 Group By Scale test: Create table from csv', s=scenario, l=logger)
+    for schema in get_schema_variants(duckdb_version):
+        for csv_file in csv_files:
+            try:
+                con = connect_to_duckdb(venv_location, duckdb_version)
+                row_count = csv_file.split('/')[-1].split('_')[1]
+                scenario = make_scenario(duckdb_version, row_count=row_count, schema=schema)
+
+                time_and_log(ingest_group_by_csv, con, csv_file, duckdb_version, versions_without_enums, schema,
+                            r=i, b='101 Group By Scale test: Create table from csv', s=scenario, l=logger)
+                if record_storage_footprint:
+                    log_storage_footprint(con, 'varchar',
+                                r=i, b='101 Group By Scale test: Create table from csv', s=scenario, l=logger)
             
-            if duckdb_version not in versions_without_enums:
-                time_and_log(convert_to_enums_group_by, con, duckdb_version,
-                            r=i, b='102 Group By Scale test: Convert to Enums', s=scenario, l=logger)
-
-            time_and_log(group_by_queries, con,
-                        r=i, b='103 Group By Scale test: Group by queries', s=scenario, l=logger)
+                if schema == 'enum':
+                    time_and_log(convert_to_enums_group_by, con, duckdb_version,
+                                r=i, b='102 Group By Scale test: Convert to Enums', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'enum',
+                                    r=i, b='102 Group By Scale test: Convert to Enums', s=scenario, l=logger)
+                elif schema == 'integer':
+                    time_and_log(convert_to_integers_group_by, con,
+                                r=i, b='102.2 Group By Scale test: Convert to integer ids', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'integer',
+                                    r=i, b='102.2 Group By Scale test: Convert to integer ids', s=scenario, l=logger)
+
+                time_and_log(group_by_queries, con,
+                            r=i, b='103 Group By Scale test: Group by queries', s=scenario, l=logger)
+
+                for family in scale_query_families:
+                    benchmark, select_queries = group_by_query_families[family]
+                    # A family that runs out of memory or disk does not stop the others
+                    try:
+                        time_and_log(query_family_queries, con, select_queries,
+                                    r=i, b=benchmark, s=scenario, l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, benchmark, 'schema', schema, 'row_count', row_count)
+                        print(err)
+                    drop_query_family_results(con, select_queries)
+
+                if test_reopen and get_database_file(venv_location, duckdb_version) != ':memory:':
+                    con.close()
+                    # A reopen or WAL replay error does not stop the larger scale runs
+                    try:
+                        con = run_reopen_benchmarks(get_database_file(venv_location, duckdb_version), 'x', group_by_select_queries[0],
+                                    r=i, s=make_scenario(duckdb_version, row_count=row_count, schema=schema, suite='group_by'), l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, 'reopen', 'schema', schema, 'row_count', row_count)
+                        print(err)
         
-        except Exception as err:
-            import traceback
-            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
-            print(err)
-            print(traceback.print_exc())
-            # No need to try a larger file if the other failed already
-            break
-        finally:
-            con.close()
+            except Exception as err:
+                import traceback
+                print("ERROR in duckdb_version", duckdb_version, 'schema', schema, 'row_count', row_count)
+                print(err)
+                print(traceback.print_exc())
+                # No need to try a larger file if the other failed already
+                break
+            finally:
+                con.close()
 
     # Join - see if we OOM!
     join_csv_files = [
@@ -802,27 +2105,391 @@ if test_scale:
             'big_csv': str(Path(venv_location).parent) + '/_data/J1_1e9_1e9_0_0.csv',
         },
     ]
-    for csv_file_dict in join_csv_files:
+    for schema in get_schema_variants(duckdb_version):
+        for csv_file_dict in join_csv_files:
+            try:
+                con = connect_to_duckdb(venv_location, duckdb_version)
+                x_csv = csv_file_dict['x_csv']
+                small_csv = csv_file_dict['small_csv']
+                medium_csv = csv_file_dict['medium_csv']
+                big_csv = csv_file_dict['big_csv']
+
+                row_count = x_csv.split('/')[-1].split('_')[1]
+                scenario = make_scenario(duckdb_version, row_count=row_count, schema=schema)
+
+                time_and_log(ingest_join_csvs, con, x_csv, small_csv, medium_csv, big_csv, duckdb_version, versions_without_enums, schema,
+                            r=i, b='201 Join Scale test: Create tables from csvs joins', s=scenario, l=logger)
+                if record_storage_footprint:
+                    log_storage_footprint(con, 'varchar',
+                                r=i, b='201 Join Scale test: Create tables from csvs joins', s=scenario, l=logger)
+
+                if schema == 'enum':
+                    time_and_log(convert_to_enums_joins, con,
+                            r=i, b='202 Join Scale test: Convert to Enums for joins', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'enum',
+                                    r=i, b='202 Join Scale test: Convert to Enums for joins', s=scenario, l=logger)
+                elif schema == 'integer':
+                    time_and_log(convert_to_integers_joins, con,
+                            r=i, b='202.2 Join Scale test: Convert to integer ids for joins', s=scenario, l=logger)
+                    if record_storage_footprint:
+                        log_storage_footprint(con, 'integer',
+                                    r=i, b='202.2 Join Scale test: Convert to integer ids for joins', s=scenario, l=logger)
+
+                time_and_log(join_queries, con,
+                            r=i, b='203 Join Scale test: Join queries', s=scenario, l=logger)
+
+                for family in scale_query_families:
+                    benchmark, select_queries = join_query_families[family]
+                    # A family that runs out of memory or disk does not stop the others
+                    try:
+                        time_and_log(query_family_queries, con, select_queries,
+                                    r=i, b=benchmark, s=scenario, l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, benchmark, 'schema', schema, 'row_count', row_count)
+                        print(err)
+                    drop_query_family_results(con, select_queries)
+
+                if test_reopen and get_database_file(venv_location, duckdb_version) != ':memory:':
+                    con.close()
+                    # A reopen or WAL replay error does not stop the larger scale runs
+                    try:
+                        con = run_reopen_benchmarks(get_database_file(venv_location, duckdb_version), 'x', "SELECT count(*), sum(v2) FROM ans5",
+                                    r=i, s=make_scenario(duckdb_version, row_count=row_count, schema=schema, suite='join'), l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, 'reopen', 'schema', schema, 'row_count', row_count)
+                        print(err)
+        
+            except Exception as err:
+                import traceback
+                print("ERROR in duckdb_version", duckdb_version, 'schema', schema, 'row_count', row_count)
+                print(err)
+                print(traceback.print_exc())
+                # No need to try a larger file if the other failed already
+                break
+            finally:
+                con.close()
+
+if test_streaming_export:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    for row_count in streaming_export_row_counts:
         try:
             con = connect_to_duckdb(venv_location, duckdb_version)
-            x_csv = csv_file_dict['x_csv']
-            small_csv = csv_file_dict['small_csv']
-            medium_csv = csv_file_dict['medium_csv']
-            big_csv = csv_file_dict['big_csv']
 
-            row_count = x_csv.split('/')[-1].split('_')[1]
-            scenario = json.dumps({'duckdb_version':duckdb_version, "row_count":row_count})
+            # Build the group by and join results once, then only time the exports
+            ingest_group_by_csv(con, get_group_by_csv(venv_location, row_count), duckdb_version, versions_without_enums)
+            if duckdb_version not in versions_without_enums:
+                convert_to_enums_group_by(con, duckdb_version)
+            group_by_queries(con)
+
+            join_csvs = get_join_csvs(venv_location, row_count)
+            ingest_join_csvs(con, join_csvs['x_csv'], join_csvs['small_csv'], join_csvs['medium_csv'], join_csvs['big_csv'], duckdb_version, versions_without_enums)
+            if duckdb_version not in versions_without_enums:
+                convert_to_enums_joins(con)
+            join_queries(con)
+
+            for i in repeat_ids:
+                for result_set, result_tables in [('group_by', group_by_result_tables), ('join', join_result_tables)]:
+                    if duckdb_version not in versions_without_record_batch_reader:
+                        for batch_size in record_batch_sizes:
+                            gc.collect()
+                            scenario = make_scenario(duckdb_version, row_count=row_count, result_set=result_set, batch_size=batch_size)
+                            time_and_log_metrics(stream_export_record_batches, con, result_tables, batch_size,
+                                        r=i, b='401 Streaming export: Record batch reader', s=scenario, l=logger)
+
+                    scenario = make_scenario(duckdb_version, row_count=row_count, result_set=result_set)
+                    gc.collect()
+                    time_and_log_metrics(stream_export_df_chunks, con, result_tables,
+                                r=i, b='402 Streaming export: Pandas df chunks', s=scenario, l=logger)
+                    gc.collect()
+                    time_and_log_metrics(export_numpy, con, result_tables,
+                                r=i, b='403 Streaming export: NumPy', s=scenario, l=logger)
+                    gc.collect()
+                    time_and_log_metrics(export_full_df, con, result_tables,
+                                r=i, b='404 Streaming export: Full Pandas df baseline', s=scenario, l=logger)
+                    if duckdb_version not in versions_without_pyarrow:
+                        gc.collect()
+                        time_and_log_metrics(export_full_arrow, con, result_tables,
+                                    r=i, b='405 Streaming export: Full Arrow table baseline', s=scenario, l=logger)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
+            print(err)
+            print(traceback.print_exc())
+            # No need to try a larger file if the other failed already
+            break
+        finally:
+            con.close()
 
-            time_and_log(ingest_join_csvs, con, x_csv, small_csv, medium_csv, big_csv, duckdb_version, versions_without_enums,
-                        r=i, b='201 Join Scale test: Create tables from csvs joins', s=scenario, l=logger)
+if test_parquet_matrix:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    parquet_matrix_path = str(Path(venv_location).parent) + '/_data/parquet_matrix'
+    for row_count in parquet_matrix_row_counts:
+        try:
+            con = connect_to_duckdb(venv_location, duckdb_version)
 
+            ingest_group_by_csv(con, get_group_by_csv(venv_location, row_count), duckdb_version, versions_without_enums)
             if duckdb_version not in versions_without_enums:
-                time_and_log(convert_to_enums_joins, con,
-                        r=i, b='202 Join Scale test: Convert to Enums for joins', s=scenario, l=logger)
+                convert_to_enums_group_by(con, duckdb_version)
+            # Sort by id6 so that the min/max statistics of each row group are selective
+            con.execute("CREATE TABLE x_sorted AS SELECT * FROM x ORDER BY id6").fetchall()
+            # Select roughly 1% of the rows
+            # Integer division in Python, since DuckDB only has the // operator from 0.8.0
+            id6_threshold = con.execute("SELECT max(id6) FROM x").fetchall()[0][0] // 100
+
+            for i in repeat_ids:
+                for codec in parquet_codecs:
+                    for row_group_size in parquet_row_group_sizes:
+                        # Older versions do not support every codec, so keep going with the other settings
+                        try:
+                            scenario = make_scenario(duckdb_version, row_count=row_count, codec=codec, row_group_size=row_group_size)
+                            shutil.rmtree(parquet_matrix_path, ignore_errors=True)
+                            Path(parquet_matrix_path).mkdir(parents=True)
+                            parquet_file = parquet_matrix_path + '/x_sorted.parquet'
+                            parquet_glob_directory = parquet_matrix_path + '/x_parts'
+
+                            time_and_log_metrics(write_parquet_with_settings, con, 'x_sorted', parquet_file, codec, row_group_size,
+                                        r=i, b='501 Parquet matrix: Write table', s=scenario, l=logger)
+                            time_and_log_metrics(write_parquet_files_with_settings, con, 'x_sorted', parquet_glob_directory, codec, row_group_size, parquet_glob_file_count,
+                                        r=i, b='502 Parquet matrix: Write table to multiple files', s=scenario, l=logger)
+
+                            time_and_log(scan_parquet_all_columns, con, parquet_file,
+                                        r=i, b='503 Parquet matrix: Scan all columns', s=scenario, l=logger)
+                            time_and_log(scan_parquet_projection, con, parquet_file,
+                                        r=i, b='504 Parquet matrix: Scan one column', s=scenario, l=logger)
+                            time_and_log(scan_parquet_selective_filter, con, parquet_file, id6_threshold,
+                                        r=i, b='505 Parquet matrix: Scan with selective filter', s=scenario, l=logger)
+                            time_and_log(scan_parquet_projection, con, parquet_glob_directory + '/*.parquet',
+                                        r=i, b='506 Parquet matrix: Scan one column over multi-file glob', s=scenario, l=logger)
+                        except Exception as err:
+                            print("ERROR in duckdb_version", duckdb_version, 'codec', codec, 'row_group_size', row_group_size)
+                            print(err)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
+            print(err)
+            print(traceback.print_exc())
+            # No need to try a larger file if the other failed already
+            break
+        finally:
+            con.close()
+            shutil.rmtree(parquet_matrix_path, ignore_errors=True)
+
+if test_csv_matrix:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    csv_matrix_path = str(Path(venv_location).parent) + '/_data/csv_matrix'
+    for row_count in csv_matrix_row_counts:
+        try:
+            con = connect_to_duckdb(venv_location, duckdb_version)
+            shutil.rmtree(csv_matrix_path, ignore_errors=True)
+
+            # Write every layout once, untimed, from the same G1 and J1 data
+            csv_layouts = []
+            for table_name, table_columns in csv_matrix_tables.items():
+                source_csv = get_csv_matrix_source(venv_location, table_name, row_count)
+                con.execute("DROP TABLE IF EXISTS csv_matrix_source").fetchall()
+                con.execute(f"CREATE TABLE csv_matrix_source({table_columns})").fetchall()
+                con.execute(f"COPY csv_matrix_source FROM '{source_csv}' (HEADER TRUE)").fetchall()
+                source_row_count = con.execute("SELECT count(*) FROM csv_matrix_source").fetchall()[0][0]
+                for compression in csv_matrix_compressions:
+                    for file_count in csv_matrix_file_counts:
+                        # Older versions cannot write (or read) every compression, so keep going with the other layouts
+                        try:
+                            csv_glob, file_size_bytes = write_csv_matrix_files(con, 'csv_matrix_source', f'{csv_matrix_path}/{table_name}_{compression}_{file_count}',
+                                                                               compression, file_count, source_row_count)
+                            # Throughput is over the uncompressed csv, so that compressed and uncompressed layouts compare
+                            csv_layouts.append((table_name, compression, file_count, csv_glob, source_row_count, os.path.getsize(source_csv), file_size_bytes))
+                        except Exception as err:
+                            print("ERROR in duckdb_version", duckdb_version, 'writing', table_name, 'compression', compression, 'file_count', file_count)
+                            print(err)
+                con.execute("DROP TABLE csv_matrix_source").fetchall()
+
+            for i in repeat_ids:
+                for table_name, compression, file_count, csv_glob, source_row_count, csv_bytes, file_size_bytes in csv_layouts:
+                    try:
+                        scenario = make_scenario(duckdb_version, row_count=row_count, table=table_name, compression=compression, file_count=file_count)
+                        create_csv_matrix_target(con, csv_matrix_tables[table_name])
+                        gc.collect()
+                        time_and_log_metrics(read_csv_explicit_schema, con, csv_glob, source_row_count, csv_bytes, file_size_bytes,
+                                    r=i, b='751 CSV matrix: Read with explicit schema', s=scenario, l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, table_name, 'compression', compression, 'file_count', file_count)
+                        print(err)
+                    # 752 includes the sniffing that 753 times on its own.
+                    # Older versions reject some sample sizes, so keep going with the others
+                    for sample_size in csv_matrix_sample_sizes:
+                        try:
+                            scenario = make_scenario(duckdb_version, row_count=row_count, table=table_name, compression=compression, file_count=file_count, sample_size=sample_size)
+                            create_csv_matrix_target(con, None)
+                            gc.collect()
+                            time_and_log_metrics(read_csv_auto_detect, con, csv_glob, sample_size, source_row_count, csv_bytes, file_size_bytes,
+                                        r=i, b='752 CSV matrix: Read with auto-detect', s=scenario, l=logger)
+                            time_and_log(sniff_csv, con, csv_glob, sample_size,
+                                        r=i, b='753 CSV matrix: Sniff only', s=scenario, l=logger)
+                        except Exception as err:
+                            print("ERROR in duckdb_version", duckdb_version, table_name, 'compression', compression, 'file_count', file_count, 'sample_size', sample_size)
+                            print(err)
+                create_csv_matrix_target(con, None)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
+            print(err)
+            print(traceback.print_exc())
+            # No need to try a larger file if the other failed already
+            break
+        finally:
+            con.close()
+            shutil.rmtree(csv_matrix_path, ignore_errors=True)
+
+if test_arrow_ipc:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    arrow_ipc_path = str(Path(venv_location).parent) + '/_data/arrow_ipc'
+    for row_count in arrow_ipc_row_counts:
+        if duckdb_version in versions_without_record_batch_reader:
+            break
+        try:
+            con = connect_to_duckdb(venv_location, duckdb_version)
+
+            # Build the group by and join results once, then only time writing and scanning the IPC files
+            ingest_group_by_csv(con, get_group_by_csv(venv_location, row_count), duckdb_version, versions_without_enums)
+            if duckdb_version not in versions_without_enums:
+                convert_to_enums_group_by(con, duckdb_version)
+            group_by_queries(con)
+
+            join_csvs = get_join_csvs(venv_location, row_count)
+            ingest_join_csvs(con, join_csvs['x_csv'], join_csvs['small_csv'], join_csvs['medium_csv'], join_csvs['big_csv'], duckdb_version, versions_without_enums)
+            if duckdb_version not in versions_without_enums:
+                convert_to_enums_joins(con)
+            join_queries(con)
+
+            result_sets = {'group_by': group_by_result_tables, 'join': join_result_tables}
+            ipc_filters = {result_set: {result_table: get_arrow_ipc_filter(con, result_table) for result_table in result_tables} for result_set, result_tables in result_sets.items()}
+
+            for i in repeat_ids:
+                for result_set, result_tables in result_sets.items():
+                    for compression in arrow_ipc_compressions:
+                        # Older pyarrow versions do not support every compression, so keep going with the others
+                        try:
+                            scenario = make_scenario(duckdb_version, row_count=row_count, result_set=result_set, compression=compression, **get_library_versions())
+                            ipc_directory = arrow_ipc_path + f'/{result_set}_{compression}'
+                            shutil.rmtree(ipc_directory, ignore_errors=True)
+
+                            time_and_log_metrics(write_arrow_ipc, con, result_tables, ipc_directory, compression,
+                                        r=i, b='451 Arrow IPC: Write results to IPC files', s=scenario, l=logger)
+                            gc.collect()
+                            time_and_log_metrics(scan_arrow_ipc_dataset_all_columns, con, ipc_directory, result_tables,
+                                        r=i, b='452 Arrow IPC: Scan memory-mapped dataset', s=scenario, l=logger)
+                            gc.collect()
+                            time_and_log_metrics(scan_arrow_ipc_dataset_filtered, con, ipc_directory, ipc_filters[result_set],
+                                        r=i, b='453 Arrow IPC: Scan memory-mapped dataset with projection and filter', s=scenario, l=logger)
+                            gc.collect()
+                            time_and_log_metrics(scan_arrow_ipc_file_record_batches, con, ipc_directory, result_tables,
+                                        r=i, b='454 Arrow IPC: Scan memory-mapped file record batch reader', s=scenario, l=logger)
+                            gc.collect()
+                            time_and_log_metrics(scan_arrow_ipc_scanner_record_batches, con, ipc_directory, ipc_filters[result_set],
+                                        r=i, b='455 Arrow IPC: Scan dataset record batch reader with projection and filter', s=scenario, l=logger)
+                        except Exception as err:
+                            print("ERROR in duckdb_version", duckdb_version, 'result_set', result_set, 'compression', compression)
+                            print(err)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
+            print(err)
+            print(traceback.print_exc())
+            # No need to try a larger file if the other failed already
+            break
+        finally:
+            con.close()
+            shutil.rmtree(arrow_ipc_path, ignore_errors=True)
+
+if test_concurrency:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    db_file = get_database_file(venv_location, duckdb_version)
+    for row_count in concurrency_row_counts:
+        try:
+            con = connect_to_duckdb(venv_location, duckdb_version)
+
+            ingest_group_by_csv(con, get_group_by_csv(venv_location, row_count), duckdb_version, versions_without_enums)
+            if duckdb_version not in versions_without_enums:
+                convert_to_enums_group_by(con, duckdb_version)
+            id3_values, id6_values = get_concurrency_lookup_values(con)
+
+            for i in repeat_ids:
+                for connection_mode in concurrency_connection_modes:
+                    # Each duckdb.connect(':memory:') is a separate empty database
+                    if connection_mode == 'connection' and db_file == ':memory:':
+                        continue
+                    for concurrency in concurrency_levels:
+                        try:
+                            scenario = make_scenario(duckdb_version, row_count=row_count, concurrency=concurrency, connection_mode=connection_mode,
+                                                     duration_seconds=concurrency_duration_seconds)
+                            start_time = time.perf_counter()
+                            histograms, errors = run_concurrent_query_mix(con, db_file, concurrency, connection_mode, concurrency_duration_seconds,
+                                                                          concurrency_query_mix, id3_values, id6_values)
+                            end_time = time.perf_counter()
+                            log_concurrency_results(histograms, errors, end_time - start_time,
+                                        r=i, b='601 Concurrency: Query mix', s=scenario, l=logger)
+                            print('concurrency', concurrency, connection_mode, histograms['all'].summary())
+                        except Exception as err:
+                            # Older versions can not open the same database file twice in one process
+                            print("ERROR in duckdb_version", duckdb_version, 'concurrency', concurrency, 'connection_mode', connection_mode)
+                            print(err)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
+            print(err)
+            print(traceback.print_exc())
+            # No need to try a larger file if the other failed already
+            break
+        finally:
+            con.close()
+
+if test_small_query_latency:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    for row_count in small_query_row_counts:
+        try:
+            con = connect_to_duckdb(venv_location, duckdb_version)
+
+            ingest_group_by_csv(con, get_group_by_csv(venv_location, row_count), duckdb_version, versions_without_enums)
+            if duckdb_version not in versions_without_enums:
+                convert_to_enums_group_by(con, duckdb_version)
+            group_by_queries(con)
+            id3_values, _ = get_concurrency_lookup_values(con)
+            small_query_parameters = {
+                '651 Small query latency: Point lookup': id3_values,
+                '652 Small query latency: Tiny aggregate': list(range(1, 101)),
+                '653 Small query latency: Metadata query': ['x', 'ans01', 'ans10', 'not_a_table'],
+            }
+
+            for i in repeat_ids:
+                for benchmark, query in small_queries.items():
+                    for method in small_query_methods:
+                        try:
+                            scenario = make_scenario(duckdb_version, row_count=row_count, method=method, iterations=small_query_iterations)
+                            start_time = time.perf_counter()
+                            histogram = run_small_query_latency(con, query, small_query_parameters[benchmark], method,
+                                                                small_query_iterations, small_query_warmup_iterations)
+                            end_time = time.perf_counter()
+                            log_latency_histogram(histogram, end_time - start_time,
+                                        r=i, b=benchmark, s=scenario, l=logger)
+                            if method == 'executemany':
+                                # Its percentiles are per batch, so they do not compare directly with the other methods
+                                logger.log_metrics([(i, benchmark, scenario, 'batch_size', executemany_batch_size)])
+                        except Exception as err:
+                            print("ERROR in duckdb_version", duckdb_version, benchmark, 'method', method)
+                            print(err)
 
-            time_and_log(join_queries, con,
-                        r=i, b='203 Join Scale test: Join queries', s=scenario, l=logger)
-        
         except Exception as err:
             import traceback
             print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
@@ -833,5 +2500,280 @@ if test_scale:
         finally:
             con.close()
 
-db_filepath = venv_location+'/'+duckdb_version.replace('.','_')
-delete_database(db_filepath)
\ No newline at end of file
+if test_ingestion:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    ingestion_parquet_file = str(Path(venv_location).parent) + '/_data/ingestion_source.parquet'
+    for row_count in ingestion_row_counts:
+        try:
+            con = connect_to_duckdb(venv_location, duckdb_version)
+            csv_file = get_group_by_csv(venv_location, row_count)
+
+            # Prepare the same G1 data in every source format before timing anything
+            create_ingestion_target(con)
+            con.execute(f"COPY ingestion_target FROM '{csv_file}' (AUTO_DETECT TRUE)").fetchall()
+            source_row_count = con.execute("SELECT count(*) FROM ingestion_target").fetchall()[0][0]
+            con.execute(f"COPY ingestion_target TO '{ingestion_parquet_file}' (FORMAT PARQUET)").fetchall()
+            pandas_df = con.execute("SELECT * FROM ingestion_target").fetch_df()
+            executemany_rows = list(pandas_df.head(ingestion_executemany_row_limit).itertuples(index=False, name=None))
+            if duckdb_version not in versions_without_pyarrow:
+                arrow_table = con.execute("SELECT * FROM ingestion_target").fetch_arrow_table()
+
+            for i in repeat_ids:
+                ingestion_runs = []
+                for batch_size in ingestion_executemany_batch_sizes:
+                    ingestion_runs.append(('701 Ingestion: executemany', batch_size, ingest_executemany, [executemany_rows, batch_size]))
+                for batch_size in ingestion_batch_sizes:
+                    ingestion_runs.append(('702 Ingestion: Insert from Pandas df', batch_size, ingest_pandas_batches, [pandas_df, batch_size]))
+                    if duckdb_version not in versions_without_pyarrow:
+                        ingestion_runs.append(('703 Ingestion: Insert from Arrow table', batch_size, ingest_arrow_batches, [arrow_table, batch_size]))
+                        ingestion_runs.append(('704 Ingestion: Insert from Arrow record batch reader', batch_size, ingest_record_batch_reader, [arrow_table, batch_size]))
+                ingestion_runs.append(('705 Ingestion: COPY from csv', None, ingest_csv_copy, [csv_file, source_row_count]))
+                ingestion_runs.append(('706 Ingestion: Insert from Parquet file', None, ingest_parquet_insert, [ingestion_parquet_file, source_row_count]))
+
+                for benchmark, batch_size, ingestion_function, ingestion_args in ingestion_runs:
+                    try:
+                        create_ingestion_target(con)
+                        gc.collect()
+                        scenario = make_scenario(duckdb_version, row_count=row_count, batch_size=batch_size)
+                        time_and_log_metrics(ingestion_function, con, *ingestion_args,
+                                    r=i, b=benchmark, s=scenario, l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, benchmark, 'batch_size', batch_size)
+                        print(err)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version, 'row_count', row_count)
+            print(err)
+            print(traceback.print_exc())
+            # No need to try a larger file if the other failed already
+            break
+        finally:
+            con.close()
+            try:
+                os.remove(ingestion_parquet_file)
+            except OSError:
+                pass
+
+if test_window_sweep:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    try:
+        con = connect_to_duckdb(venv_location, duckdb_version)
+        big_csv = get_join_csvs(venv_location, '1e7')['big_csv']
+        ingest_windowing_csv(con, big_csv)
+
+        for row_count in window_sweep_row_counts:
+            create_windowing_sweep_table(con, int(float(row_count)), window_sweep_partitions)
+            partition_cardinalities = {partition: get_window_sweep_partition_cardinality(con, partition) for partition in window_sweep_partitions}
+
+            for i in repeat_ids:
+                for function, partition, frame_type, frame_size in generate_window_sweep(window_sweep_functions, window_sweep_partitions, window_sweep_frames):
+                    if frame_type == 'range' and duckdb_version in versions_without_window_ranges:
+                        continue
+                    if function == 'quantile' and duckdb_version in versions_failing_on_quantiles:
+                        continue
+                    if function == 'quantile' and partition is None and duckdb_version in versions_failing_on_quantiles_full_dataset:
+                        continue
+                    scenario = make_scenario(duckdb_version, row_count=row_count, function=function, partition=partition,
+                                             partition_cardinality=partition_cardinalities[partition], frame_type=frame_type, frame_size=frame_size)
+                    try:
+                        time_and_log(window_sweep, con, build_window_sweep_query(function, partition, frame_type, frame_size),
+                                    r=i, b=f'320 Windowing sweep: {function}', s=scenario, l=logger)
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, scenario)
+                        print(err)
+
+    except Exception as err:
+        import traceback
+        print("ERROR in duckdb_version", duckdb_version)
+        print(err)
+        print(traceback.print_exc())
+    finally:
+        con.close()
+
+if test_library_sweep:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    try:
+        con = connect_to_duckdb(venv_location, duckdb_version)
+
+        # Build the group by results once, then only time the exports and scans
+        ingest_group_by_csv(con, get_group_by_csv(venv_location, library_sweep_row_count), duckdb_version, versions_without_enums)
+        if duckdb_version not in versions_without_enums:
+            convert_to_enums_group_by(con, duckdb_version)
+        group_by_queries(con)
+
+        for i in repeat_ids:
+            for dtype_backend in get_pandas_dtype_backends(duckdb_version):
+                scenario = make_scenario(duckdb_version, row_count=library_sweep_row_count, dtype_backend=dtype_backend, **get_library_versions())
+                try:
+                    gc.collect()
+                    time_and_log_metrics(export_pandas_with_backend, con, group_by_result_tables, dtype_backend,
+                                r=i, b='661 Library sweep: Export group by results to Pandas', s=scenario, l=logger)
+                    # The 10 million row result of the last group by query
+                    pandas_df = fetch_pandas_with_backend(con, f"select * from {group_by_result_tables[-1]}", dtype_backend)
+                    time_and_log(read_pandas, con, pandas_df,
+                                r=i, b='662 Library sweep: Scan and aggregate over Pandas df', s=scenario, l=logger)
+                    del pandas_df
+                except Exception as err:
+                    print("ERROR in duckdb_version", duckdb_version, scenario)
+                    print(err)
+
+            scenario = make_scenario(duckdb_version, row_count=library_sweep_row_count, **get_library_versions())
+            gc.collect()
+            time_and_log_metrics(export_numpy, con, group_by_result_tables,
+                        r=i, b='663 Library sweep: Export group by results to NumPy', s=scenario, l=logger)
+            if duckdb_version not in versions_without_pyarrow:
+                gc.collect()
+                time_and_log_metrics(export_full_arrow, con, group_by_result_tables,
+                            r=i, b='664 Library sweep: Export group by results to Arrow', s=scenario, l=logger)
+                arrow_df = execute_and_fetch(con, f"select * from {group_by_result_tables[-1]}", 'fetch_arrow_table')
+                time_and_log(read_arrow, con, arrow_df,
+                            r=i, b='665 Library sweep: Scan and aggregate over Arrow table', s=scenario, l=logger)
+                del arrow_df
+
+    except Exception as err:
+        import traceback
+        print("ERROR in duckdb_version", duckdb_version)
+        print(err)
+        print(traceback.print_exc())
+    finally:
+        con.close()
+
+if test_isolated_steps:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    db_file = get_database_file(venv_location, duckdb_version)
+    if db_file == ':memory:':
+        print('Skipping isolated steps, since an in-memory database cannot be shared with a child process')
+    else:
+        try:
+            # Build both snapshots once, untimed, with the first schema variant (enums where supported)
+            schema = get_schema_variants(duckdb_version)[0]
+            con = connect_to_duckdb(venv_location, duckdb_version)
+            ingest_group_by_csv(con, get_group_by_csv(venv_location, isolated_steps_row_count), duckdb_version, versions_without_enums, schema)
+            if schema == 'enum':
+                convert_to_enums_group_by(con, duckdb_version)
+            group_by_queries(con)
+            save_snapshot(con, db_file, 'group_by')
+
+            con = connect_to_duckdb(venv_location, duckdb_version)
+            join_csvs = get_join_csvs(venv_location, isolated_steps_row_count)
+            ingest_join_csvs(con, join_csvs['x_csv'], join_csvs['small_csv'], join_csvs['medium_csv'], join_csvs['big_csv'], duckdb_version, versions_without_enums, schema)
+            if schema == 'enum':
+                convert_to_enums_joins(con)
+            join_queries(con)
+            save_snapshot(con, db_file, 'join')
+
+            scenario = make_scenario(duckdb_version, schema=schema, row_count=isolated_steps_row_count, isolation='process')
+            for i in repeat_ids:
+                for benchmark, (snapshot, step, setup) in isolated_steps.items():
+                    if benchmark in arrow_isolated_steps and duckdb_version in versions_without_pyarrow:
+                        continue
+                    if isolated_steps_to_run and benchmark not in isolated_steps_to_run.split(','):
+                        continue
+                    # A failed or killed step does not stop the others
+                    try:
+                        start_timestamp = time.time()
+                        result = run_step_in_child_process(benchmark, get_snapshot_file(db_file, snapshot), db_file)
+                        logger.log([(i, benchmark, scenario, result['time'])])
+                        metrics = {'start_timestamp_seconds': start_timestamp, **result['metrics']}
+                        logger.log_metrics([(i, benchmark, scenario, metric, value) for metric, value in metrics.items()])
+                    except Exception as err:
+                        print("ERROR in duckdb_version", duckdb_version, benchmark)
+                        print(err)
+
+        except Exception as err:
+            import traceback
+            print("ERROR in duckdb_version", duckdb_version)
+            print(err)
+            print(traceback.print_exc())
+        finally:
+            con.close()
+            for snapshot in ['group_by', 'join']:
+                try:
+                    os.remove(get_snapshot_file(db_file, snapshot))
+                except OSError:
+                    pass
+
+if test_user_workloads:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    data_directory = str(Path(venv_location).parent) + '/_data'
+    try:
+        workload_directories = get_workload_directories(user_workloads_directory)
+    except OSError as err:
+        print('Skipping user workloads, no directory', user_workloads_directory)
+        print(err)
+        workload_directories = []
+    for workload_directory in workload_directories:
+        workload_settings = load_workload_settings(workload_directory)
+        if not is_version_supported(workload_settings, duckdb_version):
+            print('Skipping workload', workload_directory, 'on', duckdb_version)
+            continue
+        for row_count in workload_settings['row_counts']:
+            try:
+                workload = load_workload(workload_directory, get_workload_bindings(workload_settings, data_directory, row_count))
+            except FileNotFoundError as err:
+                print('Skipping workload', workload_directory, 'for row count', row_count)
+                print(err)
+                continue
+            for i in repeat_ids:
+                try:
+                    # A fresh database each repeat, like the built-in suites
+                    con = connect_to_duckdb(venv_location, duckdb_version)
+                except Exception as err:
+                    print("ERROR in duckdb_version", duckdb_version, workload['name'], 'connecting')
+                    print(err)
+                    continue
+                try:
+                    scenario = make_scenario(duckdb_version, workload=workload['name'], row_count=row_count)
+                    if workload['setup']:
+                        time_and_log_metrics(run_user_workload_script, con, workload['setup'],
+                                    r=i, b='951 User workload: setup', s=scenario, l=logger)
+                    for query_name, sql in workload['queries']:
+                        # A query that fails on this version does not stop the others
+                        try:
+                            gc.collect()
+                            time_and_log_metrics(run_user_workload_query, con, sql,
+                                        r=i, b='952 User workload: query', s=make_scenario(duckdb_version, workload=workload['name'], row_count=row_count, query=query_name), l=logger)
+                        except Exception as err:
+                            print("ERROR in duckdb_version", duckdb_version, workload['name'], query_name)
+                            print(err)
+                    run_user_workload_script(con, workload['teardown'])
+                except Exception as err:
+                    import traceback
+                    print("ERROR in duckdb_version", duckdb_version, workload['name'], 'row_count', row_count)
+                    print(err)
+                    print(traceback.print_exc())
+                finally:
+                    con.close()
+
+if test_startup:
+    venv_location = str(Path(sys.executable).parent.parent)
+    duckdb_version, _ = get_duckdb_version_and_scenario()
+    try:
+        run_startup_benchmarks(duckdb_version, startup_iterations, logger)
+    except Exception as err:
+        import traceback
+        print("ERROR in duckdb_version", duckdb_version)
+        print(err)
+        print(traceback.print_exc())
+
+if record_calibration and 'end' in calibration_points:
+    try:
+        run_calibration(str(Path(sys.executable).parent.parent), 'end', logger)
+    except Exception as err:
+        import traceback
+        print("ERROR in calibration")
+        print(err)
+        print(traceback.print_exc())
+
+# Set here too, since a calibration-only call runs none of the test blocks above
+venv_location = str(Path(sys.executable).parent.parent)
+duckdb_version, _ = get_duckdb_version_and_scenario()
+db_file = get_database_file(venv_location, duckdb_version)
+if db_file != ':memory:':
+    delete_database(db_file[:-len('.duckdb')])
\ No newline at end of file
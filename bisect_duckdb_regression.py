@@ -0,0 +1,244 @@
+# Find the DuckDB commit that made one benchmark slower.
+# Drives git bisect over a local DuckDB checkout (the one local_duckdb_source in benchmark_loop_python.py points into).
+# Each candidate commit is checked out into its own worktree and built into a wheel with ccache, so builds after
+# the first one mostly hit the compiler cache. Wheels and timings are cached per commit, so rerunning a bisection
+# (or bisecting another benchmark over the same range) only builds and times the commits that are new.
+# Run from this folder, since benchmark_script.py reads its data from ./_data like in the normal loop.
+
+import glob
+import json
+import math
+import os
+import sqlite3
+import statistics
+import subprocess
+
+# Note, need to run git fetch in the checkout first so that both revisions exist
+duckdb_source_directory = '/Users/alex/Documents/DuckDB/duckdb'
+# Folder of the Python package within each commit. Commits without it are skipped
+python_package_subdirectory = 'tools/pythonpkg'
+bisect_good_revision = 'v1.0.0'
+bisect_bad_revision = 'main'
+
+# The test flag from benchmark_script.py that logs the benchmark, and the benchmark name as logged
+bisect_test = 'test_isolated_steps'
+bisect_benchmark = '013 Join queries'
+# Scenario keys to match when a test logs the benchmark for several scenarios, like {'row_count': '1e7'}
+bisect_scenario_filter = {}
+
+# A commit is bad if its median time is this much slower than the median of the good revision...
+slowdown_threshold = 0.10
+# ...and a one sided Mann-Whitney U test says it is slower at this significance level
+significance_level = 0.01
+initial_sample_count = 5
+# Undecided commits get more samples, in steps of initial_sample_count, up to this many
+max_sample_count = 20
+
+# One venv is reused for every commit, and only the duckdb wheel is swapped
+bisect_venv = './venv_bisect'
+bisect_python = 'python3.9'
+bisect_libraries = ['pandas', 'pyarrow', 'psutil']
+build_directory = './bisect_builds'
+wheel_cache_directory = './bisect_wheels'
+# Not named benchmark_log*.db, so that build_results_warehouse.py does not mix dev builds into the release history
+bisect_log_file = 'bisect_log.db'
+# Worktrees are a full copy of the source. With ccache a rebuild is cheap, so they are removed after each build
+keep_build_directories = False
+
+
+def run_git(*args):
+    return subprocess.run(['git', '-C', duckdb_source_directory, *args], capture_output=True, text=True)
+
+def git(*args):
+    result = run_git(*args)
+    if result.returncode != 0:
+        raise Exception(f"git {' '.join(args)} failed:\n{result.stderr}")
+    return result.stdout.strip()
+
+def create_bisect_venv():
+    if os.path.exists(bisect_venv + '/bin/python'):
+        return
+    subprocess.run([bisect_python, '-m', 'venv', bisect_venv], check=True)
+    subprocess.run([bisect_venv + '/bin/pip3', 'install', *bisect_libraries], check=True)
+    print('Created bisect virtual environment', bisect_venv, flush=True)
+
+def get_build_env(package_directory):
+    """Environment for building with ccache. CCACHE_BASEDIR makes the per commit worktree paths relative,
+    so the same file in two worktrees hits the same cache entry"""
+    env = {
+        **os.environ,
+        'CCACHE_BASEDIR': os.path.abspath(build_directory),
+        'CCACHE_NOHASHDIR': 'true',
+    }
+    if os.path.exists(package_directory + '/setup.py'):
+        # Older setup.py builds compile through setuptools, which calls $CC and $CXX
+        env['CC'] = 'ccache cc'
+        env['CXX'] = 'ccache c++'
+    else:
+        # CMake based builds
+        env['CMAKE_C_COMPILER_LAUNCHER'] = 'ccache'
+        env['CMAKE_CXX_COMPILER_LAUNCHER'] = 'ccache'
+    return env
+
+def build_wheel(commit):
+    """Path to the duckdb wheel for commit, building it if it is not cached. Returns None if the commit does not build"""
+    wheel_directory = os.path.abspath(f'{wheel_cache_directory}/{commit}')
+    cached_wheels = glob.glob(wheel_directory + '/duckdb-*.whl')
+    if cached_wheels:
+        return cached_wheels[0]
+
+    worktree = os.path.abspath(f'{build_directory}/{commit}')
+    if not os.path.exists(worktree):
+        git('worktree', 'add', '--detach', worktree, commit)
+    package_directory = worktree + '/' + python_package_subdirectory
+    try:
+        if not os.path.exists(package_directory):
+            print('No Python package in', commit, flush=True)
+            return None
+        print('Building', commit, flush=True)
+        result = subprocess.run(
+            [bisect_venv + '/bin/pip3', 'wheel', package_directory, '--no-deps', '--wheel-dir', wheel_directory],
+            capture_output=True, text=True, env=get_build_env(package_directory),
+        )
+        if result.returncode != 0:
+            print('Build failed for', commit)
+            print(result.stderr[-5000:], flush=True)
+            return None
+        return glob.glob(wheel_directory + '/duckdb-*.whl')[0]
+    finally:
+        if not keep_build_directories:
+            git('worktree', 'remove', '--force', worktree)
+
+def install_wheel(wheel_file):
+    subprocess.run([bisect_venv + '/bin/pip3', 'install', '--force-reinstall', '--no-deps', wheel_file], check=True, capture_output=True)
+
+def get_cached_times(commit):
+    """Times already logged for commit by earlier samples or earlier bisections"""
+    if not os.path.exists(bisect_log_file):
+        return []
+    con = sqlite3.connect(bisect_log_file)
+    try:
+        rows = con.execute("select scenario, time from results where benchmark = ?", [bisect_benchmark]).fetchall()
+    finally:
+        con.close()
+    times = []
+    for scenario, time in rows:
+        scenario = json.loads(scenario)
+        if scenario.get('bisect_commit') == commit and all(scenario.get(key) == value for key, value in bisect_scenario_filter.items()):
+            times.append(time)
+    return times
+
+def run_benchmark(commit, sample_count):
+    """Run benchmark_script.py with only bisect_test (and only bisect_benchmark for isolated steps) enabled"""
+    with open('benchmark_script.py', 'r') as script_file:
+        python_script = script_file.read()
+    env = {
+        **os.environ,
+        'DUCKDB_BENCHMARK_TESTS': bisect_test,
+        'DUCKDB_BENCHMARK_ISOLATED_STEPS': bisect_benchmark,
+        'DUCKDB_BENCHMARK_REPEAT': str(sample_count),
+        'DUCKDB_BENCHMARK_LOG_FILE': bisect_log_file,
+        'DUCKDB_BENCHMARK_SCENARIO': json.dumps({'bisect_commit': commit}),
+    }
+    result = subprocess.run([bisect_venv + '/bin/python', '-c', python_script], capture_output=True, text=True, env=env)
+    print(result.stdout[-5000:])
+    print('result.stderr:\n', result.stderr[-5000:], flush=True)
+
+installed_commit = None
+
+def get_times(commit, sample_count):
+    """At least sample_count times for commit, building and running it only for the samples that are not cached.
+    Returns None if the commit cannot be built"""
+    global installed_commit
+    times = get_cached_times(commit)
+    if len(times) >= sample_count:
+        return times
+    if installed_commit != commit:
+        wheel_file = build_wheel(commit)
+        if wheel_file is None:
+            return None
+        install_wheel(wheel_file)
+        installed_commit = commit
+    run_benchmark(commit, sample_count - len(times))
+    times = get_cached_times(commit)
+    if len(times) < sample_count:
+        raise Exception(f'{bisect_benchmark} logged {len(times)} of {sample_count} times for {commit}. Check bisect_test and bisect_scenario_filter')
+    return times
+
+def mann_whitney_p_value(baseline_times, candidate_times):
+    """One sided p-value for candidate_times being larger than baseline_times.
+    Uses the normal approximation of the U statistic (with a continuity correction), which is close enough from 5 samples each"""
+    u = sum(1 if candidate > baseline else 0.5 if candidate == baseline else 0 for candidate in candidate_times for baseline in baseline_times)
+    n1, n2 = len(baseline_times), len(candidate_times)
+    mean_u = n1 * n2 / 2
+    sd_u = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    z = (u - mean_u - 0.5) / sd_u
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def classify(baseline_times, candidate_times):
+    """'bad', 'good' or None if more samples are needed"""
+    slowdown = statistics.median(candidate_times) / statistics.median(baseline_times) - 1
+    is_significant = mann_whitney_p_value(baseline_times, candidate_times) < significance_level
+    if slowdown >= slowdown_threshold and is_significant:
+        return 'bad'
+    # Not slow enough, or slower by less than half the threshold (too small to matter even if it is real)
+    if slowdown < slowdown_threshold and (not is_significant or slowdown < slowdown_threshold / 2):
+        return 'good'
+    return None
+
+def check_commit(commit, baseline_times):
+    """Verdict for git bisect: 'good', 'bad' or 'skip' if the commit cannot be built"""
+    sample_count = initial_sample_count
+    while True:
+        times = get_times(commit, sample_count)
+        if times is None:
+            return 'skip'
+        verdict = classify(baseline_times, times)
+        slowdown = statistics.median(times) / statistics.median(baseline_times) - 1
+        print(f'{commit}: median {statistics.median(times):.4f}s over {len(times)} samples, {slowdown:+.1%} vs good, verdict {verdict}', flush=True)
+        if verdict is not None:
+            return verdict
+        if sample_count >= max_sample_count:
+            # Still undecided, so fall back on the medians alone
+            return 'bad' if slowdown >= slowdown_threshold else 'good'
+        sample_count += initial_sample_count
+
+def bisect_regression():
+    """Returns the first bad commit, or None if the bad revision is not a regression or only skipped commits are left"""
+    create_bisect_venv()
+    good_commit = git('rev-parse', bisect_good_revision + '^{commit}')
+    bad_commit = git('rev-parse', bisect_bad_revision + '^{commit}')
+
+    # The good revision is the baseline for every comparison, so it gets the most samples
+    baseline_times = get_times(good_commit, max_sample_count)
+    if baseline_times is None:
+        raise Exception(f'The good revision {bisect_good_revision} does not build')
+    if check_commit(bad_commit, baseline_times) != 'bad':
+        print(f'{bisect_bad_revision} is not more than {slowdown_threshold:.0%} slower than {bisect_good_revision} on {bisect_benchmark}', flush=True)
+        return None
+
+    # --no-checkout leaves the working tree of the checkout alone, and only moves BISECT_HEAD
+    git('bisect', 'start', '--no-checkout', bad_commit, good_commit)
+    first_bad_commit = None
+    try:
+        while True:
+            commit = git('rev-parse', 'BISECT_HEAD')
+            # git bisect exits with 2 once only skipped commits are left, so the output is checked before the exit code
+            result = run_git('bisect', check_commit(commit, baseline_times), commit)
+            output = result.stdout.strip()
+            print(output, flush=True)
+            if 'only \'skip\'ped commits left' in output:
+                break
+            if result.returncode != 0:
+                raise Exception(f"git bisect failed on {commit}:\n{result.stderr}")
+            if 'is the first bad commit' in output:
+                first_bad_commit = output.split()[0]
+                break
+        print(git('bisect', 'log'), flush=True)
+    finally:
+        git('bisect', 'reset')
+    return first_bad_commit
+
+
+if __name__ == '__main__':
+    print('First bad commit:', bisect_regression())
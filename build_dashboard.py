@@ -0,0 +1,375 @@
+import hashlib
+import json
+import os
+
+import duckdb
+import plotly.express as px
+import plotly.offline
+
+from build_results_warehouse import warehouse_file
+
+# Static dashboard built from the warehouse that build_results_warehouse.py maintains. Run it after the warehouse:
+#   python build_results_warehouse.py && python build_dashboard.py
+# then open dashboard/index.html. The aggregates behind each chart are also written to dashboard/data/<chart>.json
+dashboard_directory = 'dashboard'
+
+benchmark_type_order = ["CSV Import", "Scan other formats", "Analysis - Group By", 'Analysis - Join', 'Window Functions', "Export"]
+
+# Same grouping as analyze_benchmark_results.ipynb
+benchmark_type_sql = """
+    case when (benchmark ilike '%queries%' or benchmark ilike '%enums%') and benchmark ilike '%join%' then 'Analysis - Join'
+        when (benchmark ilike '%queries%' or benchmark ilike '%enums%') and benchmark not ilike '%join%' then 'Analysis - Group By'
+        when benchmark ilike '%csv%' then 'CSV Import'
+        when benchmark ilike '%scan%' or benchmark ilike '%query pandas%' then 'Scan other formats'
+        when benchmark ilike '%export%' then 'Export'
+        when benchmark ilike '%window%' then 'Window Functions'
+    end
+"""
+
+# The version trend charts only cover the default scenario of test_performance and test_window_performance,
+# so runs of the other storage placements or schemas are not summed into the same bar
+default_scenario_sql = """
+    benchmark < '100'
+    or benchmark ilike '%windowing performance test%'
+"""
+default_dimensions_sql = """
+    coalesce(scenario::json ->> 'schema', 'enum') = 'enum'
+    and coalesce(scenario::json ->> 'storage_placement', 'venv') = 'venv'
+    and coalesce(scenario::json ->> 'isolation', 'none') = 'none'
+"""
+
+# Median time of each benchmark for each version, then summed by benchmark type
+time_by_type_sql = f"""
+    with median_results as (
+        from results
+        select
+            duckdb_version,
+            version_rank,
+            release_date,
+            benchmark,
+            median(time) as time,
+        where ({default_scenario_sql}) and {default_dimensions_sql}
+        group by all
+    )
+    from median_results
+    select
+        duckdb_version,
+        version_rank,
+        release_date,
+        {benchmark_type_sql} as benchmark_type,
+        sum(time) as time,
+        count(*) as benchmark_count,
+    where benchmark_type is not null
+    group by all
+    order by version_rank, benchmark_type
+"""
+
+relative_to_latest_sql = f"""
+    with time_by_type as ({time_by_type_sql})
+    from time_by_type
+    select
+        duckdb_version,
+        version_rank,
+        benchmark_type,
+        time / last(time order by version_rank) over (partition by benchmark_type) as time_relative_to_latest,
+    order by version_rank, benchmark_type
+"""
+
+def scale_matrix_sql(query_benchmark):
+    """1 if the queries of a scale test finished for a version and row count, 0 if they did not.
+    A failed step is not logged, so every version that ran any scale test is a candidate."""
+    return f"""
+        with scale_results as (
+            from results
+            select duckdb_version, version_rank, scenario::json ->> 'row_count' as row_count, benchmark
+            where benchmark ilike '%scale test%' and {default_dimensions_sql}
+        ), version_combos as (
+            select *
+            from (select distinct duckdb_version, version_rank from scale_results)
+            cross join (select distinct row_count from scale_results where row_count is not null)
+        )
+        from version_combos
+        left join scale_results
+            on version_combos.duckdb_version = scale_results.duckdb_version
+            and version_combos.row_count = scale_results.row_count
+            and scale_results.benchmark = '{query_benchmark}'
+        select
+            version_combos.duckdb_version,
+            version_combos.version_rank,
+            version_combos.row_count,
+            max(case when scale_results.benchmark is not null then 1 else 0 end) as passed,
+        group by all
+        order by version_combos.version_rank, version_combos.row_count
+    """
+
+# One bar per venv, since the same DuckDB version can be run with several pandas and pyarrow versions
+environment_sql = """
+    duckdb_version || ' / pandas ' || coalesce(scenario::json ->> 'pandas_version', '-') || ' / pyarrow ' || coalesce(scenario::json ->> 'pyarrow_version', '-')
+"""
+
+startup_sql = f"""
+    from results
+    select
+        {environment_sql} as environment,
+        version_rank,
+        benchmark,
+        median(time) as time,
+    where benchmark in ('801 Startup: import duckdb', '802 Startup: connect', '803 Startup: first query')
+        and {default_dimensions_sql}
+    group by all
+    order by version_rank, environment, benchmark
+"""
+
+# Self time of the modules imported by import duckdb, grouped by top level package into the libraries we care about
+import_cost_by_package_sql = f"""
+    with median_packages as (
+        from metrics
+        select
+            {environment_sql} as environment,
+            version_rank,
+            scenario::json ->> 'module' as module,
+            split_part(module, '.', 1) as package,
+            case when package in ('duckdb', '_duckdb') then 'duckdb'
+                when package in ('pandas', 'numpy', 'pyarrow') then package
+                else 'other'
+            end as package_group,
+            median(value) as import_self_seconds,
+        where benchmark = '805 Startup: import duckdb with -X importtime'
+            and metric = 'import_self_seconds'
+        group by all
+    )
+    from median_packages
+    select environment, version_rank, package_group, sum(import_self_seconds) as import_self_seconds
+    group by all
+    order by version_rank, environment, package_group
+"""
+
+# Each sample relative to the median of the same benchmark, version and scenario, by when it started.
+# A trend over the run (rather than noise around 0) is drift, which an interleaved schedule spreads over all versions
+drift_sql = f"""
+    with timed_results as (
+        from results
+        join metrics using (log_key, run_id, repeat_id, benchmark, scenario)
+        select
+            results.log_key,
+            results.duckdb_version,
+            results.version_rank,
+            benchmark,
+            scenario,
+            time,
+            to_timestamp(value) as started_at,
+        where metric = 'start_timestamp_seconds' and {default_dimensions_sql}
+    )
+    from timed_results
+    select
+        log_key,
+        duckdb_version,
+        version_rank,
+        benchmark,
+        started_at,
+        time / median(time) over (partition by benchmark, duckdb_version, scenario) - 1 as relative_residual,
+    order by started_at
+"""
+
+# Speed index of each calibration window, a run or an interleaved schedule (see create_calibration_views in build_results_warehouse.py)
+run_calibration_sql = """
+    from run_calibration
+    select
+        log_key[:8] || ' run ' || run_id || case when last_run_id > run_id then '-' || last_run_id else '' end as run,
+        machine_speed_index,
+        max_start_end_difference,
+        case when is_noisy_run then 'noisy' else 'stable' end as host_state,
+    order by log_key, run_id
+"""
+
+def time_by_version_figure(df):
+    return px.area(
+        df,
+        x='duckdb_version',
+        y='time',
+        color='benchmark_type',
+        category_orders={'benchmark_type': benchmark_type_order},
+        labels={'duckdb_version': 'DuckDB Version', 'time': 'Time (seconds)', 'benchmark_type': 'Benchmark Type'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.T10,
+    )
+
+def time_by_release_date_figure(df):
+    return px.line(
+        df[df['release_date'].notnull()],
+        x='release_date',
+        y='time',
+        color='benchmark_type',
+        hover_data=['duckdb_version'],
+        category_orders={'benchmark_type': benchmark_type_order},
+        labels={'release_date': 'Release Date', 'time': 'Time (seconds)', 'benchmark_type': 'Benchmark Type'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.T10,
+        markers=True,
+    )
+
+def relative_to_latest_figure(df):
+    return px.line(
+        df,
+        x='duckdb_version',
+        y='time_relative_to_latest',
+        color='benchmark_type',
+        category_orders={'benchmark_type': benchmark_type_order},
+        labels={'duckdb_version': 'DuckDB Version', 'time_relative_to_latest': 'Time Relative to Latest Version', 'benchmark_type': 'Benchmark Type'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.T10,
+        markers=True,
+    )
+
+def startup_figure(df):
+    return px.bar(
+        df,
+        x='environment',
+        y='time',
+        color='benchmark',
+        labels={'environment': 'Environment', 'time': 'Time (seconds)', 'benchmark': 'Step'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.T10,
+    )
+
+def import_cost_by_package_figure(df):
+    return px.bar(
+        df,
+        x='environment',
+        y='import_self_seconds',
+        color='package_group',
+        labels={'environment': 'Environment', 'import_self_seconds': 'Import time (seconds)', 'package_group': 'Package'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.T10,
+    )
+
+def drift_figure(df):
+    return px.scatter(
+        df,
+        x='started_at',
+        y='relative_residual',
+        color='duckdb_version',
+        hover_data=['benchmark'],
+        labels={'started_at': 'Sample Start', 'relative_residual': 'Time Relative to Median', 'duckdb_version': 'DuckDB Version'},
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.T10,
+    )
+
+def run_calibration_figure(df):
+    return px.bar(
+        df,
+        x='run',
+        y='machine_speed_index',
+        color='host_state',
+        hover_data=['max_start_end_difference'],
+        labels={'run': 'Run', 'machine_speed_index': 'Machine Speed Index (above 1 is slower)', 'host_state': 'Start vs End Calibration'},
+        template='plotly_white',
+        color_discrete_map={'stable': '#59a14f', 'noisy': '#e15759'},
+    )
+
+def scale_matrix_figure(df):
+    matrix = df.pivot(index='row_count', columns='duckdb_version', values='passed')
+    # pivot sorts the versions as strings
+    matrix = matrix[df.sort_values('version_rank')['duckdb_version'].unique()]
+    return px.imshow(
+        matrix,
+        labels={'x': 'DuckDB Version', 'y': 'Row Count', 'color': 'Passed'},
+        color_continuous_scale=['#e15759', '#59a14f'],
+        zmin=0,
+        zmax=1,
+        aspect='auto',
+    )
+
+charts = [
+    {'name': 'time_by_version', 'title': 'Time by benchmark type and DuckDB version', 'query': time_by_type_sql, 'figure': time_by_version_figure},
+    {'name': 'time_by_release_date', 'title': 'Time by benchmark type and release date', 'query': time_by_type_sql, 'figure': time_by_release_date_figure},
+    {'name': 'relative_to_latest', 'title': 'Time relative to the latest version', 'query': relative_to_latest_sql, 'figure': relative_to_latest_figure},
+    {'name': 'scale_group_by', 'title': 'Group by scale test: queries completed', 'query': scale_matrix_sql('103 Group By Scale test: Group by queries'), 'figure': scale_matrix_figure},
+    {'name': 'scale_join', 'title': 'Join scale test: queries completed', 'query': scale_matrix_sql('203 Join Scale test: Join queries'), 'figure': scale_matrix_figure},
+    {'name': 'startup', 'title': 'Cold start: import duckdb, connect and first query', 'query': startup_sql, 'figure': startup_figure},
+    # Charts from other warehouse tables are skipped until a log with that table has been loaded
+    {'name': 'import_cost_by_package', 'title': 'Cold start: import time by package', 'query': import_cost_by_package_sql, 'figure': import_cost_by_package_figure, 'table': 'metrics'},
+    {'name': 'run_calibration', 'title': 'Calibration: machine speed index by run', 'query': run_calibration_sql, 'figure': run_calibration_figure},
+    {'name': 'drift', 'title': 'Drift: each sample relative to its median, by start time', 'query': drift_sql, 'figure': drift_figure, 'table': 'metrics'},
+]
+
+
+def get_chart_hash(chart, data_json):
+    """A chart only needs to be drawn again if its data or its query changed.
+    After editing a figure function, rebuild with force=True"""
+    return hashlib.md5((chart['title'] + chart['query'] + data_json).encode()).hexdigest()
+
+def read_manifest(manifest_file):
+    if not os.path.exists(manifest_file):
+        return {'load_id': None, 'charts': {}}
+    with open(manifest_file, 'r') as f:
+        return json.load(f)
+
+def write_chart(chart, df, data_json):
+    with open(f'{dashboard_directory}/data/{chart["name"]}.json', 'w') as f:
+        f.write(data_json)
+    figure = chart['figure'](df)
+    figure.update_layout(title=chart['title'])
+    with open(f'{dashboard_directory}/charts/{chart["name"]}.html', 'w') as f:
+        f.write(figure.to_html(full_html=False, include_plotlyjs=False))
+
+def write_index(charts):
+    """One page with plotly.js inlined once, so the dashboard can be opened offline or copied anywhere"""
+    chart_divs = []
+    for chart in charts:
+        with open(f'{dashboard_directory}/charts/{chart["name"]}.html', 'r') as f:
+            chart_divs.append(f'<h2>{chart["title"]}</h2>\n{f.read()}')
+    with open(f'{dashboard_directory}/index.html', 'w') as f:
+        f.write('<html>\n<head><meta charset="utf-8"><title>DuckDB benchmark results</title>\n')
+        f.write(f'<script type="text/javascript">{plotly.offline.get_plotlyjs()}</script>\n</head>\n<body>\n')
+        f.write('\n'.join(chart_divs))
+        f.write('\n</body>\n</html>\n')
+
+def build_dashboard(warehouse_file=warehouse_file, force=False):
+    """Redraw the charts whose aggregates changed since the last build. Returns the names of the redrawn charts"""
+    os.makedirs(f'{dashboard_directory}/data', exist_ok=True)
+    os.makedirs(f'{dashboard_directory}/charts', exist_ok=True)
+    manifest_file = f'{dashboard_directory}/manifest.json'
+    manifest = read_manifest(manifest_file)
+
+    con = duckdb.connect(warehouse_file, read_only=True)
+    load_id = con.execute("select max(load_id) from loaded_logs").fetchall()[0][0]
+    if load_id == manifest['load_id'] and not force and os.path.exists(f'{dashboard_directory}/index.html'):
+        print('No new results since the last dashboard build')
+        con.close()
+        return []
+
+    warehouse_tables = [row[0] for row in con.execute("select table_name from duckdb_tables()").fetchall()]
+    redrawn_charts = []
+    failed_charts = []
+    for chart in charts:
+        if chart.get('table', 'results') not in warehouse_tables:
+            continue
+        try:
+            df = con.execute(chart['query']).df()
+            data_json = df.to_json(orient='records', date_format='iso')
+            chart_hash = get_chart_hash(chart, data_json)
+            chart_file = f'{dashboard_directory}/charts/{chart["name"]}.html'
+            if not force and manifest['charts'].get(chart['name']) == chart_hash and os.path.exists(chart_file):
+                continue
+            write_chart(chart, df, data_json)
+            manifest['charts'][chart['name']] = chart_hash
+            redrawn_charts.append(chart['name'])
+        except Exception as err:
+            print('ERROR drawing chart', chart['name'])
+            print(err)
+            failed_charts.append(chart['name'])
+    con.close()
+
+    if redrawn_charts or not os.path.exists(f'{dashboard_directory}/index.html'):
+        write_index([chart for chart in charts if os.path.exists(f'{dashboard_directory}/charts/{chart["name"]}.html')])
+    # Failed charts are retried on the next build even if there are no new results
+    if not failed_charts:
+        manifest['load_id'] = load_id
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return redrawn_charts
+
+
+if __name__ == '__main__':
+    print('Redrew', build_dashboard())
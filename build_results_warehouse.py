@@ -0,0 +1,272 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import duckdb
+import pandas as pd
+
+from duckdb_versions import versions
+
+# Every SQLite log in this folder, including the benchmark_log_pythonarchived_at_<time>.db copies
+# that benchmark_loop_python.py leaves behind at the start of each run
+log_file_pattern = 'benchmark_log*.db'
+warehouse_file = 'results_warehouse.duckdb'
+# Parquet copy of the warehouse, partitioned by duckdb_version and benchmark. Set to None to skip it
+parquet_directory = 'results_warehouse'
+
+# SQLite tables written by SQLiteLogger. Older logs only have results
+log_tables = ['results', 'metrics', 'histograms']
+
+# A run is flagged as noisy when its start and end calibrations (85x benchmarks in benchmark_script.py) differ by more than this
+noisy_run_threshold = 0.10
+
+# Columns added on top of the SQLite columns. Scenario keys that clash with these are left in the scenario json
+warehouse_columns = ['log_key', 'log_rowid', 'source_file', 'load_id', 'duckdb_version', 'version_rank', 'release_date']
+
+
+def get_log_files(pattern=log_file_pattern):
+    return sorted(glob.glob(pattern))
+
+def get_log_key(sqlite_con):
+    """Identify a log by its first result rather than its filename.
+    benchmark_loop_python.py renames benchmark_log_python.db when it archives it, so the same rows
+    must not be loaded again under the archived name. Returns None for a log without results."""
+    first_row = sqlite_con.execute("select run_id, repeat_id, benchmark, scenario, time from results order by rowid limit 1").fetchall()
+    if not first_row:
+        return None
+    return hashlib.md5(json.dumps(first_row[0]).encode()).hexdigest()
+
+def get_sqlite_tables(sqlite_con):
+    return [row[0] for row in sqlite_con.execute("select name from sqlite_master where type = 'table'").fetchall()]
+
+def create_warehouse_tables(con):
+    con.execute("""
+        create table if not exists loaded_logs (
+            log_key varchar,
+            table_name varchar,
+            max_rowid bigint,
+            source_file varchar,
+            load_id int,
+            loaded_at timestamp
+        )
+    """)
+    con.execute("create table if not exists parquet_exports (table_name varchar, load_id int)")
+    con.execute("create or replace temp table duckdb_release_dates (version varchar, release_date date)")
+    release_dates = [(version, details['date'].date()) for version, details in versions.items() if version != 'latest']
+    con.executemany("insert into duckdb_release_dates values (?, ?)", release_dates)
+
+def get_max_loaded_rowid(con, log_key, table_name):
+    max_rowid = con.execute("select max(max_rowid) from loaded_logs where log_key = ? and table_name = ?", [log_key, table_name]).fetchall()[0][0]
+    return 0 if max_rowid is None else max_rowid
+
+def read_new_rows(sqlite_con, table_name, min_rowid):
+    """Rows appended to a SQLite log table since the last load. SQLiteLogger only ever inserts, so rowids only grow"""
+    cursor = sqlite_con.execute(f"select rowid as log_rowid, * from {table_name} where rowid > ? order by rowid", [min_rowid])
+    column_names = [column[0] for column in cursor.description]
+    return pd.DataFrame(cursor.fetchall(), columns=column_names)
+
+def get_scenario_keys(con, staged_view):
+    keys = con.execute(f"select distinct unnest(json_keys(scenario)) as key from {staged_view} order by key").fetchall()
+    return [key[0] for key in keys if key[0] != 'duckdb_version']
+
+def build_parsed_query(con, staged_view, table_name, sqlite_columns, log_key, source_file, load_id):
+    """Select the staged rows with the version and scenario already parsed, so analysis queries do not need
+    the version_ranks CTE from the notebooks"""
+    scenario_columns = [
+        f"""scenario::json ->> '{key}' as "{key}" """
+        for key in get_scenario_keys(con, staged_view)
+        if key not in warehouse_columns and key not in sqlite_columns
+    ]
+    return f"""
+        with staged as (
+            select
+                *,
+                ltrim(scenario::json ->> 'duckdb_version', 'v') as parsed_version,
+                string_split(parsed_version, '.') as split_version,
+            from {staged_view}
+        )
+        select
+            '{log_key}' as log_key,
+            log_rowid,
+            '{source_file}' as source_file,
+            {load_id} as load_id,
+            {', '.join(sqlite_columns)},
+            parsed_version as duckdb_version,
+            try_cast(split_version[1] as int) * 100 * 100
+                + try_cast(split_version[2] as int) * 100
+                + try_cast(string_split(split_version[3], '-')[1] as int) as version_rank,
+            duckdb_release_dates.release_date,
+            {''.join(column + ', ' for column in scenario_columns)}
+        from staged
+        left join duckdb_release_dates
+            on staged.parsed_version = duckdb_release_dates.version
+    """
+
+def add_missing_columns(con, table_name, parsed_view):
+    """Scenario keys are added as new columns the first time they show up in a log"""
+    existing_columns = [row[0] for row in con.execute(f"select column_name from information_schema.columns where table_name = '{table_name}' and table_schema = 'main'").fetchall()]
+    for column_name, column_type in con.execute(f"select column_name, column_type from (describe {parsed_view})").fetchall():
+        if column_name not in existing_columns:
+            con.execute(f"""alter table {table_name} add column "{column_name}" {column_type}""")
+
+def load_log_table(con, sqlite_con, log_key, source_file, table_name, load_id):
+    new_rows = read_new_rows(sqlite_con, table_name, get_max_loaded_rowid(con, log_key, table_name))
+    if len(new_rows) == 0:
+        return 0
+    sqlite_columns = [column for column in new_rows.columns if column != 'log_rowid']
+
+    con.register('staged_rows', new_rows)
+    con.execute(f"create or replace temp view parsed_rows as {build_parsed_query(con, 'staged_rows', table_name, sqlite_columns, log_key, source_file, load_id)}")
+    con.execute(f"create table if not exists {table_name} as select * from parsed_rows limit 0")
+    add_missing_columns(con, table_name, 'parsed_rows')
+    con.execute(f"insert into {table_name} by name select * from parsed_rows")
+    con.execute("insert into loaded_logs values (?, ?, ?, ?, ?, ?)", [log_key, table_name, int(new_rows['log_rowid'].max()), source_file, load_id, datetime.now()])
+    con.unregister('staged_rows')
+    return len(new_rows)
+
+def create_calibration_views(con):
+    """run_calibration has one row per calibration window with a machine_speed_index: the geometric mean of its
+    calibration times relative to the median of all windows (per DuckDB version for the CPU query, which depends on the version).
+    Above 1 the host was slower than usual. A window runs from the run_id of a start calibration to the last end calibration
+    before the next start: one run_id for a full benchmark_script.py call, and the whole schedule for the interleaved or
+    planned work units, which benchmark_loop_python.py brackets with calibration-only calls.
+    calibrated_results divides each time by the speed index of the window around its run_id,
+    and flags the windows where the start and end calibrations disagree by more than noisy_run_threshold"""
+    con.execute(f"""
+        create or replace view run_calibration as
+        with calibration_points as (
+            from results
+            select distinct
+                log_key,
+                run_id,
+                scenario::json ->> 'calibration' as calibration_point,
+            where benchmark like '85_ Calibration:%'
+        ), calibration_windows as (
+            from calibration_points
+            select
+                *,
+                -- 'start' sorts after 'end', so a call that logs both opens its window before closing it
+                count(*) filter (where calibration_point = 'start') over (
+                    partition by log_key order by run_id, calibration_point desc rows unbounded preceding
+                ) as window_number,
+        ), calibrations as (
+            from results
+            join calibration_windows
+                on results.log_key = calibration_windows.log_key
+                and results.run_id = calibration_windows.run_id
+                and (results.scenario::json ->> 'calibration') = calibration_windows.calibration_point
+            select
+                results.log_key,
+                window_number,
+                min(results.run_id) as first_run_id,
+                max(results.run_id) as last_run_id,
+                duckdb_version,
+                benchmark,
+                median(time) filter (where calibration_point = 'start') as start_time,
+                median(time) filter (where calibration_point = 'end') as end_time,
+                median(time) as time,
+            where benchmark like '85_ Calibration:%'
+            group by results.log_key, window_number, duckdb_version, benchmark
+        ), relative_calibrations as (
+            from calibrations
+            select
+                *,
+                time / median(time) over (
+                    partition by benchmark, case when benchmark = '851 Calibration: CPU bound query' then duckdb_version end
+                ) as relative_time,
+                abs(end_time / start_time - 1) as start_end_difference,
+        )
+        from relative_calibrations
+        select
+            log_key,
+            min(first_run_id) as run_id,
+            max(last_run_id) as last_run_id,
+            exp(avg(ln(relative_time))) as machine_speed_index,
+            max(start_end_difference) as max_start_end_difference,
+            coalesce(max(start_end_difference) > {noisy_run_threshold}, false) as is_noisy_run,
+        group by log_key, window_number
+    """)
+    con.execute("""
+        create or replace view calibrated_results as
+        from results
+        left join run_calibration
+            on results.log_key = run_calibration.log_key
+            and results.run_id between run_calibration.run_id and run_calibration.last_run_id
+        select
+            results.*,
+            run_calibration.machine_speed_index,
+            run_calibration.is_noisy_run,
+            results.time / run_calibration.machine_speed_index as normalized_time,
+    """)
+
+def export_parquet(con, table_name, load_id, parquet_directory):
+    """Append the rows of one load to the Parquet copy. Each load writes new files, so read the copy back with
+    read_parquet('<parquet_directory>/<table>/**/*.parquet', hive_partitioning=true, union_by_name=true)"""
+    os.makedirs(f'{parquet_directory}/{table_name}', exist_ok=True)
+    con.execute(f"""
+        copy (from {table_name} where load_id = {load_id})
+        to '{parquet_directory}/{table_name}'
+        (format parquet, partition_by (duckdb_version, benchmark), overwrite_or_ignore, filename_pattern 'load_{load_id}_{{uuid}}')
+    """)
+    con.execute("insert into parquet_exports values (?, ?)", [table_name, load_id])
+
+def export_pending_parquet(con, parquet_directory):
+    """Export every load that is not in the Parquet copy yet, including loads from an earlier run that failed to export"""
+    pending_exports = con.execute("""
+        select distinct table_name, load_id from loaded_logs
+        anti join parquet_exports using (table_name, load_id)
+        order by load_id, table_name
+    """).fetchall()
+    for table_name, load_id in pending_exports:
+        export_parquet(con, table_name, load_id, parquet_directory)
+
+def build_warehouse(log_files, warehouse_file=warehouse_file, parquet_directory=parquet_directory):
+    """Load the rows that are not in the warehouse yet from each SQLite log. Returns {table_name: new_row_count}"""
+    con = duckdb.connect(warehouse_file)
+    create_warehouse_tables(con)
+    load_id = con.execute("select coalesce(max(load_id), 0) + 1 from loaded_logs").fetchall()[0][0]
+
+    new_row_counts = {table_name: 0 for table_name in log_tables}
+    for log_file in log_files:
+        sqlite_con = sqlite3.connect(log_file)
+        try:
+            sqlite_tables = get_sqlite_tables(sqlite_con)
+            if 'results' not in sqlite_tables:
+                print('Skipping', log_file, '- no results table')
+                continue
+            log_key = get_log_key(sqlite_con)
+            if log_key is None:
+                continue
+            # All tables of a log load together, so a failure leaves loaded_logs consistent with the data
+            con.begin()
+            file_row_counts = {}
+            for table_name in log_tables:
+                if table_name in sqlite_tables:
+                    file_row_counts[table_name] = load_log_table(con, sqlite_con, log_key, os.path.basename(log_file), table_name, load_id)
+            con.commit()
+            for table_name, new_row_count in file_row_counts.items():
+                if new_row_count:
+                    print('Loaded', new_row_count, 'new rows from', log_file, table_name)
+                new_row_counts[table_name] += new_row_count
+        except Exception as err:
+            con.rollback()
+            print('ERROR loading', log_file)
+            print(err)
+        finally:
+            sqlite_con.close()
+
+    if 'results' in [row[0] for row in con.execute("select table_name from information_schema.tables where table_schema = 'main'").fetchall()]:
+        create_calibration_views(con)
+    if parquet_directory is not None:
+        export_pending_parquet(con, parquet_directory)
+    con.close()
+    return new_row_counts
+
+
+if __name__ == '__main__':
+    log_files = get_log_files()
+    print('Found', len(log_files), 'SQLite logs')
+    print(build_warehouse(log_files))
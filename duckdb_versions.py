@@ -0,0 +1,51 @@
+from datetime import datetime
+
+# Release dates of the DuckDB versions that benchmark_loop_python.py installs into venvs.
+# Also used by build_results_warehouse.py to attach a release date to each result
+
+# Versions:
+# 0.2.7 is the first with MacOS ARM
+# Runs on Python 3.9
+# (0.10.0 also runs on Python 3.9)
+
+versions = {
+    # No precompiled CLI prior to 0.1.9
+    # '0.1.3': {'date':datetime.strptime('2020-02-03','%Y-%m-%d')},
+    # '0.1.5': {'date':datetime.strptime('2020-03-02','%Y-%m-%d')},
+    # '0.1.6': {'date':datetime.strptime('2020-04-05','%Y-%m-%d')},
+    # '0.1.7': {'date':datetime.strptime('2020-05-04','%Y-%m-%d')},
+    # '0.1.8': {'date':datetime.strptime('2020-05-29','%Y-%m-%d')},
+    # '0.1.9': {'date':datetime.strptime('2020-06-19','%Y-%m-%d')},
+    # '0.2.0': {'date':datetime.strptime('2020-07-23','%Y-%m-%d')},
+    # '0.2.1': {'date':datetime.strptime('2020-08-29','%Y-%m-%d')},
+    # '0.2.2': {'date':datetime.strptime('2020-11-01','%Y-%m-%d')},
+    # '0.2.3': {'date':datetime.strptime('2020-12-03','%Y-%m-%d')},
+    # '0.2.4': {'date':datetime.strptime('2021-02-01','%Y-%m-%d')},
+    # '0.2.5': {'date':datetime.strptime('2021-03-10','%Y-%m-%d')},
+    # '0.2.6': {'date':datetime.strptime('2021-05-08','%Y-%m-%d')},
+
+    # 0.2.7 is the first with MacOS ARM
+    '0.2.7': {'date':datetime.strptime('2021-06-14','%Y-%m-%d')},
+    '0.2.8': {'date':datetime.strptime('2021-08-02','%Y-%m-%d')},
+    '0.2.9': {'date':datetime.strptime('2021-09-06','%Y-%m-%d')},
+    '0.3.0': {'date':datetime.strptime('2021-10-06','%Y-%m-%d')},
+    '0.3.1': {'date':datetime.strptime('2021-11-16','%Y-%m-%d')},
+    '0.3.2': {'date':datetime.strptime('2022-02-07','%Y-%m-%d')},
+    # 0.3.3 did not upload to pip correctly so it should be skipped
+    # '0.3.3': {'date':datetime.strptime('2022-04-11','%Y-%m-%d')},
+    '0.3.4': {'date':datetime.strptime('2022-04-25','%Y-%m-%d'),'osx-universal':True},
+    '0.4.0': {'date':datetime.strptime('2022-06-20','%Y-%m-%d'),'osx-universal':True},
+    '0.5.1': {'date':datetime.strptime('2022-09-19','%Y-%m-%d'),'osx-universal':True},
+    '0.6.1': {'date':datetime.strptime('2022-12-06','%Y-%m-%d'),'osx-universal':True},
+    '0.7.1': {'date':datetime.strptime('2023-02-27','%Y-%m-%d'),'osx-universal':True},
+    '0.8.1': {'date':datetime.strptime('2023-06-13','%Y-%m-%d'),'osx-universal':True},
+    '0.9.0': {'date':datetime.strptime('2023-09-26','%Y-%m-%d'),'osx-universal':True},
+    '0.9.1': {'date':datetime.strptime('2023-10-11','%Y-%m-%d'),'osx-universal':True},
+    '0.9.2': {'date':datetime.strptime('2023-11-14','%Y-%m-%d'),'osx-universal':True},
+    '0.10.0': {'date':datetime.strptime('2024-02-13','%Y-%m-%d'),'osx-universal':True},
+    '0.10.1': {'date':datetime.strptime('2024-03-18','%Y-%m-%d'),'osx-universal':True},
+    '0.10.2': {'date':datetime.strptime('2024-04-17','%Y-%m-%d'),'osx-universal':True},
+    '0.10.3': {'date':datetime.strptime('2024-05-22','%Y-%m-%d'),'osx-universal':True},
+    '1.0.0': {'date':datetime.strptime('2024-06-03','%Y-%m-%d'),'osx-universal':True},
+    'latest': {'date':datetime.now(), 'osx-universal':True},
+}
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+from pathlib import Path
+
+# A workload is a directory of SQL files:
+#   setup.sql      optional, run before the queries (untimed)
+#   teardown.sql   optional, run after the queries (untimed)
+#   *.sql          every other file is one timed query, run in filename order
+#   workload.json  optional settings, see default_workload_settings
+# Each query file holds a single statement, since the CLI reports one time per statement.
+# Queries should return small results, because the CLI prints every row it returns.
+# {name} placeholders in any file are replaced by the bindings, like {data_directory}
+workloads_directory = 'workloads'
+setup_filename = 'setup.sql'
+teardown_filename = 'teardown.sql'
+settings_filename = 'workload.json'
+
+default_workload_settings = {
+    # Oldest and newest DuckDB versions to run the workload on, like "0.9.0". None for no limit
+    'min_version': None,
+    'max_version': None,
+    # Placeholder name -> file in the data directory, which may use {row_count}. Like {"group_by_csv": "G1_{row_count}_1e2_0_0.csv"}
+    'datasets': {},
+    # The workload runs once per row count. [null] for a workload without {row_count} datasets
+    'row_counts': [None],
+}
+
+
+def get_workload_directories(root=workloads_directory):
+    return sorted(str(path) for path in Path(root).iterdir() if path.is_dir())
+
+def load_workload_settings(directory):
+    settings_file = Path(directory) / settings_filename
+    if not settings_file.exists():
+        return dict(default_workload_settings)
+    with open(settings_file, 'r') as f:
+        return {**default_workload_settings, **json.load(f)}
+
+def parse_version(version):
+    """(major, minor, patch) from a version like 'v0.10.3', '0.10.3' or 'v1.1.0-dev123'"""
+    return tuple(int(part) for part in re.findall(r'[0-9]+', version.lstrip('v').split('-')[0])[:3])
+
+def is_version_supported(settings, duckdb_version):
+    version = parse_version(duckdb_version)
+    if settings['min_version'] is not None and version < parse_version(settings['min_version']):
+        return False
+    if settings['max_version'] is not None and version > parse_version(settings['max_version']):
+        return False
+    return True
+
+def get_workload_bindings(settings, data_directory, row_count):
+    """Placeholders for one row count: data_directory, row_count and the full path of each dataset.
+    Raises FileNotFoundError if a dataset is missing, so the workload can be skipped"""
+    bindings = {'data_directory': data_directory, 'row_count': row_count}
+    for name, dataset_file in settings['datasets'].items():
+        dataset_path = os.path.join(data_directory, render_sql(dataset_file, bindings))
+        if not os.path.exists(dataset_path):
+            raise FileNotFoundError(f'Dataset {name} not found at {dataset_path}')
+        bindings[name] = dataset_path
+    return bindings
+
+def render_sql(sql, bindings):
+    # Plain replace rather than str.format, so braces in the SQL itself (struct literals, lambdas) are left alone
+    for name, value in bindings.items():
+        sql = sql.replace('{' + name + '}', str(value))
+    return sql
+
+def read_sql_file(path, bindings):
+    if not os.path.exists(path):
+        return ''
+    with open(path, 'r') as sql_file:
+        return render_sql(sql_file.read(), bindings).strip()
+
+def load_workload(directory, bindings):
+    """Dict with the workload name, its setup and teardown scripts and its (query_name, sql) queries"""
+    directory = Path(directory)
+    queries = []
+    for path in sorted(directory.glob('*.sql')):
+        if path.name in [setup_filename, teardown_filename]:
+            continue
+        queries.append((path.stem, read_sql_file(path, bindings)))
+    return {
+        'name': directory.name,
+        'setup': read_sql_file(directory / setup_filename, bindings),
+        'queries': queries,
+        'teardown': read_sql_file(directory / teardown_filename, bindings),
+    }
+
+def split_statements(sql):
+    """Split a script on the semicolons that are not inside quotes or comments.
+    Older Python clients only run the first statement passed to execute"""
+    statements = []
+    current = ''
+    quote = None
+    in_line_comment = False
+    for i, char in enumerate(sql):
+        if in_line_comment:
+            if char == '\n':
+                in_line_comment = False
+            current += char
+            continue
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == '-' and sql[i:i + 2] == '--':
+            in_line_comment = True
+        elif char == ';':
+            statements.append(current)
+            current = ''
+            continue
+        current += char
+    statements.append(current)
+    # Drop the statements that are only whitespace or comments
+    return [statement.strip() for statement in statements if strip_comments(statement).strip()]
+
+def strip_comments(sql):
+    return '\n'.join(line.split('--')[0] for line in sql.splitlines())
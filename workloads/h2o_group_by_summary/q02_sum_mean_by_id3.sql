@@ -0,0 +1 @@
+SELECT count(*) AS groups, sum(v1) AS v1, avg(v3) AS v3 FROM (SELECT id3, sum(v1) AS v1, avg(v3) AS v3 FROM x GROUP BY id3) sub_query;
@@ -0,0 +1 @@
+SELECT id4, id5, max(v1) - min(v2) AS range_v1_v2 FROM x GROUP BY id4, id5;
@@ -0,0 +1 @@
+SELECT count(DISTINCT id1) AS id1, count(DISTINCT id2) AS id2, count(DISTINCT id3) AS id3 FROM x;
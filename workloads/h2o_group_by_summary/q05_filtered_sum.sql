@@ -0,0 +1 @@
+SELECT sum(v3) AS v3, count(*) AS count FROM x WHERE id6 < 50000 AND v1 > 2;
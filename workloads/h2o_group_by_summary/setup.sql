@@ -0,0 +1,2 @@
+-- The group by table from the h2o.ai benchmark, as in test_performance
+CREATE TABLE x AS SELECT * FROM read_csv_auto('{group_by_csv}');